@@ -0,0 +1,181 @@
+"""
+Scanner throughput and accuracy benchmark against a local target farm.
+
+Run from the pyscan_pro directory:
+
+    python -m benchmarks.bench_scanner [--scans tcp,fast,syn] [--engines thread,async] [--json FILE]
+
+Starts a TargetFarm on loopback (see benchmarks/target_farm.py: open ports,
+delayed banners, refused ports and ports that never answer), then scans it
+once per scan type x engine, each run in a fresh process so memory and CPU
+figures are its own. For every run it reports:
+  - probes/sec over the whole scan (including waiting for banners),
+  - p50/p99 probe latency of answered probes,
+  - peak RSS and CPU time (user + system) of the scanning process,
+  - accuracy against the farm's ground truth: open ports found / missed /
+    falsely reported, and banners captured correctly.
+With --json, the same figures plus the farm layout, commit and platform are
+written as one JSON document, for tracking across commits.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import subprocess
+import multiprocessing
+from datetime import datetime
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None # Windows: no peak RSS / CPU figures
+
+from benchmarks.target_farm import TargetFarm, add_farm_arguments, farm_from_args
+
+# (scan type, engine) pairs that exist; SYN always uses its own engine
+COMBINATIONS = {
+    ('tcp', 'thread'), ('tcp', 'async'),
+    ('fast', 'thread'), ('fast', 'async'),
+    ('syn', 'raw'),
+}
+
+def run_scan(host: str, ports: str, scan_type: str, engine: str, threads: int, timeout: float, results) -> None:
+    """Child process: one scan of the farm, reporting its findings and costs through `results`."""
+    from core.scanner import Scanner
+
+    scanner = Scanner(threads=threads, timeout=timeout, engine='thread' if engine == 'raw' else engine, discovery=False)
+    found: Dict[int, Optional[str]] = {}
+    done = [0]
+
+    def progress(current, total, status):
+        done[0] = current
+
+    def on_result(result):
+        if result['status'] == 'OPEN':
+            found[result['port']] = None
+
+    def on_banner(result):
+        found[result['port']] = result['banner']
+
+    started = time.perf_counter()
+    scanner.start_scan(host, ports, scan_type, progress, on_result, on_banner)
+    elapsed = time.perf_counter() - started
+
+    stats = scanner.stats()
+    usage = resource.getrusage(resource.RUSAGE_SELF) if resource else None
+    results.put({
+        'probes': done[0],
+        'seconds': round(elapsed, 3),
+        'p50_ms': stats['p50_ms'],
+        'p99_ms': stats['p99_ms'],
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        'peak_rss_kb': (usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss) if usage else None,
+        'cpu_seconds': round(usage.ru_utime + usage.ru_stime, 3) if usage else None,
+        'found': found,
+    })
+
+def measure(farm: TargetFarm, scan_type: str, engine: str, threads: int, timeout: float) -> Dict:
+    """Runs one scan in a fresh process and scores it against the farm's ground truth."""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=run_scan, args=(farm.host, farm.ports, scan_type, engine, threads, timeout, results))
+    process.start()
+    run = results.get()
+    process.join()
+
+    found = run.pop('found')
+    expected = farm.expected_open()
+    reported = set(found)
+    banners_ok = sum(1 for port in expected & reported if found[port] == farm.banners[port])
+    run.update({
+        'scan': scan_type,
+        'engine': engine,
+        'probes_per_sec': round(run['probes'] / run['seconds'], 1) if run['seconds'] else None,
+        'accuracy': {
+            'open_expected': len(expected),
+            'open_found': len(expected & reported),
+            'missed': len(expected - reported),
+            'false_open': len(reported - expected),
+            'recall': round(len(expected & reported) / len(expected), 4) if expected else None,
+            'banners_correct': banners_ok,
+        },
+    })
+    return run
+
+def can_raw_socket() -> bool:
+    try:
+        socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_TCP).close()
+        return True
+    except (PermissionError, OSError):
+        return False
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def print_table(runs: List[Dict]):
+    print(f"{'scan':<6} {'engine':<7} {'probes/sec':>11} {'p50 ms':>8} {'p99 ms':>8} {'RSS MiB':>8} {'CPU s':>7} {'found':>9} {'false':>6} {'banners':>8}")
+    for r in runs:
+        a = r['accuracy']
+        rss = f"{r['peak_rss_kb'] / 1024:.1f}" if r['peak_rss_kb'] is not None else "n/a"
+        cpu = f"{r['cpu_seconds']:.2f}" if r['cpu_seconds'] is not None else "n/a"
+        print(
+            f"{r['scan']:<6} {r['engine']:<7} {r['probes_per_sec']:>11,.0f} {r['p50_ms'] or 0:>8.3f} {r['p99_ms'] or 0:>8.3f} "
+            f"{rss:>8} {cpu:>7} {a['open_found']:>4}/{a['open_expected']:<4} {a['false_open']:>6} {a['banners_correct']:>8}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scans', default='tcp,fast,syn', help="Scan types to run (default: tcp,fast,syn)")
+    parser.add_argument('--engines', default='thread,async', help="Engines for connect-based scans (default: thread,async)")
+    parser.add_argument('--threads', type=int, default=100, help="Scanner threads (default: 100)")
+    parser.add_argument('--timeout', type=float, default=1.0, help="Initial probe timeout (default: 1.0)")
+    parser.add_argument('--json', metavar='FILE', help="Also write the results as JSON to FILE")
+    add_farm_arguments(parser)
+    args = parser.parse_args()
+
+    runs_wanted = []
+    for scan_type in args.scans.split(','):
+        for engine in (['raw'] if scan_type == 'syn' else args.engines.split(',')):
+            if (scan_type, engine) not in COMBINATIONS:
+                parser.error(f"unknown scan type / engine: {scan_type}/{engine}")
+            runs_wanted.append((scan_type, engine))
+    if ('syn', 'raw') in runs_wanted and not can_raw_socket():
+        print("Skipping syn: raw sockets need root / CAP_NET_RAW")
+        runs_wanted.remove(('syn', 'raw'))
+
+    with farm_from_args(args) as farm:
+        print(f"Target farm {farm.host}:{farm.ports} {farm.counts}")
+        runs = []
+        for scan_type, engine in runs_wanted:
+            runs.append(measure(farm, scan_type, engine, args.threads, args.timeout))
+            print(f"  {scan_type}/{engine}: {runs[-1]['seconds']} s")
+
+    print()
+    print_table(runs)
+    if args.json:
+        document = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'farm': farm.describe(),
+            'settings': {'threads': args.threads, 'timeout': args.timeout},
+            'runs': runs,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+if __name__ == '__main__':
+    sys.exit(main())
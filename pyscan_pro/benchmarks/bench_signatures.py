@@ -0,0 +1,89 @@
+"""
+Service signature matching benchmark.
+
+Run from the pyscan_pro directory:
+
+    python -m benchmarks.bench_signatures [--banners N]
+
+Matches a synthetic corpus of N banners (real-world-shaped responses from
+the services in the database, plus unrecognised noise) and reports
+banners/sec for:
+  - the first-byte bucketed rule index used by the banner stage,
+  - a naive pass testing every rule in order, for comparison,
+along with the average number of regexes run per banner.
+"""
+import sys
+import time
+import random
+import argparse
+
+from core.signatures import signature_database
+
+SAMPLES = [
+    b"SSH-2.0-OpenSSH_8.9p1 Ubuntu-3ubuntu0.6\r\n",
+    b"SSH-2.0-dropbear_2022.83\r\n",
+    b"220 (vsFTPd 3.0.5)\r\n",
+    b"220 ProFTPD 1.3.8 Server (Debian) [::ffff:10.0.0.5]\r\n",
+    b"220 mail.example.com ESMTP Postfix (Ubuntu)\r\n",
+    b"220 mx.example.org ESMTP Exim 4.96 Mon, 12 Oct 2026 10:00:00 +0000\r\n",
+    b"+OK Dovecot (Ubuntu) ready.\r\n",
+    b"* OK [CAPABILITY IMAP4rev1 SASL-IR LOGIN-REFERRALS ID ENABLE IDLE LITERAL+ STARTTLS AUTH=PLAIN] Dovecot (Ubuntu) ready.\r\n",
+    b"HTTP/1.1 200 OK\r\nServer: nginx/1.24.0\r\nContent-Type: text/html\r\nContent-Length: 612\r\n\r\n<!DOCTYPE html>",
+    b"HTTP/1.1 301 Moved Permanently\r\nDate: Mon, 12 Oct 2026 10:00:00 GMT\r\nServer: Apache/2.4.57 (Debian)\r\nLocation: https://example.com/\r\n\r\n",
+    b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nServer: Microsoft-IIS/10.0\r\nX-Powered-By: ASP.NET\r\n\r\n",
+    b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nServer: Kestrel\r\n\r\n",
+    b"HTTP/1.0 400 Bad Request\r\n\r\n",
+    b"J\x00\x00\x00\x0a8.0.36\x00\x08\x00\x00\x00abcdefgh\x00\xff\xff\xff\x02\x00\xff\xdf\x15",
+    b"+PONG\r\n",
+    b"-NOAUTH Authentication required.\r\n",
+    b"VERSION 1.6.21\r\n",
+    b"RFB 003.008\n",
+    b"\xff\xfd\x18\xff\xfd\x20\xff\xfd\x23\xff\xfd\x27",
+    b"\x15\x03\x01\x00\x02\x02\x46",
+    b"N",
+]
+
+NOISE = [
+    b"\x00\x00\x00\x00garbage from an unknown binary protocol",
+    b"Welcome to the custom service v2\r\n",
+    b"ERROR unknown command\r\n",
+    b"{\"status\": \"ok\", \"service\": \"internal-api\"}\n",
+]
+
+def naive_match(db, banner: bytes):
+    """Every rule in database order, without the first-byte index."""
+    for rule in db.rules:
+        found = rule.match(banner, '')
+        if found:
+            return found
+    return None
+
+def rate(fn, corpus) -> float:
+    started = time.perf_counter()
+    for banner in corpus:
+        fn(banner)
+    return len(corpus) / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--banners', type=int, default=200000, help="Corpus size (default: 200000)")
+    parser.add_argument('--noise', type=float, default=0.2, help="Fraction of unrecognised banners (default: 0.2)")
+    args = parser.parse_args()
+
+    db = signature_database()
+    rng = random.Random(1)
+    corpus = [rng.choice(NOISE if rng.random() < args.noise else SAMPLES) for _ in range(args.banners)]
+
+    matched = sum(1 for banner in set(corpus) if db.match(banner))
+    tried = sum(len(db.candidates(banner)) for banner in corpus) / len(corpus)
+
+    indexed = rate(db.match, corpus)
+    naive = rate(lambda banner: naive_match(db, banner), corpus)
+
+    print(f"{len(db.rules)} rules, {len(corpus):,} banners ({matched}/{len(set(corpus))} distinct banners identified)")
+    print(f"{'indexed (first-byte buckets)':<32} {indexed:>12,.0f} banners/sec   ~{tried:.1f} candidate rules/banner")
+    print(f"{'naive (all rules in order)':<32} {naive:>12,.0f} banners/sec   {len(db.rules)} rules/banner worst case")
+    print(f"{'speedup':<32} {indexed / naive:>12.1f}x")
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Simulated scan targets on loopback, for benchmarks.
+
+A TargetFarm lays out a contiguous block of ports on 127.0.0.1, each with
+one role:
+  - open:      accepts and sends a banner at once,
+  - delayed:   accepts and sends its banner after `banner_delay` seconds,
+  - refused:   nothing listening; the kernel answers with a RST,
+  - blackhole: a listener whose accept backlog is kept full, so further
+               SYNs are silently dropped and probes time out.
+Roles are shuffled (reproducibly, by `seed`) across the block. `truth` maps
+every port to its role, and `banners` the open ones to the banner they send.
+
+Run directly to keep a farm up for manual scans:
+
+    python -m benchmarks.target_farm [--open N] [--refused N] ...
+"""
+import sys
+import time
+import random
+import socket
+import asyncio
+import argparse
+import threading
+from typing import Dict, List, Optional, Set
+
+ROLES = ('open', 'delayed', 'refused', 'blackhole')
+
+class TargetFarm:
+    def __init__(
+        self,
+        base_port: int = 20000,
+        open: int = 200,
+        delayed: int = 50,
+        refused: int = 700,
+        blackhole: int = 50,
+        banner_delay: float = 0.3,
+        seed: int = 1,
+        host: str = "127.0.0.1"
+    ):
+        self.host = host
+        self.base_port = base_port
+        self.banner_delay = banner_delay
+        self.counts = {'open': open, 'delayed': delayed, 'refused': refused, 'blackhole': blackhole}
+        roles = [role for role in ROLES for _ in range(self.counts[role])]
+        random.Random(seed).shuffle(roles)
+        self.truth: Dict[int, str] = {base_port + i: role for i, role in enumerate(roles)}
+        self.banners: Dict[int, str] = {}
+        for port, role in self.truth.items():
+            if role == 'open':
+                self.banners[port] = f"SSH-2.0-FarmSSH_{port}"
+            elif role == 'delayed':
+                self.banners[port] = f"220 farm-{port} ESMTP FarmMail"
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._sockets: List[socket.socket] = []
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    @property
+    def ports(self) -> str:
+        """The farm's port block, as a port spec string."""
+        return f"{self.base_port}-{self.base_port + len(self.truth) - 1}"
+
+    def expected_open(self) -> Set[int]:
+        return set(self.banners)
+
+    def describe(self) -> Dict:
+        return dict(self.counts, host=self.host, ports=self.ports, banner_delay=self.banner_delay)
+
+    # --- Lifecycle ---
+
+    def start(self) -> "TargetFarm":
+        for port, role in self.truth.items():
+            if role == 'refused':
+                self._check_free(port)
+            elif role == 'blackhole':
+                self._blackhole(port)
+        self._thread = threading.Thread(target=self._serve, name="target-farm", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error:
+            self.stop()
+            raise self._error
+        return self
+
+    def stop(self):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = None
+        for s in self._sockets:
+            s.close()
+        self._sockets.clear()
+
+    def __enter__(self) -> "TargetFarm":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _check_free(self, port: int):
+        """A 'refused' port must really have nothing listening on it."""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            try:
+                s.bind((self.host, port))
+            except OSError as e:
+                raise OSError(f"port {port} is in use; pick another --base-port ({e})") from None
+
+    def _blackhole(self, port: int):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((self.host, port))
+        listener.listen(0)
+        # One never-accepted connection fills a zero backlog; after that the kernel drops SYNs
+        filler = socket.create_connection((self.host, port))
+        self._sockets += [listener, filler]
+
+    def _serve(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            servers = []
+            for port, role in self.truth.items():
+                if role in ('open', 'delayed'):
+                    handler = self._handler(self.banners[port], self.banner_delay if role == 'delayed' else 0.0)
+                    servers.append(self._loop.run_until_complete(
+                        asyncio.start_server(handler, self.host, port, backlog=1024, reuse_address=True)
+                    ))
+        except BaseException as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            for server in servers:
+                server.close()
+            self._loop.close()
+
+    @staticmethod
+    def _handler(banner: str, delay: float):
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                if delay:
+                    await asyncio.sleep(delay)
+                writer.write(banner.encode() + b"\r\n")
+                await writer.drain()
+                # Hold the connection until the client is done (or 5 s)
+                await asyncio.wait_for(reader.read(4096), 5.0)
+            except (OSError, asyncio.TimeoutError):
+                pass
+            finally:
+                writer.close()
+        return handle
+
+def add_farm_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--base-port', type=int, default=20000, help="First port of the farm (default: 20000)")
+    parser.add_argument('--open', type=int, default=200, help="Ports sending a banner at once (default: 200)")
+    parser.add_argument('--delayed', type=int, default=50, help="Ports sending a delayed banner (default: 50)")
+    parser.add_argument('--refused', type=int, default=700, help="Closed ports (default: 700)")
+    parser.add_argument('--blackhole', type=int, default=50, help="Ports that never answer (default: 50)")
+    parser.add_argument('--banner-delay', type=float, default=0.3, help="Seconds before a delayed banner (default: 0.3)")
+    parser.add_argument('--farm-seed', type=int, default=1, help="Seed for the role layout (default: 1)")
+
+def farm_from_args(args) -> TargetFarm:
+    return TargetFarm(
+        base_port=args.base_port, open=args.open, delayed=args.delayed, refused=args.refused,
+        blackhole=args.blackhole, banner_delay=args.banner_delay, seed=args.farm_seed
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_farm_arguments(parser)
+    args = parser.parse_args()
+    with farm_from_args(args) as farm:
+        print(f"Target farm on {farm.host} ports {farm.ports}: {farm.counts}. Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == '__main__':
+    sys.exit(main())
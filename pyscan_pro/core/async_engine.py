@@ -0,0 +1,236 @@
+import os
+import errno
+import asyncio
+import socket
+import time
+import logging
+import threading
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from core.metrics import errno_name
+from core.resources import RESOURCE_ERRNOS
+from core.timing import FAST_TIMEOUT
+from utils.helpers import REFUSED_ERRNOS, UNREACHABLE_ERRNOS, address_family
+
+logger = logging.getLogger("PyScanPro.Async")
+
+# connect_ex() results meaning the handshake is under way (Linux/Win)
+CONNECT_PENDING = (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY, 10035)
+
+
+class AsyncScanEngine:
+    """
+    Event-loop driven TCP connect scan engine.
+
+    Instead of parking one thread per probe on a blocking connect_ex(), every
+    probe is a non-blocking socket whose handshake the asyncio loop watches
+    for writability. A single thread can then keep thousands of
+    handshakes in flight; the only limit is the concurrency ceiling (and the
+    process file descriptor limit, since every in-flight probe owns a socket).
+    """
+    def __init__(self, scanner, concurrency: int = 1000):
+        self.scanner = scanner
+        self.concurrency = max(1, concurrency)
+        self.completed = 0
+        # Whether the loop has add_writer (see _handshake)
+        self._selector = True
+
+    def run(
+        self,
+        probes: Iterator[Tuple[str, int]],
+        total_tasks: int,
+        scan_type: str,
+        progress_callback: Callable[[int, int, str], None],
+        result_callback: Callable[[Dict], None]
+    ) -> int:
+        """
+        Runs the scan to completion on a private event loop.
+        `probes` is consumed lazily, off the event loop; at most `concurrency`
+        probes are queued and `concurrency` in flight at once. It may also
+        yield held result dicts to re-probe (see core.scanner.ProbeFeed).
+        Returns the number of completed probes.
+        """
+        self.completed = 0
+        asyncio.run(self._run(probes, total_tasks, scan_type, progress_callback, result_callback))
+        return self.completed
+
+    async def _run(self, probes, total_tasks, scan_type, progress_callback, result_callback):
+        # 'fast' caps the adaptive per-host timeout rather than replacing it
+        timeout_cap = FAST_TIMEOUT if scan_type == 'fast' else None
+        self._selector = isinstance(asyncio.get_running_loop(), asyncio.SelectorEventLoop)
+
+        queue = asyncio.Queue()
+        # Queued probes are bounded by this semaphore rather than the queue, since they are put from another thread
+        slots = threading.Semaphore(self.concurrency)
+        workers = [
+            asyncio.create_task(self._worker(queue, slots, total_tasks, timeout_cap, progress_callback, result_callback))
+            # Not capped by total_tasks, which is only an estimate for a TargetStream
+            for _ in range(self.concurrency)
+        ]
+        try:
+            await self._feed(probes, queue, slots)
+        finally:
+            for _ in workers:
+                queue.put_nowait(None)
+            await asyncio.gather(*workers)
+
+    async def _feed(self, probes, queue: asyncio.Queue, slots: threading.Semaphore):
+        """
+        Moves probes into `queue` from an executor thread: a TargetStream blocks
+        while it resolves hostnames, and doing that on the loop would stall
+        every connect timeout in flight.
+        """
+        loop = asyncio.get_running_loop()
+        while self.scanner.is_running:
+            await loop.run_in_executor(None, self._pull, probes, queue, slots, loop)
+            # The last probes in flight may still leave results to re-probe
+            await queue.join()
+            if not probes.pending():
+                return
+
+    def _pull(self, probes, queue: asyncio.Queue, slots: threading.Semaphore, loop: asyncio.AbstractEventLoop):
+        """Runs on an executor thread until `probes` runs dry or the scan stops."""
+        for probe in probes:
+            slots.acquire()
+            if not self.scanner.is_running:
+                return
+            loop.call_soon_threadsafe(queue.put_nowait, probe)
+
+    async def _worker(self, queue: asyncio.Queue, slots: threading.Semaphore, total_tasks, timeout_cap, progress_callback, result_callback):
+        while True:
+            probe = await queue.get()
+            try:
+                if probe is None:
+                    return
+                slots.release()
+                # Once stopped, queued probes are drained without being sent
+                if self.scanner.is_running:
+                    await self._scan(probe, total_tasks, timeout_cap, progress_callback, result_callback)
+            finally:
+                queue.task_done()
+
+    async def _scan(self, probe, total_tasks, timeout_cap, progress_callback, result_callback):
+        """Probes one (ip, port), or re-probes a held result dict, and delivers the result."""
+        retry = isinstance(probe, dict)
+        ip, port = (probe['ip'], probe['port']) if retry else probe
+        try:
+            if retry:
+                attempts = probe['attempts'] + 1
+                timeout = self.scanner._retry_timeout(ip, attempts)
+            else:
+                timeout = self.scanner.rtt.timeout_for(ip)
+                if timeout_cap:
+                    timeout = min(timeout, timeout_cap)
+            status, conn, answered = await self._probe(ip, port, timeout)
+            outcome = (self.scanner._collect_result(ip, port, status, answered), conn)
+
+            # Banners are grabbed by the scanner's banner stage threads, off the loop
+            if retry:
+                # The port was already counted the first time
+                self.scanner._deliver(*self.scanner._retried(outcome, attempts), result_callback)
+                return
+            self.completed += 1
+            self.scanner._deliver(*outcome, result_callback)
+            progress_callback(self.completed, total_tasks, "Scanning...")
+
+        except Exception as e:
+            self.scanner._log_error(f"async probe {ip}:{port}", e)
+            self.completed += 1
+            progress_callback(self.completed, total_tasks, "Error occurred")
+
+    async def _probe(self, ip: str, port: int, timeout: float) -> Tuple[str, Optional[socket.socket], bool]:
+        """
+        Non-blocking equivalent of Scanner._connect: (status, connection, answered).
+        For OPEN ports the connected socket is returned (switched back to
+        blocking mode) when the scanner reuses connections for banner grabbing.
+        """
+        loop = asyncio.get_running_loop()
+        rate_limiter = self.scanner.rate_limiter
+        if rate_limiter:
+            delay = rate_limiter.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        attempt, waited = 0, 0.0
+        while True:
+            try:
+                return await self._connect(loop, ip, port, timeout)
+            except OSError as e:
+                # Out of descriptors says nothing about the port: back off and retry (see Scanner._connect)
+                delay = self.scanner._resource_delay(attempt, waited, e)
+                await asyncio.sleep(delay)
+                attempt, waited = attempt + 1, waited + delay
+
+    async def _connect(self, loop, ip: str, port: int, timeout: float) -> Tuple[str, Optional[socket.socket], bool]:
+        """One connect attempt. Resource errors (RESOURCE_ERRNOS) are raised for _probe to retry."""
+        metrics = self.scanner.metrics
+        try:
+            s = socket.socket(address_family(ip), socket.SOCK_STREAM)
+        except OSError as e:
+            metrics.add(f"errno:{errno_name(e.errno or 0)}")
+            if e.errno in RESOURCE_ERRNOS:
+                raise
+            self.scanner._record_outcome(ip, None)
+            return 'CLOSED', None, False
+
+        metrics.add('in_flight')
+        try:
+            s.setblocking(False)
+            result, elapsed = await asyncio.wait_for(self._handshake(loop, s, (ip, port)), timeout)
+            if result == 0:
+                self.scanner._record_outcome(ip, elapsed)
+                if self.scanner.reuse_connections:
+                    s.setblocking(True)
+                    conn, s = s, None
+                    return 'OPEN', conn, True
+                return 'OPEN', None, True
+            metrics.add(f"errno:{errno_name(result)}")
+            if result in RESOURCE_ERRNOS:
+                raise OSError(result, os.strerror(result))
+            if result in REFUSED_ERRNOS:
+                # A RST is still a round trip sample
+                self.scanner._record_outcome(ip, elapsed)
+                return 'CLOSED', None, True
+            self.scanner._record_outcome(ip, None)
+            return 'CLOSED', None, result in UNREACHABLE_ERRNOS
+        except asyncio.TimeoutError:
+            metrics.add("errno:ETIMEDOUT")
+            self.scanner._record_outcome(ip, None)
+            return 'CLOSED', None, False
+        finally:
+            metrics.add('in_flight', -1)
+            if s:
+                s.close()
+
+    async def _handshake(self, loop, s: socket.socket, address: Tuple[str, int]) -> Tuple[int, float]:
+        """
+        Non-blocking connect of `s`: (errno or 0, round trip in seconds). The
+        clock starts as the SYN goes out and stops in the selector's
+        writability callback, so the time this coroutine then waits for its
+        turn on a busy loop is not counted. Loops without add_writer (the
+        Windows proactor) fall back to loop.sock_connect.
+        """
+        if not self._selector:
+            started = time.monotonic()
+            try:
+                await loop.sock_connect(s, address)
+            except OSError as e:
+                return e.errno or 0, time.monotonic() - started
+            return 0, time.monotonic() - started
+
+        started = time.monotonic()
+        result = s.connect_ex(address)
+        if result not in CONNECT_PENDING:
+            return result, time.monotonic() - started
+        answered = loop.create_future()
+
+        def ready():
+            if not answered.done():
+                answered.set_result(time.monotonic())
+        fd = s.fileno()
+        loop.add_writer(fd, ready)
+        try:
+            finished = await answered
+        finally:
+            loop.remove_writer(fd)
+        return s.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR), finished - started
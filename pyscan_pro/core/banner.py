@@ -1,29 +1,239 @@
+import time
 import socket
-from typing import Optional
+import queue
+import logging
+import threading
+from typing import Callable, Dict, Optional, Tuple
 
-def grab_banner(ip: str, port: int, timeout: float = 2.0) -> Optional[str]:
+from core.signatures import ServiceMatch, signature_database
+from core.timing import LatencyHistogram
+from utils.helpers import address_family
+
+logger = logging.getLogger("PyScanPro.Banner")
+
+# Most bytes read from one probe response
+READ_LIMIT = 4096
+# After the first bytes arrive, how long to wait for the rest of the response
+READ_TAIL = 0.05
+# Probes tried per port before giving up on identifying it
+MAX_PROBES = 3
+# Shortest wait for a service to greet unprompted (NULL probe), however short the round trip
+NULL_WAIT_MIN = 0.25
+
+def _exchange(s: socket.socket, payload: bytes, timeout: float) -> bytes:
+    """Sends a probe payload (nothing for NULL) and reads the response."""
+    s.settimeout(timeout)
+    if payload:
+        s.sendall(payload)
+    data = b''
+    try:
+        data = s.recv(READ_LIMIT)
+        # Responses often arrive in more than one segment; collect briefly
+        s.settimeout(READ_TAIL)
+        while data and len(data) < READ_LIMIT:
+            chunk = s.recv(READ_LIMIT - len(data))
+            if not chunk:
+                break
+            data += chunk
+    except socket.timeout:
+        pass # Silence (NULL probe) or the end of the response
+    except OSError:
+        if not data:
+            raise
+        # Reset after answering: keep what was said
+    return data
+
+def _connect(ip: str, port: int, timeout: float) -> socket.socket:
+    s = socket.socket(address_family(ip), socket.SOCK_STREAM)
+    s.settimeout(timeout)
+    try:
+        s.connect((ip, port))
+    except OSError:
+        s.close()
+        raise
+    return s
+
+def identify_service(
+    ip: str,
+    port: int,
+    timeout: float = 2.0,
+    sock: Optional[socket.socket] = None,
+    max_probes: int = MAX_PROBES,
+    connect: Optional[Callable[[], socket.socket]] = None,
+    null_wait: Optional[float] = None
+) -> Tuple[Optional[bytes], Optional[ServiceMatch]]:
     """
-    Attempts to connect to a port and receive its banner.
-    It can send protocol-specific probes if no data is received immediately.
+    Sends the signature database's probes for `port` in priority order and
+    stops at the first response that matches a rule. Returns (the first
+    non-empty response, the match or None). The first probe reuses `sock`
+    (e.g. the connection that proved the port open) when given; each further
+    probe opens a fresh connection, since the previous one may have confused
+    the service; `connect` replaces the plain TCP connect for those (e.g. to
+    speak TLS). Every socket is closed afterwards.
+
+    `null_wait` bounds how long the NULL probe waits for the service to speak
+    first (default: `timeout`). A greeting that arrives later is still read
+    on the next probe's connection, since rules match any probe's response.
+    """
+    db = signature_database()
+    connect = connect or (lambda: _connect(ip, port, timeout))
+    first_response = None
+    for i, probe in enumerate(db.probes_for(port)[:max_probes]):
+        reused = sock if i == 0 else None
+        try:
+            with (reused or connect()) as s:
+                wait = null_wait if null_wait is not None and not probe.payload else timeout
+                response = _exchange(s, probe.payload, wait)
+        except OSError:
+            if sock is not None and i == 0:
+                continue # The handed-off connection may have been dropped; reconnect
+            break # Refused or unreachable now; further probes would fail the same way
+        if not response:
+            continue
+        first_response = first_response or response
+        match = db.match(response, probe.name)
+        if match:
+            return response, match
+    return first_response, None
+
+def banner_line(response: bytes) -> Optional[str]:
+    """The first line of a response, as shown in results."""
+    text = response.decode('utf-8', errors='ignore').strip()
+    return text.split('\n')[0].strip() or None
+
+def grab_banner(ip: str, port: int, timeout: float = 2.0, sock: Optional[socket.socket] = None) -> Optional[str]:
+    """
+    Attempts to connect to a port and receive its banner (the first line of
+    the first response; see identify_service for how probes are chosen).
+    If `sock` is an already connected socket (e.g. the one that proved the port
+    open), it is reused instead of opening a second connection, and closed afterwards.
     """
     try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.settimeout(timeout)
-            s.connect((ip, port))
-            
-            # For HTTP/HTTPS, we usually need to send a request first
-            if port in (80, 443, 8080):
-                probe = b"HEAD / HTTP/1.0\r\n\r\n"
-                s.sendall(probe)
-            elif port == 25: # SMTP 
-                 probe = b"HELO default\r\n"
-                 s.sendall(probe)
-            
-            banner = s.recv(1024).decode('utf-8', errors='ignore').strip()
-            if banner:
-                # Return the first line of the banner to keep it clean
-                return banner.split('\n')[0].strip()
+        response, _ = identify_service(ip, port, timeout, sock)
     except Exception:
-        pass
-    
-    return None
+        return None
+    return banner_line(response) if response else None
+
+class BannerStage:
+    """
+    Banner grabbing as its own pipeline stage.
+
+    Open-port results are queued here after they have already been reported,
+    and a dedicated pool of worker threads fills in result['banner'] in place
+    (plus 'service' and 'version' when a signature matches), calling
+    `on_banner(result)` whenever one is found, and the time each port took
+    goes into the `latency` histogram. The port sweep only ever
+    does a non-blocking put; if the queue is full the banner is skipped rather
+    than stalling the scan.
+
+    Ports that answer plaintext probes with a TLS alert, or not at all, are
+    passed to `tls_handoff(result)` when set (see core.tls.TLSStage), which
+    then reports them instead.
+    """
+    name = "banner"
+
+    def __init__(
+        self,
+        workers: int = 32,
+        timeout: float = 1.0,
+        max_pending: int = 1024,
+        on_banner: Optional[Callable[[Dict], None]] = None,
+        latency: Optional[LatencyHistogram] = None
+    ):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.on_banner = on_banner
+        self.tls_handoff: Optional[Callable[[Dict], bool]] = None
+        # Timeout for a probe to `ip`, from measured round trips; shortens the NULL probe's wait when set
+        self.rtt_timeout: Optional[Callable[[str], float]] = None
+        self.skipped = 0
+        self.latency = latency or LatencyHistogram()
+        self._latency_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._threads = []
+
+    def start(self):
+        # Load the signatures now rather than on the first banner, when the scan may have every descriptor in use
+        signature_database()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, result: Dict, sock: Optional[socket.socket] = None) -> bool:
+        """Queues an open port for banner grabbing. Never blocks."""
+        try:
+            self._queue.put_nowait((result, sock))
+            return True
+        except queue.Full:
+            if sock:
+                sock.close()
+            self.skipped += 1
+            logger.debug(f"{self.name.capitalize()} queue full, skipping {result['ip']}:{result['port']}")
+            return False
+
+    def pending(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def join(self):
+        """Blocks until every queued banner has been processed (or cancelled)."""
+        self._queue.join()
+
+    def cancel(self):
+        """Drops everything still queued, closing any handed-off connections."""
+        while True:
+            try:
+                _, sock = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if sock:
+                sock.close()
+            self._queue.task_done()
+
+    def close(self):
+        """Stops the workers once the queue is empty."""
+        for _ in self._threads:
+            self._queue.put(None)
+        self._threads.clear()
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            result, sock = item
+            started = time.monotonic()
+            try:
+                self._process(result, sock)
+            except Exception as e:
+                logger.error(f"Error in {self.name} stage: {e}")
+            finally:
+                elapsed = time.monotonic() - started
+                with self._latency_lock:
+                    self.latency.observe(elapsed)
+                self._queue.task_done()
+
+    def _null_wait(self, ip: str) -> Optional[float]:
+        """How long the NULL probe waits for `ip` to speak first: a few round trips, not the whole timeout."""
+        if self.rtt_timeout is None:
+            return None
+        return min(self.timeout, max(NULL_WAIT_MIN, self.rtt_timeout(ip)))
+
+    def _process(self, result: Dict, sock: Optional[socket.socket]):
+        response, match = identify_service(
+            result['ip'], result['port'], timeout=self.timeout, sock=sock, null_wait=self._null_wait(result['ip'])
+        )
+        # A TLS alert, or silence: a TLS server waits for a ClientHello and drops plaintext
+        speaks_tls = match.service == 'TLS' if match else response is None
+        if speaks_tls and self.tls_handoff and self.tls_handoff(result):
+            return
+        banner = banner_line(response) if response else None
+        if match:
+            result['service'] = match.service
+            if match.describe():
+                result['version'] = match.describe()
+        if banner or match:
+            result['banner'] = banner or match.describe() or result['banner']
+            if self.on_banner:
+                self.on_banner(result)
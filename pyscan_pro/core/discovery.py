@@ -0,0 +1,193 @@
+import os
+import socket
+import struct
+import asyncio
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.syn_engine import checksum
+from utils.helpers import address_family
+
+logger = logging.getLogger("PyScanPro.Discovery")
+
+# Ports most likely to answer on a live host (either accept or RST)
+DISCOVERY_PORTS = (80, 443, 22, 445, 3389)
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+ICMPV6_ECHO_REQUEST = 128
+ICMPV6_ECHO_REPLY = 129
+
+def build_echo_request(ident: int, seq: int, payload: bytes = b'pyscan') -> bytes:
+    """Builds an ICMP echo request (type 8) with a valid checksum."""
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    csum = checksum(header + payload)
+    return struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, csum, ident, seq) + payload
+
+def build_echo_request6(ident: int, seq: int, payload: bytes = b'pyscan') -> bytes:
+    """Builds an ICMPv6 echo request (type 128); the kernel fills in its checksum."""
+    return struct.pack('!BBHHH', ICMPV6_ECHO_REQUEST, 0, 0, ident, seq) + payload
+
+def parse_echo_reply6(message: bytes, ident: int) -> bool:
+    """True if `message` (a bare ICMPv6 message, as raw IPv6 sockets deliver it) is an echo reply to us."""
+    if len(message) < 8:
+        return False
+    icmp_type, _code, _csum, reply_ident = struct.unpack_from('!BBHH', message)
+    return icmp_type == ICMPV6_ECHO_REPLY and reply_ident == ident
+
+def parse_echo_reply(packet: bytes, ident: int) -> Optional[str]:
+    """Returns the source IP if `packet` (IPv4 + ICMP) is an echo reply to one of our requests."""
+    if len(packet) < 28 or packet[0] >> 4 != 4:
+        return None
+    ihl = (packet[0] & 0x0F) * 4
+    icmp_type, _code, _csum, reply_ident = struct.unpack_from('!BBHH', packet, ihl)
+    if icmp_type != ICMP_ECHO_REPLY or reply_ident != ident:
+        return None
+    return socket.inet_ntoa(packet[12:16])
+
+class HostDiscovery:
+    """
+    Liveness pre-pass run before the port sweep.
+
+    Each host is probed concurrently with a TCP "ping" to a handful of common
+    ports (a completed handshake or a RST both prove the host is up) and, when
+    the process may open raw sockets, an ICMP echo request. The first positive
+    answer marks the host live and cancels its remaining probes.
+    """
+    def __init__(self, timeout: float = 1.0, concurrency: int = 1000, ports: Tuple[int, ...] = DISCOVERY_PORTS, icmp: bool = True):
+        self.timeout = timeout
+        self.ports = ports
+        self.icmp = icmp
+        # Every host in flight holds one socket per discovery port
+        self.concurrency = max(1, concurrency // max(1, len(ports)))
+        self.completed = 0
+        self._ident = os.getpid() & 0xFFFF
+        self._icmp_sock: Optional[socket.socket] = None
+        self._icmp6_sock: Optional[socket.socket] = None
+        self._icmp_waiters: Dict[str, asyncio.Future] = {}
+
+    def run(
+        self,
+        hosts: Iterable[str],
+        total: int,
+        progress_callback: Callable[[int, int, str], None],
+        is_running: Callable[[], bool]
+    ) -> List[str]:
+        """Returns the responsive hosts, in the order they were given."""
+        self.completed = 0
+        return asyncio.run(self._run(iter(hosts), total, progress_callback, is_running))
+
+    async def _run(self, hosts, total, progress_callback, is_running) -> List[str]:
+        loop = asyncio.get_running_loop()
+        live: List[Tuple[int, str]] = []
+        indexed = enumerate(hosts)
+
+        if self.icmp:
+            self._icmp_sock = self._open_icmp_socket(socket.AF_INET)
+            self._icmp6_sock = self._open_icmp_socket(socket.AF_INET6)
+            if self._icmp_sock:
+                loop.add_reader(self._icmp_sock.fileno(), self._on_icmp_readable)
+            if self._icmp6_sock:
+                loop.add_reader(self._icmp6_sock.fileno(), self._on_icmp6_readable)
+
+        async def worker():
+            for index, ip in indexed:
+                if not is_running():
+                    return
+                if await self._probe_host(ip):
+                    live.append((index, ip))
+                self.completed += 1
+                progress_callback(self.completed, max(total, self.completed), "Discovering hosts...")
+
+        try:
+            # Not capped by `total`: for a TargetStream it is only an estimate (0 for hint-only prefixes);
+            # surplus workers simply find the shared iterator exhausted
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        finally:
+            for sock in (self._icmp_sock, self._icmp6_sock):
+                if sock:
+                    loop.remove_reader(sock.fileno())
+                    sock.close()
+            self._icmp_sock = self._icmp6_sock = None
+
+        logger.info(f"Host discovery: {len(live)}/{self.completed} hosts responsive")
+        return [ip for _, ip in sorted(live)]
+
+    async def _probe_host(self, ip: str) -> bool:
+        probes = [asyncio.create_task(self._tcp_ping(ip, port)) for port in self.ports]
+        icmp_sock = self._icmp6_sock if ':' in ip else self._icmp_sock
+        if icmp_sock:
+            probes.append(asyncio.create_task(self._icmp_ping(ip, icmp_sock)))
+
+        try:
+            while probes:
+                done, pending = await asyncio.wait(probes, return_when=asyncio.FIRST_COMPLETED)
+                if any(task.result() for task in done):
+                    return True
+                probes = list(pending)
+            return False
+        finally:
+            for task in probes:
+                task.cancel()
+
+    async def _tcp_ping(self, ip: str, port: int) -> bool:
+        loop = asyncio.get_running_loop()
+        try:
+            s = socket.socket(address_family(ip), socket.SOCK_STREAM)
+        except OSError:
+            return False
+
+        try:
+            s.setblocking(False)
+            await asyncio.wait_for(loop.sock_connect(s, (ip, port)), self.timeout)
+            return True
+        except ConnectionRefusedError:
+            return True # A RST still proves the host is up
+        except (asyncio.TimeoutError, OSError):
+            return False
+        finally:
+            s.close()
+
+    async def _icmp_ping(self, ip: str, sock: socket.socket) -> bool:
+        loop = asyncio.get_running_loop()
+        waiter = self._icmp_waiters[ip] = loop.create_future()
+        build = build_echo_request6 if sock is self._icmp6_sock else build_echo_request
+        try:
+            sock.sendto(build(self._ident, len(self._icmp_waiters) & 0xFFFF), (ip, 0))
+            return await asyncio.wait_for(waiter, self.timeout)
+        except (asyncio.TimeoutError, OSError):
+            return False
+        finally:
+            self._icmp_waiters.pop(ip, None)
+
+    def _on_icmp_readable(self):
+        try:
+            packet = self._icmp_sock.recv(65535)
+        except OSError:
+            return
+        self._wake(parse_echo_reply(packet, self._ident))
+
+    def _on_icmp6_readable(self):
+        try:
+            message, addr = self._icmp6_sock.recvfrom(65535)
+        except OSError:
+            return
+        if parse_echo_reply6(message, self._ident):
+            self._wake(addr[0].split('%', 1)[0])
+
+    def _wake(self, ip: Optional[str]):
+        waiter = self._icmp_waiters.get(ip) if ip else None
+        if waiter and not waiter.done():
+            waiter.set_result(True)
+
+    @staticmethod
+    def _open_icmp_socket(family: int) -> Optional[socket.socket]:
+        proto = socket.IPPROTO_ICMPV6 if family == socket.AF_INET6 else socket.IPPROTO_ICMP
+        try:
+            s = socket.socket(family, socket.SOCK_RAW, proto)
+        except OSError:
+            if family == socket.AF_INET:
+                logger.info("ICMP echo discovery needs raw socket privileges; using TCP ping only.")
+            return None
+        s.setblocking(False)
+        return s
@@ -0,0 +1,114 @@
+import json
+import logging
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.store import ResultStore
+from utils.permutation import FeistelPermutation
+from utils.targets import PortSpec
+
+logger = logging.getLogger("PyScanPro.Incremental")
+
+SQLITE_MAGIC = b"SQLite format 3\x00"
+
+def load_previous(path: str, target: Optional[str] = None, ports: Optional[str] = None, scan_type: Optional[str] = None) -> List[Dict]:
+    """
+    Reads the findings of an earlier scan from a Reporter JSON / JSON Lines
+    report or from a results database. For a database, the latest scan with
+    the same target, ports and scan type is used (else the latest scan).
+    """
+    with open(path, 'rb') as f:
+        head = f.read(len(SQLITE_MAGIC))
+    if head == SQLITE_MAGIC:
+        store = ResultStore(path)
+        try:
+            scan = store.matching_scan(target, ports, scan_type) or store.latest_scan()
+            if scan is None:
+                return []
+            logger.info(f"Incremental baseline: scan {scan['id']} from {path}")
+            return [dict(row) for row in store.results(scan['id'])]
+        finally:
+            store.close()
+
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+        return data['results'] if isinstance(data, dict) else data
+    except ValueError:
+        # JSON Lines: one finding per line
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+class IncrementalPlan:
+    """
+    Probe plan for a rescan that leans on a previous scan's findings.
+
+    Probes are issued in three phases:
+      1. every previously OPEN (ip, port) still in scope, all of them;
+      2. a `sample_rate` fraction of the other ports of known-live hosts
+         (hosts with any previous finding);
+      3. the same fraction of the ports of every other host.
+    Samples are drawn through a FeistelPermutation, so they are uniform, never
+    materialised, and differ from run to run with the seed: successive nightly
+    runs cover the whole space over about 1/sample_rate nights, while
+    services that were open are re-checked every time.
+    """
+    def __init__(self, previous: List[Dict], sample_rate: float = 0.1, seed: int = 0):
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        self.seed = seed
+        self.previous: Dict[Tuple[str, int], Dict] = {}
+        self.open_ports: Dict[str, List[int]] = {}
+        for result in previous:
+            self.previous[(result['ip'], result['port'])] = result
+            ports = self.open_ports.setdefault(result['ip'], [])
+            if result['status'] == 'OPEN':
+                ports.append(result['port'])
+
+    def probes(self, hosts: Sequence[str], ports: PortSpec) -> Tuple[Iterator[Tuple[str, int]], int]:
+        """Returns (probe iterator, exact number of probes it will yield)."""
+        live = [ip for ip in hosts if ip in self.open_ports]
+        rechecks = [(ip, port) for ip in live for port in self.open_ports[ip] if port in ports]
+        live_sample = self._sample_size(len(live) * len(ports) - len(rechecks))
+        rest_sample = self._sample_size((len(hosts) - len(live)) * len(ports))
+
+        def generate():
+            yield from rechecks
+            known = set(rechecks)
+            yield from self._sample(live, ports, live_sample, lambda ip, port: (ip, port) not in known, 0)
+            yield from self._sample(hosts, ports, rest_sample, lambda ip, port: ip not in self.open_ports, 1)
+        return generate(), len(rechecks) + live_sample + rest_sample
+
+    def _sample_size(self, space: int) -> int:
+        return round(space * self.sample_rate)
+
+    def _sample(self, hosts: Sequence[str], ports: PortSpec, count: int, accept, salt: int) -> Iterator[Tuple[str, int]]:
+        """Yields `count` accepted probes from hosts x ports in a seeded random order."""
+        if count <= 0:
+            return
+        host_count = len(hosts)
+        for index in FeistelPermutation(host_count * len(ports), self.seed * 2 + salt):
+            port_index, host_index = divmod(index, host_count)
+            ip, port = hosts[host_index], ports[port_index]
+            if accept(ip, port):
+                yield ip, port
+                count -= 1
+                if not count:
+                    return
+
+    def deltas(self, results: List[Dict], in_scope) -> Dict[str, List[Dict]]:
+        """
+        Changes against the previous scan, in the shape of ResultStore.diff().
+        `in_scope(ip, port)` tells which previous findings this scan re-checked.
+        """
+        current = {(r['ip'], r['port']): r for r in results if r['status'] == 'OPEN'}
+        opened, banners = [], []
+        for key, result in current.items():
+            before = self.previous.get(key)
+            if not before or before['status'] != 'OPEN':
+                opened.append(result)
+            elif before.get('banner') != result.get('banner'):
+                banners.append(dict(result, old_banner=before.get('banner')))
+        closed = [
+            r for key, r in self.previous.items()
+            if r['status'] == 'OPEN' and key not in current and in_scope(*key)
+        ]
+        return {'opened': opened, 'closed': closed, 'banners': banners}
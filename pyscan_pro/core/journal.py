@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import logging
+import threading
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Tuple
+
+from utils.helpers import iter_ports
+
+logger = logging.getLogger("PyScanPro.Journal")
+
+JOURNAL_VERSION = "v1"
+
+class ScanJournal:
+    """
+    Append-only checkpoint journal for resumable scans.
+
+    The port list is cut into fixed blocks of BLOCK_SIZE ports. Once every
+    probe of a block has completed for a host, a `B <ip> <block>` line is
+    appended; every finding is appended as `R <json>` (and again when its
+    banner arrives). Lines are buffered and written in batches, so the scan
+    hot path only appends to a list. A torn last line from a crash is ignored
+    on load.
+
+        #pyscan-journal v1 <scan signature>
+        B 10.0.0.5 3
+        R {"ip": "10.0.0.5", "port": 22, ...}
+    """
+    BLOCK_SIZE = 256
+    FLUSH_LINES = 512
+    FLUSH_INTERVAL = 1.0
+
+    def __init__(self, path: str, signature: str):
+        self.path = path
+        self.signature = signature
+        self.blocks: List[List[Tuple[int, int]]] = []
+        self.findings: Dict[Tuple[str, int], Dict] = {}
+        self.completed_probes = 0
+        self._block_starts: List[int] = []
+        self._done: Dict[str, int] = {} # ip -> bitmask of completed blocks
+        self._remaining: Dict[Tuple[str, int], int] = {}
+        self._buffer: List[str] = []
+        self._last_flush = time.monotonic()
+        self._file = None
+        self._lock = threading.Lock()
+
+    def open(self, intervals: List[Tuple[int, int]]):
+        """
+        Lays out the port blocks, loads any previous progress from the file and
+        opens it for appending. Raises ValueError if the file belongs to a
+        different scan.
+        """
+        self.blocks = _split_blocks(intervals, self.BLOCK_SIZE)
+        self._block_starts = [block[0][0] for block in self.blocks]
+
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            self._load()
+            self._file = open(self.path, 'a')
+        else:
+            self._file = open(self.path, 'w')
+            self._file.write(f"#pyscan-journal {JOURNAL_VERSION} {self.signature}\n")
+            self._file.flush()
+
+    def _load(self):
+        block_lens = [sum(end - start + 1 for start, end in block) for block in self.blocks]
+        with open(self.path) as f:
+            header = f.readline().rstrip('\n')
+            if header != f"#pyscan-journal {JOURNAL_VERSION} {self.signature}":
+                raise ValueError(f"{self.path} is a journal for a different scan ({header!r})")
+
+            for line in f:
+                if not line.endswith('\n'):
+                    break # Torn write from an interrupted run
+                kind, _, rest = line.partition(' ')
+                try:
+                    if kind == 'B':
+                        ip, block = rest.split()
+                        block = int(block)
+                        mask = self._done.get(ip, 0)
+                        if not mask >> block & 1:
+                            self._done[ip] = mask | (1 << block)
+                            self.completed_probes += block_lens[block]
+                    elif kind == 'R':
+                        result = json.loads(rest)
+                        self.findings[(result['ip'], result['port'])] = result
+                except (ValueError, IndexError, KeyError):
+                    logger.warning(f"Skipping malformed journal line: {line.strip()[:80]}")
+
+        # Findings from unfinished blocks will be found again when the block is rescanned
+        self.findings = {
+            key: result for key, result in self.findings.items()
+            if self._done.get(key[0], 0) >> self._block_of(key[1]) & 1
+        }
+        logger.info(f"Resuming: {self.completed_probes} probes and {len(self.findings)} findings already journaled")
+
+    def probes(self, ip_iter: Iterator[str]) -> Iterator[Tuple[str, int]]:
+        """Lazily yields the (ip, port) probes whose block has not been completed yet."""
+        for ip in ip_iter:
+            mask = self._done.get(ip, 0)
+            for index, block in enumerate(self.blocks):
+                if not mask >> index & 1:
+                    for port in iter_ports(block):
+                        yield ip, port
+
+    def pending(self, probes: Iterator[Tuple[str, int]]) -> Iterator[Tuple[str, int]]:
+        """Filters an arbitrarily ordered probe stream down to blocks not completed yet."""
+        for ip, port in probes:
+            if not self._done.get(ip, 0) >> self._block_of(port) & 1:
+                yield ip, port
+
+    def _block_of(self, port: int) -> int:
+        return bisect_right(self._block_starts, port) - 1
+
+    def record(self, result: Dict):
+        """Called once per completed probe, with its result."""
+        ip = result['ip']
+        block = self._block_of(result['port'])
+        key = (ip, block)
+
+        with self._lock:
+            remaining = self._remaining.get(key)
+            if remaining is None:
+                remaining = sum(end - start + 1 for start, end in self.blocks[block])
+            remaining -= 1
+
+            if result['status'] in ('OPEN', 'FILTERED'):
+                self._buffer.append(f"R {json.dumps(result)}\n")
+            if remaining:
+                self._remaining[key] = remaining
+            else:
+                self._remaining.pop(key, None)
+                self._buffer.append(f"B {ip} {block}\n")
+            self._maybe_flush()
+
+    def record_banner(self, result: Dict):
+        """Re-journals a finding once its banner has been filled in."""
+        with self._lock:
+            self._buffer.append(f"R {json.dumps(result)}\n")
+            self._maybe_flush()
+
+    def _maybe_flush(self):
+        if len(self._buffer) >= self.FLUSH_LINES or time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL:
+            self._flush()
+
+    def _flush(self):
+        if self._file and self._buffer:
+            self._file.write(''.join(self._buffer))
+            self._file.flush()
+            self._buffer.clear()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self._file:
+                self._file.close()
+                self._file = None
+
+def _split_blocks(intervals: List[Tuple[int, int]], block_size: int) -> List[List[Tuple[int, int]]]:
+    """Cuts a sorted interval list into consecutive blocks of `block_size` ports."""
+    blocks: List[List[Tuple[int, int]]] = []
+    current: List[Tuple[int, int]] = []
+    filled = 0
+    for start, end in intervals:
+        port = start
+        while port <= end:
+            take = min(end - port + 1, block_size - filled)
+            current.append((port, port + take - 1))
+            filled += take
+            port += take
+            if filled == block_size:
+                blocks.append(current)
+                current, filled = [], 0
+    if current:
+        blocks.append(current)
+    return blocks
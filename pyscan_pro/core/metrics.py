@@ -0,0 +1,224 @@
+import os
+import json
+import errno
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+from core.timing import LatencyHistogram
+
+logger = logging.getLogger("PyScanPro.Metrics")
+
+# connect_ex() codes meaning "no answer before the socket timeout"
+_TIMEOUT_ERRNOS = {errno.EAGAIN, errno.EWOULDBLOCK, errno.EINPROGRESS, errno.ETIMEDOUT, 10035, 10060}
+
+class ThreadCounters:
+    """
+    Hot-path counters with no lock on the write side.
+
+    Each thread increments its own plain dict (found through a thread-local),
+    so add() is a dict update with no contention; totals() sums every
+    thread's dict when a reader asks (the exporter, every few seconds).
+    Negative increments make gauges: +1 when a connect starts and -1 when it
+    ends leaves the number in flight.
+    """
+    def __init__(self):
+        self._local = threading.local()
+        self._threads: List[Dict[str, int]] = []
+        self._lock = threading.Lock()
+
+    def add(self, key: str, n: int = 1):
+        counts = getattr(self._local, 'counts', None)
+        if counts is None:
+            counts = self._local.counts = {}
+            with self._lock:
+                self._threads.append(counts)
+        counts[key] = counts.get(key, 0) + n
+
+    def totals(self) -> Dict[str, int]:
+        with self._lock:
+            threads = list(self._threads)
+        merged: Dict[str, int] = {}
+        for counts in threads:
+            # dict.copy() is atomic under the GIL; iterating the live dict is not
+            for key, value in counts.copy().items():
+                merged[key] = merged.get(key, 0) + value
+        return merged
+
+def errno_name(code: int) -> str:
+    """ECONNREFUSED etc. for a connect_ex() result; every flavour of timeout is ETIMEDOUT."""
+    if code in _TIMEOUT_ERRNOS:
+        return 'ETIMEDOUT'
+    if code == 10061:
+        return 'ECONNREFUSED' # Windows
+    return errno.errorcode.get(code, str(code))
+
+def group(totals: Dict[str, int], prefix: str) -> Dict[str, int]:
+    """The counters named `prefix:<label>`, keyed by label."""
+    return {key[len(prefix) + 1:]: value for key, value in totals.items() if key.startswith(prefix + ':') and value}
+
+def merge_snapshots(snapshots: List[Dict]) -> Dict:
+    """Sums per-shard Scanner.metrics_snapshot() dicts into one."""
+    merged: Dict = {}
+    for snapshot in snapshots:
+        for key, value in snapshot.items():
+            if isinstance(value, LatencyHistogram):
+                merged.setdefault(key, LatencyHistogram()).merge(value)
+            elif isinstance(value, dict):
+                target = merged.setdefault(key, {})
+                for label, count in value.items():
+                    target[label] = target.get(label, 0) + count
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                merged[key] = merged.get(key, 0) + value
+            else:
+                merged.setdefault(key, value)
+    return merged
+
+# --- Rendering ---
+
+def histogram_summary(histogram: LatencyHistogram) -> Dict:
+    quantiles = {f"p{int(q * 100)}_ms": histogram.quantile(q) for q in (0.5, 0.9, 0.99)}
+    return {
+        'count': histogram.total,
+        'sum_seconds': round(histogram.sum, 6),
+        **{name: round(value * 1000, 3) if value is not None else None for name, value in quantiles.items()},
+        # Non-empty buckets only, keyed by upper bound in ms
+        'buckets_ms': {f"{histogram.upper_bound(i) * 1000:.4g}": count for i, count in enumerate(histogram.counts) if count},
+    }
+
+def to_json(snapshot: Dict) -> str:
+    def convert(value):
+        if isinstance(value, LatencyHistogram):
+            return histogram_summary(value)
+        if isinstance(value, dict):
+            return {key: convert(item) for key, item in value.items()}
+        return value
+    return json.dumps(convert(snapshot), indent=2)
+
+# Prometheus metric name, type and help for each snapshot key (labelled families use the dict keys as label values)
+_PROMETHEUS = {
+    'probes_issued': ('pyscan_probes_issued_total', 'counter', 'Probes handed to the scan engine', None),
+    'results': ('pyscan_results_total', 'counter', 'Probe outcomes by status', 'status'),
+    'connect_errors': ('pyscan_connect_errors_total', 'counter', 'Connect results by errno', 'errno'),
+    'errors': ('pyscan_errors_total', 'counter', 'Unexpected errors in the scan loop by exception type', 'type'),
+    'connects_in_flight': ('pyscan_connects_in_flight', 'gauge', 'Connect attempts currently waiting for an answer', None),
+    'queues': ('pyscan_queue_depth', 'gauge', 'Work waiting in each pipeline stage', 'stage'),
+    'banners_skipped': ('pyscan_banners_skipped_total', 'counter', 'Open ports not banner-grabbed because the stage was full', None),
+    'resource_waits': ('pyscan_resource_waits_total', 'counter', 'Probe retries after running out of sockets (EMFILE, ENOBUFS, ...)', None),
+    'retries': ('pyscan_retries_total', 'counter', 'Re-probes of unanswered ports in the verification pass, and how many answered', 'outcome'),
+    'tls': ('pyscan_tls_events_total', 'counter', 'TLS handshakes, resumptions, failures and certificate cache hits', 'event'),
+    'elapsed_seconds': ('pyscan_scan_elapsed_seconds', 'gauge', 'Seconds since the scan started', None),
+}
+_HISTOGRAMS = {
+    'connect_latency': ('pyscan_connect_latency_seconds', 'Round trip of answered connect probes'),
+    'banner_latency': ('pyscan_banner_latency_seconds', 'Time to grab and identify one banner'),
+    'tls_latency': ('pyscan_tls_latency_seconds', 'Time to handshake and identify one TLS port'),
+}
+
+def to_prometheus(snapshot: Dict) -> str:
+    """Renders a snapshot in the Prometheus text exposition format."""
+    lines = []
+    for key, (name, kind, help_text, label) in _PROMETHEUS.items():
+        value = snapshot.get(key)
+        if value is None:
+            continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        if label:
+            lines += [f'{name}{{{label}="{item}"}} {count}' for item, count in sorted(value.items()) if count is not None]
+        else:
+            lines.append(f"{name} {value}")
+    for key, (name, help_text) in _HISTOGRAMS.items():
+        histogram = snapshot.get(key)
+        if histogram is None:
+            continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        # One bucket per doubling, so the set of `le` values never changes between scrapes
+        cumulative = 0
+        for i, count in enumerate(histogram.counts):
+            cumulative += count
+            if (i + 1) % histogram.PER_DOUBLING == 0:
+                lines.append(f'{name}_bucket{{le="{histogram.upper_bound(i):.6g}"}} {cumulative}')
+        lines += [
+            f'{name}_bucket{{le="+Inf"}} {histogram.total}',
+            f"{name}_sum {histogram.sum:.6f}",
+            f"{name}_count {histogram.total}",
+        ]
+    return "\n".join(lines) + "\n"
+
+# --- Export ---
+
+class MetricsExporter:
+    """
+    Publishes a scanner's metrics while it runs.
+
+    With `stats_file`, the snapshot is written there as JSON every
+    `interval` seconds (atomically: written aside, then renamed over) and
+    once more on stop(). With `port`, an HTTP server on 127.0.0.1 serves
+    the current snapshot in Prometheus text format at /metrics, built on
+    each scrape. `source` returns the snapshot (Scanner.metrics_snapshot).
+    """
+    def __init__(self, source: Callable[[], Dict], stats_file: Optional[str] = None, interval: float = 5.0, port: Optional[int] = None):
+        self.source = source
+        self.stats_file = stats_file
+        self.interval = interval
+        self.port = port
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> "MetricsExporter":
+        if self.stats_file:
+            self._thread = threading.Thread(target=self._loop, name="pyscan-metrics", daemon=True)
+            self._thread.start()
+        if self.port is not None:
+            self._server = ThreadingHTTPServer(('127.0.0.1', self.port), self._handler())
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, name="pyscan-metrics-http", daemon=True).start()
+            logger.info(f"Serving metrics on http://127.0.0.1:{self._server.server_address[1]}/metrics")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def write(self):
+        tmp = f"{self.stats_file}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(to_json(self.source()))
+        os.replace(tmp, self.stats_file)
+
+    def _loop(self):
+        while True:
+            stopping = self._stop.wait(self.interval)
+            try:
+                self.write()
+            except OSError as e:
+                logger.warning(f"Could not write stats file {self.stats_file}: {e}")
+            if stopping:
+                return
+
+    def _handler(self):
+        source = self.source
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = to_prometheus(source()).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass # Scrapes are not worth a log line each
+        return Handler
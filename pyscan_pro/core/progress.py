@@ -0,0 +1,131 @@
+import sys
+import time
+import threading
+from typing import Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+class ScanCounters:
+    """
+    Live probe tallies, cheap enough to update on every probe.
+
+    Each field has a single writer: `issued` is bumped by whichever thread
+    pulls probes from the engine's iterator, and the status tallies by the
+    thread driving the scan (the one calling Scanner._emit). So plain integer
+    increments need no lock; a reader on another thread may see a value a
+    moment old, which is all a progress display needs.
+    """
+    def __init__(self):
+        self.issued = 0
+        self.tallies: Dict[str, int] = {'OPEN': 0, 'FILTERED': 0, 'CLOSED': 0}
+
+    def count(self, probes: Iterable[Tuple[str, int]]) -> Iterator[Tuple[str, int]]:
+        """Wraps an engine's probe iterator, counting probes as they are handed out."""
+        for probe in probes:
+            self.issued += 1
+            yield probe
+
+    def record(self, status: str):
+        self.tallies[status] = self.tallies.get(status, 0) + 1
+
+    def snapshot(self) -> Dict[str, int]:
+        tallies = self.tallies
+        return {
+            'issued': self.issued,
+            'open': tallies.get('OPEN', 0),
+            'filtered': tallies.get('FILTERED', 0),
+            'closed': tallies.get('CLOSED', 0),
+        }
+
+def _format_duration(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+class ProgressRenderer:
+    """
+    Terminal progress display, decoupled from the probe rate.
+
+    `update` is the scanner's progress callback and only stores the latest
+    (current, total, status); a background thread draws at a fixed interval,
+    reading the scanner's live counters at that moment. On a TTY it rewrites a
+    single status line several times a second; otherwise (piped, redirected,
+    CI logs) it prints a plain line every `log_interval` seconds instead, so
+    the output stays readable and small.
+    """
+    TTY_INTERVAL = 0.2
+    LOG_INTERVAL = 10.0
+
+    def __init__(self, scanner, stream: TextIO = sys.stdout, log_interval: float = LOG_INTERVAL):
+        self.scanner = scanner
+        self.stream = stream
+        self.tty = stream.isatty()
+        self.interval = self.TTY_INTERVAL if self.tty else log_interval
+        self._latest: Optional[Tuple[int, int, str]] = None
+        self._rate = 0.0
+        self._sample: Optional[Tuple[float, int]] = None # (time, current) at the last draw
+        self._phase: Optional[Tuple[float, int]] = None # (time, current) when the count last restarted
+        self._width = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def update(self, current: int, total: int, status: str):
+        self._latest = (current, total, status)
+
+    def start(self):
+        self._sample = self._phase = (time.monotonic(), 0)
+        self._thread = threading.Thread(target=self._loop, name="pyscan-progress", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the display after drawing the final state once more."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.render(final=True)
+        if self.tty and self._width:
+            self.stream.write("\n")
+            self.stream.flush()
+            self._width = 0
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.render()
+
+    def render(self, final: bool = False):
+        latest = self._latest
+        if latest is None:
+            return
+        line = self.format_line(*latest, final=final)
+        if self.tty:
+            # Pad over whatever was left of a longer previous line
+            self.stream.write("\r" + line.ljust(self._width))
+            self._width = len(line)
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+    def format_line(self, current: int, total: int, status: str, final: bool = False) -> str:
+        now = time.monotonic()
+        if self._sample is None or current < self._sample[1]:
+            # First draw, or a new phase (discovery -> port scan) restarted the count
+            self._sample = self._phase = (now, current)
+            self._rate = 0.0
+        if final:
+            # The closing line reports the average over the whole phase
+            elapsed = now - self._phase[0]
+            self._rate = (current - self._phase[1]) / elapsed if elapsed > 0 else 0.0
+        elif now > self._sample[0]:
+            instant = (current - self._sample[1]) / (now - self._sample[0])
+            # Smooth over a few draws so the rate and ETA do not jitter
+            self._rate = instant if not self._rate else 0.3 * instant + 0.7 * self._rate
+            self._sample = (now, current)
+
+        stats = self.scanner.live_stats()
+        parts = [f"[{status}] {current:,}/{total:,}" + (f" ({current / total:.1%})" if total else "")]
+        parts.append(f"{self._rate:,.0f} pps")
+        if total and current < total:
+            parts.append(f"ETA {_format_duration((total - current) / self._rate)}" if self._rate else "ETA --")
+        parts.append(f"in-flight {max(0, stats['issued'] - current):,}")
+        parts.append(f"open {stats['open']:,} filtered {stats['filtered']:,} closed {stats['closed']:,}")
+        parts.append(f"timeout {stats['timeout']:.2f}s")
+        return " | ".join(parts)
@@ -1,105 +1,278 @@
-import json
+import io
+import re
 import csv
+import html
+import json
+import time
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Iterable, Optional, Tuple, Union
 import os
 
+from utils.targets import TargetSpec
+
+FIELDS = ('ip', 'port', 'status', 'service', 'banner')
+# CSV is for further processing, so it also carries how sure each result is
+CSV_FIELDS = FIELDS + ('confidence', 'attempts')
+
+class ReportWriter:
+    """
+    Streams a report to disk while the scan is still running.
+
+    Findings are formatted into an in-memory buffer as they arrive and written
+    out every FLUSH_ROWS rows or FLUSH_INTERVAL seconds, so memory stays flat
+    however many results there are. After each flush the format's closing text
+    (e.g. `]}` or `</table>`) is written too, and overwritten by the next
+    flush, so a scan killed midway still leaves a complete, parseable report.
+
+    With `await_banners`, OPEN findings without a banner yet are held back
+    until update_banner() delivers it, for at most BANNER_WAIT seconds, so the
+    late banner still makes it into the row. Safe to call from several threads.
+    """
+    FLUSH_ROWS = 256
+    FLUSH_INTERVAL = 1.0
+    BANNER_WAIT = 5.0
+    newline: Optional[str] = None
+
+    def __init__(self, filepath: str, target: str, timestamp: str, host_count: Optional[int] = None, await_banners: bool = False):
+        self.filepath = filepath
+        self.target = target
+        self.timestamp = timestamp
+        self.host_count = host_count
+        self.await_banners = await_banners
+        self.count = 0
+        self._awaiting: "OrderedDict[Tuple[str, int], Tuple[float, Dict]]" = OrderedDict()
+        self._buffer = io.StringIO()
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._file = open(filepath, 'w', encoding='utf-8', newline=self.newline)
+        self._file.write(self.header())
+        self._body_end = self._file.tell()
+        self._write_footer()
+
+    # --- Format hooks ---
+
+    def header(self) -> str:
+        return ""
+
+    def row(self, result: Dict) -> str:
+        raise NotImplementedError
+
+    def footer(self) -> str:
+        return ""
+
+    # --- Streaming ---
+
+    def add(self, result: Dict):
+        """Adds one finding (the scanner's result_callback)."""
+        with self._lock:
+            if self.await_banners and result['status'] == 'OPEN' and result.get('banner', 'N/A') == 'N/A':
+                self._awaiting[(result['ip'], result['port'])] = (time.monotonic(), result)
+            else:
+                self._append(result)
+            self._expire()
+
+    def update_banner(self, result: Dict):
+        """A held-back finding got its banner (the scanner's banner_callback)."""
+        with self._lock:
+            entry = self._awaiting.pop((result['ip'], result['port']), None)
+            if entry:
+                self._append(result)
+            self._expire()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        """Writes out anything still held back or buffered and closes the file."""
+        with self._lock:
+            if self._file.closed:
+                return
+            for _, result in self._awaiting.values():
+                self._append(result)
+            self._awaiting.clear()
+            self._flush()
+            self._file.close()
+
+    def _append(self, result: Dict):
+        self._buffer.write(self.row(result))
+        self.count += 1
+        self._buffered += 1
+        if self._buffered >= self.FLUSH_ROWS:
+            self._flush()
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._awaiting:
+            key, (since, result) = next(iter(self._awaiting.items()))
+            if now - since < self.BANNER_WAIT:
+                break
+            del self._awaiting[key]
+            self._append(result)
+        if self._buffered and now - self._last_flush >= self.FLUSH_INTERVAL:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffered:
+            return
+        # Overwrite the previous footer with the new rows, then close the document again
+        self._file.seek(self._body_end)
+        self._file.write(self._buffer.getvalue())
+        self._body_end = self._file.tell()
+        self._buffer = io.StringIO()
+        self._buffered = 0
+        self._write_footer()
+
+    def _write_footer(self):
+        self._file.write(self.footer())
+        self._file.truncate()
+        self._file.flush()
+
+class JsonLinesWriter(ReportWriter):
+    """One JSON object per finding per line; the most robust format for interrupted scans."""
+    def row(self, result: Dict) -> str:
+        return json.dumps(result) + "\n"
+
+class JsonWriter(ReportWriter):
+    def header(self) -> str:
+        meta = {"target": self.target, "timestamp": self.timestamp}
+        if self.host_count is not None:
+            meta["hosts_in_scope"] = self.host_count
+        lines = [f"    {json.dumps(key)}: {json.dumps(value)}," for key, value in meta.items()]
+        return "{\n" + "\n".join(lines) + '\n    "results": ['
+
+    def row(self, result: Dict) -> str:
+        return ("\n" if self.count == 0 else ",\n") + "        " + json.dumps(result)
+
+    def footer(self) -> str:
+        return "\n    ]\n}\n"
+
+class TxtWriter(ReportWriter):
+    def header(self) -> str:
+        lines = [
+            "PyScan Pro Report",
+            '-' * 50,
+            f"Target: {self.target}",
+            f"Scan Time: {self.timestamp}",
+        ]
+        if self.host_count is not None:
+            lines.append(f"Hosts in scope: {self.host_count}")
+        lines += [
+            '-' * 50,
+            "",
+            f"{'IP':<15} | {'PORT':<8} | {'STATUS':<10} | {'SERVICE':<15} | {'BANNER'}",
+            '-' * 75,
+        ]
+        return "\n".join(lines) + "\n"
+
+    def row(self, r: Dict) -> str:
+        return f"{r['ip']:<15} | {r['port']:<8} | {r['status']:<10} | {r['service']:<15} | {r['banner']}\n"
+
+class CsvWriter(ReportWriter):
+    newline = '' # The csv module writes its own line endings
+
+    def header(self) -> str:
+        return self._format(CSV_FIELDS)
+
+    def row(self, result: Dict) -> str:
+        return self._format([result.get(field, '') for field in CSV_FIELDS])
+
+    @staticmethod
+    def _format(values: Iterable) -> str:
+        line = io.StringIO()
+        csv.writer(line).writerow(values)
+        return line.getvalue()
+
+class HtmlWriter(ReportWriter):
+    def header(self) -> str:
+        target = html.escape(self.target)
+        hosts = f"<p><strong>Hosts in scope:</strong> {self.host_count}</p>" if self.host_count is not None else ""
+        return f"""<!DOCTYPE html>
+<html>
+<head>
+    <title>PyScan Pro Report - {target}</title>
+    <style>
+        body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #1a1a2e; color: #e0e0e0; margin: 40px; }}
+        h1 {{ color: #4ecca3; }}
+        table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
+        th, td {{ border: 1px solid #333; padding: 12px; text-align: left; }}
+        th {{ background-color: #232931; color: #4ecca3; }}
+        tr:nth-child(even) {{ background-color: #2a313c; }}
+        .status-open {{ color: #4ecca3; font-weight: bold; }}
+        .status-filtered {{ color: #f39c12; font-weight: bold; }}
+    </style>
+</head>
+<body>
+    <h1>PyScan Pro - Scan Report</h1>
+    <p><strong>Target:</strong> {target}</p>
+    <p><strong>Timestamp:</strong> {self.timestamp}</p>
+    {hosts}
+
+    <table>
+        <tr>
+            <th>IP Address</th>
+            <th>Port</th>
+            <th>Status</th>
+            <th>Service</th>
+            <th>Banner</th>
+        </tr>
+"""
+
+    def row(self, r: Dict) -> str:
+        status_class = 'status-open' if r['status'] == 'OPEN' else 'status-filtered'
+        cells = [html.escape(str(r[field])) for field in FIELDS]
+        return (
+            f"        <tr><td>{cells[0]}</td><td>{cells[1]}</td>"
+            f"<td class=\"{status_class}\">{cells[2]}</td><td>{cells[3]}</td><td>{cells[4]}</td></tr>\n"
+        )
+
+    def footer(self) -> str:
+        return "    </table>\n</body>\n</html>\n"
+
+WRITERS = {
+    'jsonl': JsonLinesWriter,
+    'json': JsonWriter,
+    'txt': TxtWriter,
+    'csv': CsvWriter,
+    'html': HtmlWriter,
+}
+
 class Reporter:
     """
     Handles report generation for the scanned results.
-    Supported formats: JSON, TXT, HTML.
+    Supported formats: JSON Lines, JSON, TXT, CSV, HTML.
+
+    generate() writes a finished list of results in one go; open() returns a
+    ReportWriter to stream findings into while the scan runs.
     """
-    def __init__(self, target: str, format_type: str, results: List[Dict]):
-        self.target = target
+    def __init__(self, target: Union[str, TargetSpec], format_type: str, results: Optional[List[Dict]] = None):
+        if format_type not in WRITERS:
+            raise ValueError(f"Unsupported format: {format_type}")
+        self.target = str(target)
+        # Size of the scanned address space, known when given a parsed TargetSpec
+        self.host_count: Optional[int] = len(target) if isinstance(target, TargetSpec) else None
         self.format_type = format_type
-        self.results = results
+        self.results = results or []
         self.timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        self.filename = f"report_{self.target.replace('/', '_')}_{self.timestamp}.{self.format_type}"
+        safe_target = re.sub(r'[^A-Za-z0-9._-]+', '_', self.target).strip('_')
+        self.filename = f"report_{safe_target}_{self.timestamp}.{self.format_type}"
         os.makedirs("reports", exist_ok=True)
         self.filepath = os.path.join("reports", self.filename)
 
+    def open(self, await_banners: bool = False) -> ReportWriter:
+        """Starts a streaming report at self.filepath."""
+        return WRITERS[self.format_type](self.filepath, self.target, self.timestamp, self.host_count, await_banners)
+
     def generate(self) -> str:
         """Generates the report file and returns its path."""
-        if self.format_type == 'json':
-            self._generate_json()
-        elif self.format_type == 'txt':
-            self._generate_txt()
-        elif self.format_type == 'html':
-            self._generate_html()
-        else:
-            raise ValueError(f"Unsupported format: {self.format_type}")
+        writer = self.open()
+        try:
+            for result in self.results:
+                writer.add(result)
+        finally:
+            writer.close()
         return self.filepath
-
-    def _generate_json(self):
-        data = {
-            "target": self.target,
-            "timestamp": self.timestamp,
-            "results": self.results
-        }
-        with open(self.filepath, 'w') as f:
-            json.dump(data, f, indent=4)
-
-    def _generate_txt(self):
-        with open(self.filepath, 'w') as f:
-            f.write(f"PyScan Pro Report\n")
-            f.write(f"{'-'*50}\n")
-            f.write(f"Target: {self.target}\n")
-            f.write(f"Scan Time: {self.timestamp}\n")
-            f.write(f"{'-'*50}\n\n")
-            
-            f.write(f"{'IP':<15} | {'PORT':<8} | {'STATUS':<10} | {'SERVICE':<15} | {'BANNER'}\n")
-            f.write(f"{'-'*75}\n")
-            
-            for r in self.results:
-                f.write(f"{r['ip']:<15} | {r['port']:<8} | {r['status']:<10} | {r['service']:<15} | {r['banner']}\n")
-
-    def _generate_html(self):
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>PyScan Pro Report - {self.target}</title>
-            <style>
-                body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #1a1a2e; color: #e0e0e0; margin: 40px; }}
-                h1 {{ color: #4ecca3; }}
-                table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
-                th, ... td {{ border: 1px solid #333; padding: 12px; text-align: left; }}
-                th {{ background-color: #232931; color: #4ecca3; }}
-                tr:nth-child(even) {{ background-color: #2a313c; }}
-                .status-open {{ color: #4ecca3; font-weight: bold; }}
-                .status-filtered {{ color: #f39c12; font-weight: bold; }}
-            </style>
-        </head>
-        <body>
-            <h1>PyScan Pro - Scan Report</h1>
-            <p><strong>Target:</strong> {self.target}</p>
-            <p><strong>Timestamp:</strong> {self.timestamp}</p>
-            
-            <table>
-                <tr>
-                    <th>IP Address</th>
-                    <th>Port</th>
-                    <th>Status</th>
-                    <th>Service</th>
-                    <th>Banner</th>
-                </tr>
-        """
-        for r in self.results:
-            status_class = 'status-open' if r['status'] == 'OPEN' else 'status-filtered'
-            html_content += f"""
-                <tr>
-                    <td>{r['ip']}</td>
-                    <td>{r['port']}</td>
-                    <td class="{status_class}">{r['status']}</td>
-                    <td>{r['service']}</td>
-                    <td>{r['banner']}</td>
-                </tr>
-            """
-        html_content += """
-            </table>
-        </body>
-        </html>
-        """
-        
-        with open(self.filepath, 'w') as f:
-            f.write(html_content)
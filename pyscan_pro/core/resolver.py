@@ -1,3 +1,6 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
 COMMON_PORTS = {
     20: "FTP-DATA",
     21: "FTP",
@@ -18,8 +21,44 @@ COMMON_PORTS = {
     8080: "HTTP-ALT"
 }
 
+# Frequency-ranked port table behind --top-ports: one "port [SERVICE]" per line, most often open first
+TOP_PORTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "top_ports.txt")
+
+_ranked: Optional[Tuple[List[int], Dict[int, str]]] = None
+
+def _table() -> Tuple[List[int], Dict[int, str]]:
+    """The ranked port list and service names (table plus COMMON_PORTS), read once per process."""
+    global _ranked
+    if _ranked is None:
+        ports: List[int] = []
+        names: Dict[int, str] = {}
+        with open(TOP_PORTS_PATH, encoding='ascii') as f:
+            for line in f:
+                fields = line.split()
+                if not fields or fields[0].startswith('#'):
+                    continue
+                port = int(fields[0])
+                ports.append(port)
+                if len(fields) > 1:
+                    names[port] = fields[1]
+        names.update(COMMON_PORTS)
+        _ranked = (ports, names)
+    return _ranked
+
+def top_ports(count: int) -> List[int]:
+    """
+    The `count` most frequently open TCP ports, most frequent first.
+    Raises ValueError when `count` is not positive or the table ranks fewer ports.
+    """
+    ranked = _table()[0]
+    if count < 1:
+        raise ValueError("N must be at least 1")
+    if count > len(ranked):
+        raise ValueError(f"the port table ranks only {len(ranked)} ports")
+    return ranked[:count]
+
 def resolve_service(port: int) -> str:
     """
     Returns the common service name for a given port, or 'Unknown'.
     """
-    return COMMON_PORTS.get(port, "Unknown")
+    return _table()[1].get(port, "Unknown")
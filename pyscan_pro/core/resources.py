@@ -0,0 +1,109 @@
+import os
+import errno
+import logging
+from typing import NamedTuple, Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None # Windows: sockets are not bounded by a descriptor rlimit
+
+logger = logging.getLogger("PyScanPro.Resources")
+
+# Descriptors kept free for everything that is not a probe socket: logs,
+# reports, the results database, DNS lookups, the GUI, libraries
+FD_MARGIN = 64
+# Soft limit we try to raise RLIMIT_NOFILE to (capped by the hard limit)
+FD_TARGET = 65536
+
+# Errors meaning "out of descriptors / buffers / local ports right now", which
+# say nothing about the target port
+RESOURCE_ERRNOS = frozenset((
+    errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM, errno.EADDRNOTAVAIL,
+    10024, 10055, # WSAEMFILE, WSAENOBUFS
+))
+# Backoff while waiting for descriptors to free up: first delay, cap, and total wait before giving up
+BACKOFF_START = 0.01
+BACKOFF_MAX = 0.5
+BACKOFF_GIVE_UP = 30.0
+
+class ResourceExhausted(OSError):
+    """A probe could not get a socket within BACKOFF_GIVE_UP seconds; its port state is unknown."""
+
+class SocketBudget(NamedTuple):
+    """How a scan's sockets are split under the descriptor limit (see plan_sockets)."""
+    probes: int # concurrent probe sockets (threads, or async concurrency)
+    banner_pending: int # connections handed to the banner stage and waiting there
+    tls_pending: int
+    limit: Optional[int] # the soft RLIMIT_NOFILE, None when there is no such limit
+
+_raised = False
+
+def raise_fd_limit() -> Optional[int]:
+    """
+    Raises the soft RLIMIT_NOFILE towards FD_TARGET (as far as the hard limit
+    allows) once per process, and returns the soft limit now in effect, or
+    None on platforms without one.
+    """
+    global _raised
+    if resource is None:
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if _raised:
+        return soft
+    _raised = True
+    wanted = FD_TARGET if hard == resource.RLIM_INFINITY else min(FD_TARGET, hard)
+    if soft != resource.RLIM_INFINITY and soft < wanted:
+        # macOS refuses anything above OPEN_MAX even with an unlimited hard limit
+        for target in (wanted, min(wanted, 10240)):
+            try:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+                logger.info(f"Raised the open file limit from {soft} to {target}")
+                return target
+            except (ValueError, OSError):
+                continue
+    return soft
+
+def open_fds() -> int:
+    """Descriptors this process has open right now (0 when that cannot be told)."""
+    for path in ('/proc/self/fd', '/dev/fd'):
+        try:
+            return max(0, len(os.listdir(path)) - 1) # listdir itself holds one
+        except OSError:
+            continue
+    return 0
+
+def plan_sockets(probes: int, fixed: int, banner_pending: int, tls_pending: int = 0) -> SocketBudget:
+    """
+    Fits a scan's socket use under the descriptor limit.
+
+    `fixed` sockets (one per banner / TLS worker) are set aside first; what is
+    left after FD_MARGIN and the descriptors already open goes three quarters
+    to concurrent probes at most, and the rest to connections waiting in the
+    banner/TLS queues. Requests that fit are returned unchanged.
+    """
+    limit = raise_fd_limit()
+    if limit is None or limit == getattr(resource, 'RLIM_INFINITY', None):
+        return SocketBudget(probes, banner_pending, tls_pending, None)
+    available = max(2, limit - open_fds() - FD_MARGIN - fixed)
+    wanted = probes + banner_pending + tls_pending
+    if wanted <= available:
+        return SocketBudget(probes, banner_pending, tls_pending, limit)
+
+    probes_fit = max(1, min(probes, available * 3 // 4))
+    left = max(0, available - probes_fit)
+    queued = banner_pending + tls_pending
+    banner_fit = min(banner_pending, left * banner_pending // queued) if queued else 0
+    tls_fit = min(tls_pending, left - banner_fit)
+    logger.warning(
+        f"Open file limit {limit} leaves room for ~{available} scan sockets: "
+        f"using {probes_fit} concurrent probes (asked for {probes}) and queueing at most "
+        f"{banner_fit + tls_fit} connections for banner grabbing. Raise it with `ulimit -n`."
+    )
+    return SocketBudget(probes_fit, banner_fit, tls_fit, limit)
+
+def backoff_delay(attempt: int, waited: float) -> Optional[float]:
+    """Delay before retry `attempt` (0-based) after a resource error, or None once BACKOFF_GIVE_UP is spent."""
+    if waited >= BACKOFF_GIVE_UP:
+        return None
+    return min(BACKOFF_MAX, BACKOFF_START * 2 ** attempt)
@@ -1,165 +1,814 @@
+import os
+import random
 import socket
+import time
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Callable, Optional, Dict, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Deque, Iterator, Optional, Dict, Tuple, Union
 
-from core.syn_scan import simulate_syn_scan
-from core.banner import grab_banner
+from core.syn_scan import simulate_syn_scan, _fallback_syn_scan
+from core.syn_engine import RawSynEngine
+from core.async_engine import AsyncScanEngine
+from core.timing import RttEstimator, AimdRateLimiter, LatencyHistogram, FAST_TIMEOUT
+from core.banner import BannerStage
+from core.tls import TLSStage, TLSMetrics, TLS_PORTS
+from core.discovery import HostDiscovery
+from core.workers import ShardedScan, merge_stats
+from core.journal import ScanJournal
+from core.progress import ScanCounters
+from core.metrics import ThreadCounters, errno_name, group
+from core.resources import RESOURCE_ERRNOS, ResourceExhausted, SocketBudget, backoff_delay, plan_sockets
+from core.incremental import IncrementalPlan
 from core.resolver import resolve_service
-from utils.helpers import parse_target, parse_ports
+from utils.helpers import REFUSED_ERRNOS, UNREACHABLE_ERRNOS, address_family, select_shard, shards_by_host, ordered_probes, shuffled_probes
+from utils.targets import TargetSpec, PortSpec, TargetStream
 
 logger = logging.getLogger("PyScanPro.Scanner")
 
+# Ceiling for the doubled timeouts of retried probes
+RETRY_MAX_TIMEOUT = 10.0
+# Unanswered results held for a retry before they are re-probed ahead of new probes
+RETRY_BATCH = 1024
+# Open ports that may wait in the banner (and TLS) stage queue
+BANNER_QUEUE = 1024
+
 class Scanner:
     """
     Main scanner class that coordinates port scanning.
     Supports TCP Connect, SYN Scan Simulation, and Fast Scan modes.
+
+    Two engines are available:
+      - 'thread': one ThreadPoolExecutor task per probe (the default).
+      - 'async':  a single-threaded asyncio core keeping up to `concurrency`
+                  connects in flight (connect-based scans only).
+    SYN scans always try the batched raw-socket engine first.
+
+    Timeouts adapt per host from measured round trips (capped by
+    `max_rtt_timeout`), starting from `timeout`. Passing `min_rate` and/or
+    `max_rate` (packets per second) enables the AIMD rate limiter.
+
+    Banner grabbing runs as a separate stage with `banner_workers` threads, so
+    the sweep never waits on slow services. With `reuse_connections`, the
+    connection that proved a port open is handed to that stage directly.
+    With `tls`, open ports on well-known TLS ports (and ports the banner stage
+    finds speaking TLS) go through a TLS handshake stage instead, with its own
+    `tls_workers` threads, collecting the certificate and cipher.
+
+    Multi-host targets go through a host discovery pre-pass first (unless
+    `discovery` is False) so dead addresses are never port-scanned.
+
+    With `workers` > 1 the scan is split into deterministic shards, each run
+    by its own process; `shard` = (index, count) is how a worker process is
+    told which slice of the target x port space it owns.
+
+    With `journal_path`, progress and findings are checkpointed to disk and a
+    scan restarted with the same path skips the work already completed.
+
+    `exclude` / `exclude_ports` use the same syntax as the target and port
+    strings and are subtracted from every scan.
+
+    With `randomize`, the ip x port space is probed in a pseudo-random order
+    (reproducible through `seed`) so load spreads evenly across hosts.
+
+    With an `incremental` plan, previously open ports are re-checked first and
+    the rest of the space is only sampled (see core.incremental).
+
+    With `retries`, probes the target never answered (timeouts, unexpected
+    errnos) are held back rather than reported, and re-probed up to `retries`
+    times with a doubled timeout each time. Held probes are fed back in
+    batches of RETRY_BATCH during the sweep (see ProbeFeed). Every result
+    carries its `attempts` and a `confidence`: 'high' when the target
+    answered, 'medium' when it stayed silent through every attempt, 'low'
+    when it went unanswered and was not retried.
     """
-    def __init__(self, threads: int = 100, timeout: float = 1.0):
+    def __init__(
+        self,
+        threads: int = 100,
+        timeout: float = 1.0,
+        engine: str = 'thread',
+        concurrency: int = 1000,
+        min_rate: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        max_rtt_timeout: Optional[float] = None,
+        banner_workers: int = 32,
+        reuse_connections: bool = True,
+        discovery: bool = True,
+        workers: int = 1,
+        shard: Optional[Tuple[int, int]] = None,
+        journal_path: Optional[str] = None,
+        exclude: Optional[str] = None,
+        exclude_ports: Optional[str] = None,
+        randomize: bool = False,
+        seed: Optional[int] = None,
+        incremental: Optional[IncrementalPlan] = None,
+        tls: bool = False,
+        tls_workers: int = 8,
+        retries: int = 0
+    ):
         self.threads = threads
         self.timeout = timeout
+        self.engine = engine
+        self.concurrency = concurrency
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_rtt_timeout = max_rtt_timeout
+        self.banner_workers = banner_workers
+        self.reuse_connections = reuse_connections
+        self.discovery = discovery
+        self.workers = workers
+        self.shard = shard
+        self._sharded: Optional[ShardedScan] = None
+        # How select_shard split the scan, 'host' or 'port', once this shard has started
+        self._shard_by: Optional[str] = None
+        self.journal_path = journal_path
+        self.journal: Optional[ScanJournal] = None
+        self.exclude = exclude
+        self.exclude_ports = exclude_ports
+        self.randomize = randomize
+        self.seed = seed
+        self.incremental = incremental
+        self.tls = tls
+        self.tls_workers = tls_workers
+        self.retries = max(0, retries)
         self.is_running = False
+        self.banner_stage: Optional[BannerStage] = None
+        self.tls_stage: Optional[TLSStage] = None
+        self.tls_metrics = TLSMetrics()
+
+        self.rtt = RttEstimator(timeout, max_rtt_timeout)
+        self.rate_limiter: Optional[AimdRateLimiter] = None
+        self.counters = ScanCounters()
+        self._reset_metrics()
         
         # Thread pool executor
         self.executor: Optional[ThreadPoolExecutor] = None
-        self.futures = []
+        self.futures = set()
+        # Number of probes queued ahead of the workers. Bounded so memory stays
+        # flat no matter how large the target x port space is.
+        self.window = threads * 4
+        # Probe sockets and queued connections actually used, after fitting under the descriptor limit (see core.resources)
+        self.budget: Optional[SocketBudget] = None
+        # Unanswered results waiting to be re-probed, at most RETRY_BATCH of them
+        self._ambiguous: Deque[Dict] = deque()
 
-    def scan_tcp(self, ip: str, port: int) -> str:
+    def scan_tcp(self, ip: str, port: int, timeout: Optional[float] = None) -> str:
         """
         Uses standard socket connection. Completes full 3-way handshake.
         """
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(self.timeout)
+        status, conn, _ = self._connect(ip, port, timeout)
+        if conn:
+            conn.close()
+        return status
+
+    def _connect(self, ip: str, port: int, timeout: Optional[float] = None, keep_open: bool = False) -> Tuple[str, Optional[socket.socket], bool]:
+        """
+        TCP connect probe. With keep_open, an OPEN port's connected socket is
+        returned so the banner stage can reuse it instead of reconnecting.
+        The last item tells whether the target actually answered (handshake,
+        RST or ICMP unreachable); a timeout or an unexpected errno leaves the
+        CLOSED verdict ambiguous.
+        """
+        if timeout is None:
+            timeout = self.rtt.timeout_for(ip)
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+
+        metrics = self.metrics
+        attempt, waited = 0, 0.0
+        while True:
+            try:
+                s = socket.socket(address_family(ip), socket.SOCK_STREAM)
+            except OSError as e:
+                metrics.add(f"errno:{errno_name(e.errno or 0)}")
+                if e.errno in RESOURCE_ERRNOS:
+                    # Out of descriptors: the port's state is unknown, so wait and retry instead of calling it CLOSED
+                    delay = self._resource_delay(attempt, waited, e)
+                    time.sleep(delay)
+                    waited += delay
+                    attempt += 1
+                    continue
+                self._record_outcome(ip, None)
+                return 'CLOSED', None, False
+
+            metrics.add('in_flight')
+            try:
+                s.settimeout(timeout)
+                started = time.monotonic()
                 # connect_ex returns 0 on success (OPEN), error indicator otherwise
                 result = s.connect_ex((ip, port))
-                if result == 0:
-                    return 'OPEN'
-                return 'CLOSED'
-        except Exception:
-            return 'CLOSED'
+                elapsed = time.monotonic() - started
+            except Exception as e:
+                s.close()
+                metrics.add('in_flight', -1)
+                metrics.add(f"errno:{errno_name(getattr(e, 'errno', None) or 0)}")
+                self._record_outcome(ip, None)
+                return 'CLOSED', None, False
+            metrics.add('in_flight', -1)
+            if result:
+                metrics.add(f"errno:{errno_name(result)}")
+            if result in RESOURCE_ERRNOS:
+                # No buffers / local ports left: likewise says nothing about the target
+                s.close()
+                delay = self._resource_delay(attempt, waited, OSError(result, os.strerror(result)))
+                time.sleep(delay)
+                waited += delay
+                attempt += 1
+                continue
+            break
+
+        # Both a completed handshake and a RST are genuine round trips
+        answered = result == 0 or result in REFUSED_ERRNOS
+        self._record_outcome(ip, elapsed if answered else None)
+        if result == 0 and keep_open:
+            return 'OPEN', s, True
+        s.close()
+        return ('OPEN' if result == 0 else 'CLOSED'), None, answered or result in UNREACHABLE_ERRNOS
             
+    def _resource_delay(self, attempt: int, waited: float, error: OSError) -> float:
+        """
+        How long to wait before retrying a probe that hit a resource error
+        (EMFILE and friends). The rate limiter counts it as a drop, so it slows
+        down too. Raises ResourceExhausted once the backoff budget is spent or
+        the scan is stopping; the probe is then dropped without a port state
+        (and left out of the journal, so --resume probes it again).
+        """
+        delay = backoff_delay(attempt, waited)
+        if delay is None or not self.is_running:
+            raise ResourceExhausted(error.errno, f"no socket available: {error.strerror}")
+        self.metrics.add('resource_waits')
+        if self.rate_limiter:
+            self.rate_limiter.record(dropped=True)
+        return delay
+
     def scan_fast(self, ip: str, port: int) -> str:
         """
         Same as TCP but faster timeout, primarily looks for quick OPENs.
         """
-        self.timeout = 0.5
-        return self.scan_tcp(ip, port)
+        return self.scan_tcp(ip, port, timeout=self._fast_timeout(ip))
+
+    def _fast_timeout(self, ip: str) -> float:
+        return min(FAST_TIMEOUT, self.rtt.timeout_for(ip))
+
+    def stats(self) -> Dict:
+        """Timing and rate controller state, for display after (or during) a scan."""
+        if self._sharded:
+            return merge_stats(self._sharded.shard_stats)
+        stats = self.rtt.stats()
+        if self.rate_limiter:
+            stats.update(self.rate_limiter.stats())
+        if self.tls:
+            stats['tls'] = self.tls_metrics.snapshot()
+        if self.retries:
+            retried = group(self.metrics.totals(), 'retry')
+            stats['retries'] = {'probes': retried.get('probes', 0), 'answered': retried.get('answered', 0)}
+        if self._shard_by:
+            stats['shard_by'] = self._shard_by
+        return stats
+
+    def live_stats(self) -> Dict:
+        """Probe counters and the current timeout, cheap enough to poll from a progress display."""
+        if self._sharded:
+            return self._sharded.live_stats()
+        stats = self.counters.snapshot()
+        stats['timeout'] = self.rtt.current_timeout()
+        return stats
+
+    def metrics_snapshot(self) -> Dict:
+        """
+        Hot-path counters, latency histograms and queue depths for export
+        (see core.metrics). Cheap, but meant for a poll every few seconds
+        rather than per probe.
+        """
+        snapshot = self._sharded.metrics() if self._sharded else self.local_metrics()
+        snapshot['timestamp'] = round(time.time(), 3)
+        snapshot['elapsed_seconds'] = round(time.monotonic() - self._metrics_started, 3)
+        return snapshot
+
+    def local_metrics(self) -> Dict:
+        """This process's part of metrics_snapshot(); shards send theirs to the parent."""
+        totals = self.metrics.totals()
+        tallies = self.counters.snapshot()
+        banner_stage, tls_stage = self.banner_stage, self.tls_stage
+        snapshot = {
+            'probes_issued': tallies['issued'],
+            'results': {status: tallies[status] for status in ('open', 'closed', 'filtered')},
+            'connect_errors': group(totals, 'errno'),
+            'errors': group(totals, 'error'),
+            'connects_in_flight': totals.get('in_flight', 0),
+            'queues': {
+                'probes': len(self.futures),
+                'banner': banner_stage.pending() if banner_stage else 0,
+                'tls': tls_stage.pending() if tls_stage else 0,
+            },
+            'banners_skipped': totals.get('banners_skipped', 0),
+            'resource_waits': totals.get('resource_waits', 0),
+            'retries': group(totals, 'retry'),
+            'connect_latency': self.rtt.stats()['latency'],
+            'banner_latency': self.banner_latency,
+        }
+        if self.tls:
+            tls = self.tls_metrics.snapshot()
+            snapshot['tls'] = {key: tls[key] for key in ('handshakes', 'resumed', 'failures', 'cert_cache_hits')}
+            snapshot['tls_latency'] = self.tls_latency
+        return snapshot
+
+    def _reset_metrics(self):
+        self.metrics = ThreadCounters()
+        self.banner_latency = LatencyHistogram()
+        self.tls_latency = LatencyHistogram()
+        self._metrics_started = time.monotonic()
+        self._logged_errors = set()
+
+    def _log_error(self, where: str, e: Exception):
+        """Counts an unexpected error; only the first of each exception type per scan is logged as an error."""
+        kind = type(e).__name__
+        self.metrics.add(f"error:{kind}")
+        if kind in self._logged_errors:
+            logger.debug(f"Error in {where}: {e}")
+            return
+        self._logged_errors.add(kind)
+        logger.error(f"Error in {where}: {e} (further {kind} errors are only counted in the metrics)")
+
+    def _record_outcome(self, ip: str, rtt: Optional[float]):
+        """Feeds one probe outcome to the timing controllers; rtt=None means no answer."""
+        if rtt is not None:
+            self.rtt.observe(ip, rtt)
+        if self.rate_limiter:
+            self.rate_limiter.record(dropped=rtt is None)
+
+    def _timed_probe(self, probe_fn, ip: str, port: int, timeout: Optional[float] = None) -> str:
+        """
+        Runs a (ip, port, timeout) -> status probe under the timing controllers.
+        A resource error raised by the probe (see _fallback_syn_scan) is backed
+        off and retried like in _connect.
+        """
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        attempt, waited = 0, 0.0
+        while True:
+            started = time.monotonic()
+            try:
+                status = probe_fn(ip, port, timeout or self.rtt.timeout_for(ip))
+                break
+            except OSError as e:
+                if e.errno not in RESOURCE_ERRNOS:
+                    raise
+                self.metrics.add(f"errno:{errno_name(e.errno)}")
+                delay = self._resource_delay(attempt, waited, e)
+                time.sleep(delay)
+                waited += delay
+                attempt += 1
+        self._record_outcome(ip, time.monotonic() - started if status != 'FILTERED' else None)
+        return status
 
     def start_scan(
         self,
-        targets: str, 
-        ports_str: str, 
+        targets: Union[str, TargetSpec, TargetStream],
+        ports_str: Union[str, PortSpec],
         scan_type: str, 
         progress_callback: Callable[[int, int, str], None],
-        result_callback: Callable[[Dict], None]
+        result_callback: Callable[[Dict], None],
+        banner_callback: Optional[Callable[[Dict], None]] = None
     ):
         """
         Initiates a multithreaded scan.
         Args:
-            targets: The raw target string (IP, range, CIDR)
-            ports_str: The raw port string (e.g. 1-100)
+            targets: The raw target string (IP, range, CIDR), a parsed TargetSpec or a
+                TargetStream of targets that are still resolving
+            ports_str: The raw port string (e.g. 1-100) or a parsed PortSpec
             scan_type: 'tcp', 'syn', 'fast'
             progress_callback: Callable that updates the UI progress (current, total, status)
             result_callback: Callable that adds a finding to the UI table
+            banner_callback: Optional callable invoked with the same result dict once
+                its banner has been filled in by the banner stage
         """
-        ip_list = parse_target(targets)
-        port_list = parse_ports(ports_str)
+        target_spec = targets if isinstance(targets, (TargetSpec, TargetStream)) else TargetSpec.parse(targets, self.exclude)
+        port_spec = ports_str if isinstance(ports_str, PortSpec) else PortSpec.parse(ports_str, self.exclude_ports)
+        if self.incremental and self.journal_path:
+            raise ValueError("An incremental scan samples the port space, so it cannot be resumed from a journal")
+        if isinstance(target_spec, TargetStream) and (self.workers > 1 or self.randomize or self.incremental):
+            # Sharding, shuffling and sampling index into the host list, so it must be fully resolved
+            target_spec = target_spec.collect()
+        # A stream's size is only known once every hostname has resolved
+        streamed = isinstance(target_spec, TargetStream)
+        hosts, ports = target_spec, port_spec
         
-        if not ip_list:
+        if not streamed and not hosts:
             progress_callback(0, 0, "Invalid Target.")
             return
             
-        if not port_list:
+        if not ports:
             progress_callback(0, 0, "Invalid Port Range.")
             return
 
-        total_tasks = len(ip_list) * len(port_list)
+        self.counters = ScanCounters()
+        self._reset_metrics()
+        if self.randomize and self.seed is None:
+            self.seed = random.getrandbits(32)
+            logger.info(f"Randomized probe order, seed {self.seed}")
+
+        if self.discovery and (streamed or len(hosts) > 1):
+            # Only port-scan hosts that answered the liveness pre-pass. It runs once,
+            # here, so shards get the live hosts rather than each probing them again.
+            self.is_running = True
+            live_hosts = HostDiscovery(
+                timeout=self.timeout, concurrency=self.concurrency
+            ).run(hosts, hosts.estimate() if streamed else len(hosts), progress_callback, lambda: self.is_running)
+            if not self.is_running:
+                progress_callback(0, 0, "Scan Complete")
+                return
+            if not live_hosts:
+                self.is_running = False
+                progress_callback(0, 0, "No live hosts found.")
+                return
+            hosts, streamed = live_hosts, False
+
+        self._sharded = None
+        if self.workers > 1:
+            self.is_running = True
+            self._sharded = ShardedScan(self, self.workers)
+            if not isinstance(hosts, TargetSpec): # The live hosts left by discovery
+                hosts = TargetSpec.from_addresses(hosts, target_spec.text)
+            try:
+                self._sharded.run(hosts, ports, scan_type, progress_callback, result_callback, banner_callback)
+            finally:
+                self.is_running = False
+                progress_callback(
+                    self._sharded.completed(), self._sharded.total(), "Scan Complete"
+                )
+            return
+
+        if self.shard:
+            self._shard_by = 'host' if shards_by_host(len(hosts), self.shard[1]) else 'port'
+            hosts, ports = select_shard(hosts, ports, *self.shard)
+            if not hosts or not ports:
+                progress_callback(0, 0, "Scan Complete") # Nothing landed in this shard
+                return
+
+        total_tasks = (hosts.estimate() if streamed else len(hosts)) * len(ports)
+        # Lazily walk the ip x port space so only the in-flight window is ever in memory
+        if self.incremental:
+            probes, total_tasks = self.incremental.probes(hosts, ports)
+        elif self.randomize:
+            # A journaled scan shuffles one checkpoint block at a time so blocks keep completing
+            block_size = ScanJournal.BLOCK_SIZE if self.journal_path else None
+            probes = shuffled_probes(hosts, ports, self.seed, block_size)
+        else:
+            probes = ordered_probes(hosts, ports)
+
+        self.journal = None
+        if self.journal_path:
+            # Each shard process keeps its own journal next to the requested path
+            path, signature = self.journal_path, f"{target_spec} {port_spec} {scan_type}"
+            if target_spec.exclude or port_spec.exclude:
+                signature += f" exclude={target_spec.exclude or ''}/{port_spec.exclude or ''}"
+            if self.shard:
+                path, signature = f"{path}.{self.shard[0]}", f"{signature} shard={self.shard[0]}/{self.shard[1]}"
+            self.journal = ScanJournal(path, signature)
+            self.journal.open(ports.intervals)
+            for result in self.journal.findings.values():
+                result_callback(result)
+            total_tasks = max(0, total_tasks - self.journal.completed_probes)
+            probes = self.journal.pending(probes) if self.randomize else self.journal.probes(hosts)
+
+        probes = self.counters.count(probes)
+        if streamed:
+            already_done = self.journal.completed_probes if self.journal else 0
+            progress_callback = self._streamed_progress(progress_callback, hosts, len(ports), already_done)
+
+        self.rtt = RttEstimator(self.timeout, self.max_rtt_timeout)
+        self.rate_limiter = None
+        if self.min_rate or self.max_rate:
+            self.rate_limiter = AimdRateLimiter(self.min_rate, self.max_rate)
+        # Handed-off connections wait in the stage queues, so they count against the descriptor limit too
+        pending = BANNER_QUEUE if self.reuse_connections else 0
+        self.budget = plan_sockets(
+            self.concurrency if self.engine == 'async' and scan_type != 'syn' else self.threads,
+            self.banner_workers + (self.tls_workers if self.tls else 0),
+            pending, pending if self.tls else 0
+        )
+        self.window = self.budget.probes * 4
+        self.banner_stage = BannerStage(
+            self.banner_workers, timeout=1.0, max_pending=BANNER_QUEUE,
+            on_banner=self._banner_hook(banner_callback), latency=self.banner_latency
+        )
+        self.banner_stage.rtt_timeout = self.rtt.timeout_for
+        self.banner_stage.start()
+        if self.tls:
+            self.tls_metrics = TLSMetrics()
+            self.tls_stage = TLSStage(
+                self.tls_workers, timeout=max(3.0, self.timeout), max_pending=BANNER_QUEUE,
+                on_banner=self.banner_stage.on_banner, metrics=self.tls_metrics, latency=self.tls_latency
+            )
+            self.tls_stage.rtt_timeout = self.rtt.timeout_for
+            self.tls_stage.start()
+            self.banner_stage.tls_handoff = self.tls_stage.submit
+
+        if scan_type == 'syn':
+            # Prefer the batched raw-socket engine; it needs CAP_NET_RAW / admin rights
+            try:
+                # Raw probes are retransmitted in line by the engine itself (always at least once:
+                # a retransmit costs one packet, not a held connection), so nothing is fed back
+                replies = RawSynEngine(
+                    timeout=self.timeout, retries=max(1, self.retries), rtt=self.rtt, rate_limiter=self.rate_limiter
+                ).scan(probes)
+            except PermissionError:
+                logger.warning("Raw SYN engine requires elevated privileges. Falling back to simulation mode.")
+                task = self._scan_task_syn_fallback
+            except OSError as e:
+                logger.warning(f"Raw SYN engine unavailable ({e}). Using per-probe SYN scan.")
+                task = self._scan_task_syn
+            else:
+                self._start_raw_syn(replies, total_tasks, progress_callback, result_callback)
+                return
+        elif self.engine == 'async':
+            self._start_async(probes, total_tasks, scan_type, progress_callback, result_callback)
+            return
+        elif scan_type == 'fast':
+            task = self._scan_task_tcp_fast
+        else: # Default to tcp
+            task = self._scan_task_tcp
+
         completed_tasks = 0
-        
         self.is_running = True
-        self.executor = ThreadPoolExecutor(max_workers=self.threads)
+        self.executor = ThreadPoolExecutor(max_workers=self.budget.probes)
         self.futures.clear()
+        feed = self._feed(probes)
 
-        # Submit tasks
-        for ip in ip_list:
-            for port in port_list:
-                if scan_type == 'syn':
-                    future = self.executor.submit(self._scan_task_syn, ip, port)
-                elif scan_type == 'fast':
-                    future = self.executor.submit(self._scan_task_tcp_fast, ip, port)
-                else: # Default to tcp
-                    future = self.executor.submit(self._scan_task_tcp, ip, port)
-                    
-                self.futures.append(future)
+        def refill():
+            # Keep at most `window` futures queued; pull new probes only as old ones finish
+            while self.is_running and len(self.futures) < self.window:
+                probe = next(feed, None)
+                if probe is None:
+                    return
+                if isinstance(probe, dict):
+                    self.futures.add(self.executor.submit(self._retry_task, task, probe))
+                else:
+                    self.futures.add(self.executor.submit(task, *probe))
 
         # Process future results as they complete
         try:
-            for future in as_completed(self.futures):
+            refill()
+            while self.futures and self.is_running:
+                done, self.futures = wait(self.futures, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    try:
+                        outcome = future.result()
+                        if outcome and outcome[0]['attempts'] > 1:
+                            # A re-probe: the port was already counted the first time
+                            self._deliver(*outcome, result_callback)
+                            continue
+                        completed_tasks += 1
+                        
+                        if outcome:
+                            self._deliver(*outcome, result_callback)
+                                
+                        progress_callback(completed_tasks, total_tasks, "Scanning...")
+                        
+                    except Exception as e:
+                        self._log_error("thread result", e)
+                        completed_tasks += 1
+                        progress_callback(completed_tasks, total_tasks, "Error occurred")
+
+                refill()
+
+            self._finish_banners(completed_tasks, total_tasks, progress_callback)
+                    
+        finally:
+            self.stop_scan()
+            progress_callback(completed_tasks, total_tasks, "Scan Complete")
+
+    def _start_async(self, probes, total_tasks, scan_type, progress_callback, result_callback):
+        """Runs the scan on the asyncio engine. Blocks until it completes or is stopped."""
+        engine = AsyncScanEngine(self, concurrency=self.budget.probes)
+        self.is_running = True
+        try:
+            engine.run(self._feed(probes), total_tasks, scan_type, progress_callback, result_callback)
+            self._finish_banners(engine.completed, total_tasks, progress_callback)
+        finally:
+            self.stop_scan()
+            progress_callback(engine.completed, total_tasks, "Scan Complete")
+
+    def _start_raw_syn(self, replies, total_tasks, progress_callback, result_callback):
+        """
+        Consumes (ip, port, status, attempts) tuples from the raw SYN engine.
+        Banners for OPEN ports are left to the banner stage so they never stall
+        the sender.
+        """
+        completed_tasks = 0
+        self.is_running = True
+        self._ambiguous.clear()
+        try:
+            for ip, port, status, attempts in replies:
                 if not self.is_running:
                     break # Stop requested
-                
-                try:
-                    result = future.result()
-                    completed_tasks += 1
-                    
-                    if result:
-                        status = result['status']
-                        # Call result callback if OPEN or FILTERED (for SYN)
-                        if status in ('OPEN', 'FILTERED'):
-                            result_callback(result)
-                            
-                    progress_callback(completed_tasks, total_tasks, "Scanning...")
-                    
-                except Exception as e:
-                    logger.error(f"Error in thread result: {e}")
-                    completed_tasks += 1
-                    progress_callback(completed_tasks, total_tasks, "Error occurred")
-                    
+
+                completed_tasks += 1
+                result = self._collect_result(ip, port, status, status != 'FILTERED')
+                result['attempts'] = attempts
+                self._deliver(result, None, result_callback)
+                progress_callback(completed_tasks, total_tasks, "Scanning...")
+
+            self._finish_banners(completed_tasks, total_tasks, progress_callback)
+
         finally:
+            replies.close()
             self.stop_scan()
             progress_callback(completed_tasks, total_tasks, "Scan Complete")
 
+    def _feed(self, probes: Iterator[Tuple[str, int]]) -> 'ProbeFeed':
+        """Wraps the probe iterator so held results are fed back as retries (see ProbeFeed)."""
+        self._ambiguous.clear()
+        return ProbeFeed(probes, self._ambiguous)
+
+    def _deliver(self, result: Dict, conn: Optional[socket.socket], result_callback: Callable[[Dict], None]):
+        """
+        Reports a probe's result, unless the target never answered and it has
+        retries left: then it is held back until the ProbeFeed re-probes it.
+        Unanswered results that are final get confidence 'medium' after more
+        than one attempt. Called on the thread driving the scan.
+        """
+        if result['confidence'] != 'high':
+            if result['attempts'] <= self.retries:
+                self._ambiguous.append(result)
+                if conn:
+                    conn.close()
+                return
+            if result['attempts'] > 1:
+                result['confidence'] = 'medium'
+        self._emit(result, conn, result_callback)
+
+    def _retry_task(self, task, previous: Dict) -> Optional[Tuple[Dict, Optional[socket.socket]]]:
+        ip, port = previous['ip'], previous['port']
+        attempts = previous['attempts'] + 1
+        return self._retried(task(ip, port, self._retry_timeout(ip, attempts)), attempts)
+
+    def _retried(self, outcome: Optional[Tuple[Dict, Optional[socket.socket]]], attempts: int):
+        """Stamps a re-probe's outcome with its attempt number and counts it."""
+        if outcome:
+            outcome[0]['attempts'] = attempts
+            self.metrics.add('retry:probes')
+            if outcome[0]['confidence'] == 'high':
+                self.metrics.add('retry:answered')
+        return outcome
+
+    def _retry_timeout(self, ip: str, attempt: int) -> float:
+        """Timeout for probe number `attempt` (2 = first retry): doubled per attempt, up to RETRY_MAX_TIMEOUT."""
+        return min(RETRY_MAX_TIMEOUT, max(self.rtt.timeout_for(ip), self.timeout) * 2 ** (attempt - 1))
+
+    def _emit(self, result: Dict, conn: Optional[socket.socket], result_callback: Callable[[Dict], None]):
+        """
+        Reports a finding, then hands OPEN ports (and the connection that proved
+        them open, if any) to the banner stage. Called on the thread driving the scan.
+        """
+        self.counters.record(result['status'])
+        # Call result callback if OPEN or FILTERED (for SYN)
+        if result['status'] in ('OPEN', 'FILTERED'):
+            result_callback(result)
+        journal = self.journal
+        if journal:
+            journal.record(result)
+        stage = self.banner_stage
+        if self.tls_stage and result['port'] in TLS_PORTS:
+            stage = self.tls_stage
+        if result['status'] == 'OPEN' and stage:
+            if conn and stage.pending() >= self._held_sockets(stage):
+                # The stage already holds all the connections the descriptor budget allows; it reconnects for this one
+                conn.close()
+                conn = None
+            if not stage.submit(result, conn if self.reuse_connections else None):
+                self.metrics.add('banners_skipped')
+            conn = None
+        if conn:
+            conn.close()
+
+    def _held_sockets(self, stage: BannerStage) -> int:
+        """How many handed-off connections `stage` may hold open at once."""
+        budget = self.budget
+        if budget is None:
+            return BANNER_QUEUE
+        return budget.tls_pending if stage is self.tls_stage else budget.banner_pending
+
+    def _banner_hook(self, banner_callback: Optional[Callable[[Dict], None]]) -> Optional[Callable[[Dict], None]]:
+        """Wraps the caller's banner callback so late banners are journaled too."""
+        if not self.journal_path:
+            return banner_callback
+
+        def on_banner(result: Dict):
+            journal = self.journal
+            if journal:
+                journal.record_banner(result)
+            if banner_callback:
+                banner_callback(result)
+        return on_banner
+
+    def _streamed_progress(self, progress_callback, stream: TargetStream, port_count: int, already_done: int):
+        """Reports the stream's current size estimate as the total while hostnames are still resolving."""
+        def progress(current: int, _total: int, status: str):
+            progress_callback(current, max(current, stream.estimate() * port_count - already_done), status)
+        return progress
+
+    def _finish_banners(self, completed_tasks: int, total_tasks: int, progress_callback):
+        """Waits for outstanding banner grabs (then TLS handshakes) once the port sweep itself is done."""
+        stage = self.banner_stage
+        if stage and stage.pending() and self.is_running:
+            progress_callback(completed_tasks, total_tasks, "Grabbing banners...")
+            stage.join()
+        # After the banner stage: it may still have handed ports over
+        stage = self.tls_stage
+        if stage and stage.pending() and self.is_running:
+            progress_callback(completed_tasks, total_tasks, "TLS handshakes...")
+            stage.join()
+
     def stop_scan(self):
         """Gracefully stops all running threads."""
         self.is_running = False
         if self.executor:
             # cancel pending futures
-            for future in self.futures:
+            for future in list(self.futures):
                 future.cancel()
             # Shutdown but let executing threads finish current timeout cycle
             self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.banner_stage:
+            self.banner_stage.cancel()
+            self.banner_stage.close()
+            self.banner_stage = None
+        if self.tls_stage:
+            self.tls_stage.cancel()
+            self.tls_stage.close()
+            self.tls_stage = None
+        if self.journal:
+            self.journal.close()
+            self.journal = None
 
-    def _collect_result(self, ip: str, port: int, status: str) -> Dict:
-        """Helper to build result dictionary & grab banner if open."""
-        service = resolve_service(port)
-        banner = "N/A"
-        
-        if status == 'OPEN':
-            # Attempt to grab a banner if open
-            found_banner = grab_banner(ip, port, timeout=1.0)
-            if found_banner:
-                banner = found_banner
-
+    def _collect_result(self, ip: str, port: int, status: str, answered: bool = True) -> Dict:
+        """Helper to build the result dictionary. Banners are filled in later by the banner stage."""
         return {
             'ip': ip,
             'port': port,
             'status': status,
-            'service': service,
-            'banner': banner
+            'service': resolve_service(port),
+            'banner': "N/A",
+            'confidence': 'high' if answered else 'low',
+            'attempts': 1
         }
 
-    def _scan_task_tcp(self, ip: str, port: int) -> Dict:
+    # Scan tasks take an explicit timeout only in the retry pass; the sweep uses the adaptive one
+
+    def _scan_task_tcp(self, ip: str, port: int, timeout: Optional[float] = None) -> Optional[Tuple[Dict, Optional[socket.socket]]]:
         if not self.is_running: return None
-        status = self.scan_tcp(ip, port)
-        return self._collect_result(ip, port, status)
+        status, conn, answered = self._connect(ip, port, timeout, keep_open=self.reuse_connections)
+        return self._collect_result(ip, port, status, answered), conn
         
-    def _scan_task_tcp_fast(self, ip: str, port: int) -> Dict:
+    def _scan_task_tcp_fast(self, ip: str, port: int, timeout: Optional[float] = None) -> Optional[Tuple[Dict, Optional[socket.socket]]]:
         if not self.is_running: return None
-        status = self.scan_fast(ip, port)
-        return self._collect_result(ip, port, status)
+        status, conn, answered = self._connect(ip, port, timeout or self._fast_timeout(ip), keep_open=self.reuse_connections)
+        return self._collect_result(ip, port, status, answered), conn
 
-    def _scan_task_syn(self, ip: str, port: int) -> Dict:
+    def _scan_task_syn(self, ip: str, port: int, timeout: Optional[float] = None) -> Optional[Tuple[Dict, None]]:
         if not self.is_running: return None
-        status = simulate_syn_scan(ip, port, self.timeout)
-        return self._collect_result(ip, port, status)
+        status = self._timed_probe(simulate_syn_scan, ip, port, timeout)
+        return self._collect_result(ip, port, status, status != 'FILTERED'), None
+
+    def _scan_task_syn_fallback(self, ip: str, port: int, timeout: Optional[float] = None) -> Optional[Tuple[Dict, None]]:
+        if not self.is_running: return None
+        status = self._timed_probe(_fallback_syn_scan, ip, port, timeout)
+        return self._collect_result(ip, port, status, status != 'FILTERED'), None
+
+
+class ProbeFeed:
+    """
+    Interleaves retries with a scan's (ip, port) probes. Yields the held
+    result dicts of unanswered probes once RETRY_BATCH of them have piled up,
+    or once `probes` runs dry, and (ip, port) tuples otherwise. So at most
+    RETRY_BATCH results are ever held, and the sweep does not wait for a
+    separate pass at the end.
+
+    Not a generator on purpose: a caller may find it empty while its last
+    probes are in flight, and pull the retries those probes cause later.
+    """
+    def __init__(self, probes: Iterator[Tuple[str, int]], held: Deque[Dict]):
+        self.probes = probes
+        self.held = held
+        self._exhausted = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Union[Tuple[str, int], Dict]:
+        if self.held and (self._exhausted or len(self.held) >= RETRY_BATCH):
+            return self.held.popleft()
+        if not self._exhausted:
+            probe = next(self.probes, None)
+            if probe is not None:
+                return probe
+            self._exhausted = True
+            if self.held:
+                return self.held.popleft()
+        raise StopIteration
+
+    def pending(self) -> bool:
+        """True while held results are waiting to be re-probed."""
+        return bool(self.held)
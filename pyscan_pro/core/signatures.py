@@ -0,0 +1,232 @@
+import os
+import re
+import json
+import logging
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from utils.targets import PortSpec
+
+logger = logging.getLogger("PyScanPro.Signatures")
+
+DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "service_probes.json")
+
+# Escapes that stand for a class of bytes rather than one literal byte
+_CLASS_ESCAPES = set("dDwWsSbBAZ0123456789")
+_METACHARS = set(".^$*+?{}[]|()\\")
+
+class Probe(NamedTuple):
+    name: str
+    payload: bytes
+    ports: Optional[PortSpec] # None: a generic probe, tried on any port
+
+class ServiceMatch(NamedTuple):
+    service: str
+    product: str
+    version: str
+    probe: str
+
+    def describe(self) -> str:
+        return f"{self.product} {self.version}".strip()
+
+class MatchRule:
+    """One compiled match line of the database."""
+    __slots__ = ('index', 'service', 'regex', 'product', 'version', 'anchored')
+
+    def __init__(self, index: int, entry: Dict):
+        flags = 0
+        for flag in entry.get('flags', ''):
+            flags |= {'i': re.IGNORECASE, 's': re.DOTALL}[flag]
+        self.index = index
+        self.service = entry['service']
+        self.regex = re.compile(entry['pattern'].encode('latin-1'), flags)
+        self.product = entry.get('product', '')
+        self.version = entry.get('version', '')
+        self.anchored = entry['pattern'].startswith('^')
+
+    def match(self, banner: bytes, probe: str) -> Optional[ServiceMatch]:
+        m = self.regex.match(banner) if self.anchored else self.regex.search(banner)
+        if not m:
+            return None
+        return ServiceMatch(self.service, _expand(self.product, m), _expand(self.version, m), probe)
+
+def _expand(template: str, m: "re.Match") -> str:
+    """Fills $1..$9 in a product/version template from the match groups."""
+    def group(ref: "re.Match") -> str:
+        index = int(ref.group(1))
+        value = m.group(index) if index <= m.re.groups else None
+        return value.decode('latin-1') if value else ''
+    return re.sub(r'\$(\d)', group, template).strip()
+
+def first_bytes(pattern: str, ignore_case: bool = False) -> Optional[Set[int]]:
+    """
+    The bytes a banner matching `pattern` can start with, or None when that
+    cannot be told from the pattern (unanchored, top-level alternation, or a
+    leading wildcard/class escape/group). Only simple leading literals,
+    \\xHH escapes and [...] sets are understood; anything else is None, which
+    just means the rule is tried against every banner.
+    """
+    if not pattern.startswith('^') or _has_top_level_alternation(pattern):
+        return None
+    pos = 1
+    if pos >= len(pattern):
+        return None
+    char = pattern[pos]
+    if char == '\\':
+        escape = pattern[pos + 1:pos + 2]
+        if not escape or escape in _CLASS_ESCAPES:
+            return None
+        if escape == 'x':
+            values, pos = {int(pattern[pos + 2:pos + 4], 16)}, pos + 4
+        else:
+            values, pos = {ord(escape)}, pos + 2
+    elif char == '[':
+        parsed = _parse_set(pattern, pos)
+        if parsed is None:
+            return None
+        values, pos = parsed
+    elif char in _METACHARS:
+        return None
+    else:
+        values, pos = {ord(char)}, pos + 1
+
+    # An optional first token says nothing about the first byte
+    if pattern[pos:pos + 1] in ('?', '*') or pattern[pos:pos + 2] in ('{0', '{,'):
+        return None
+    if ignore_case:
+        values |= {ord(chr(v).swapcase()) for v in values if chr(v).isalpha() and v < 128}
+    return values
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    depth, i = 0, 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '[':
+            # Skip the set; ']' right after '[' or '[^' is literal
+            i += 2 if pattern[i + 1:i + 2] in (']', '^') else 1
+            while i < len(pattern) and pattern[i] != ']':
+                i += 2 if pattern[i] == '\\' else 1
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+        i += 1
+    return False
+
+def _parse_set(pattern: str, pos: int):
+    """Parses a [...] of literals, \\xHH escapes and ranges. Returns (bytes, next pos) or None."""
+    pos += 1
+    if pattern[pos:pos + 1] == '^':
+        return None
+    values: Set[int] = set()
+    previous = None
+    while pos < len(pattern) and pattern[pos] != ']':
+        char = pattern[pos]
+        if char == '\\':
+            escape = pattern[pos + 1:pos + 2]
+            if escape in _CLASS_ESCAPES:
+                return None
+            if escape == 'x':
+                value, pos = int(pattern[pos + 2:pos + 4], 16), pos + 4
+            else:
+                value, pos = ord(escape), pos + 2
+        elif char == '-' and previous is not None and pattern[pos + 1:pos + 2] not in (']', ''):
+            following = pattern[pos + 1]
+            if following == '\\':
+                if pattern[pos + 2:pos + 3] != 'x':
+                    return None
+                end, pos = int(pattern[pos + 3:pos + 5], 16), pos + 5
+            else:
+                end, pos = ord(following), pos + 2
+            values.update(range(previous, end + 1))
+            previous = None
+            continue
+        else:
+            value, pos = ord(char), pos + 1
+        values.add(value)
+        previous = value
+    if pos >= len(pattern):
+        return None
+    return values, pos + 1
+
+class SignatureDatabase:
+    """
+    Service probes and banner match rules, loaded from service_probes.json.
+
+    Rules are compiled once at load time and bucketed by the first byte a
+    matching banner can start with (see first_bytes). Each of the 256 buckets
+    already holds its own rules merged with the rules that could start with
+    anything, in database order, so matching a banner costs one list lookup
+    and only the regexes that could possibly match are run. Rules are tried
+    in file order, so specific rules must come before generic ones.
+    """
+    def __init__(self, probes: List[Probe], rules: List[MatchRule], first: Dict[int, Optional[Set[int]]]):
+        self.probes = probes
+        self.rules = rules
+        generic = [rule for rule in rules if first[rule.index] is None]
+        self._buckets: List[List[MatchRule]] = []
+        for byte in range(256):
+            bucket = [rule for rule in rules if first[rule.index] is not None and byte in first[rule.index]]
+            self._buckets.append(sorted(bucket + generic, key=lambda rule: rule.index))
+        self._port_probes: Dict[int, List[Probe]] = {}
+
+    @classmethod
+    def load(cls, path: str = DATABASE_PATH) -> "SignatureDatabase":
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+
+        probes = []
+        for entry in data['probes']:
+            payload = bytes.fromhex(entry['payload_hex']) if 'payload_hex' in entry else entry['payload'].encode('latin-1')
+            ports = None if entry.get('ports', '*') == '*' else PortSpec.parse(entry['ports'])
+            probes.append(Probe(entry['name'], payload, ports))
+
+        rules, first = [], {}
+        for index, entry in enumerate(data['matches']):
+            try:
+                rule = MatchRule(index, entry)
+            except (re.error, KeyError) as e:
+                logger.warning(f"Skipping bad match rule #{index} ({entry.get('pattern')!r}): {e}")
+                continue
+            rules.append(rule)
+            first[index] = first_bytes(entry['pattern'], 'i' in entry.get('flags', ''))
+        return cls(probes, rules, first)
+
+    def candidates(self, banner: bytes) -> List[MatchRule]:
+        """The rules that could match `banner`, in priority order."""
+        return self._buckets[banner[0]] if banner else []
+
+    def match(self, banner: bytes, probe: str = '') -> Optional[ServiceMatch]:
+        for rule in self.candidates(banner):
+            found = rule.match(banner, probe)
+            if found:
+                return found
+        return None
+
+    def probes_for(self, port: int) -> List[Probe]:
+        """
+        Probes in the order to try them on `port`: the ones registered for
+        that port first (their payload goes out at once), then waiting for
+        the service to speak first (NULL), then the generic probes.
+        """
+        order = self._port_probes.get(port)
+        if order is None:
+            specific = [p for p in self.probes if p.ports is not None and port in p.ports]
+            generic = [p for p in self.probes if p.ports is None]
+            order = specific + generic
+            if len(self._port_probes) < 65536:
+                self._port_probes[port] = order
+        return order
+
+_database: Optional[SignatureDatabase] = None
+
+def signature_database() -> SignatureDatabase:
+    """The shared database, loaded on first use."""
+    global _database
+    if _database is None:
+        _database = SignatureDatabase.load()
+    return _database
@@ -0,0 +1,202 @@
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    target TEXT NOT NULL,
+    ports TEXT NOT NULL,
+    scan_type TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL,
+    state TEXT NOT NULL DEFAULT 'running'
+);
+CREATE TABLE IF NOT EXISTS results (
+    scan_id INTEGER NOT NULL REFERENCES scans(id),
+    ip TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    service TEXT,
+    banner TEXT,
+    PRIMARY KEY (scan_id, ip, port)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_results_ip_port ON results (ip, port, scan_id);
+"""
+
+class ScanRecorder:
+    """
+    Records one scan's findings into the store as they arrive.
+
+    Rows and banner updates are buffered and written with executemany() in a
+    single transaction every FLUSH_ROWS rows or FLUSH_INTERVAL seconds, so the
+    per-finding cost is a list append. Safe to call from several threads (the
+    scan loop and the banner stage).
+    """
+    FLUSH_ROWS = 1000
+    FLUSH_INTERVAL = 1.0
+
+    def __init__(self, store: "ResultStore", scan_id: int):
+        self.store = store
+        self.scan_id = scan_id
+        self.count = 0
+        self._rows: List[Tuple] = []
+        self._banners: List[Tuple] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def add(self, result: Dict):
+        """Adds one finding (the scanner's result_callback)."""
+        with self._lock:
+            self._rows.append((self.scan_id, result['ip'], result['port'], result['status'], result['service'], result.get('banner')))
+            self.count += 1
+            self._maybe_flush()
+
+    def update_banner(self, result: Dict):
+        """Stores a banner (and identified service) that arrived after its finding (the scanner's banner_callback)."""
+        with self._lock:
+            self._banners.append((result['banner'], result['service'], self.scan_id, result['ip'], result['port']))
+            self._maybe_flush()
+
+    def close(self, state: str = 'complete'):
+        """Writes out the buffers and marks the scan `state` ('complete' or 'interrupted')."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._flush()
+            self.store.finish_scan(self.scan_id, state)
+
+    def _maybe_flush(self):
+        if len(self._rows) + len(self._banners) >= self.FLUSH_ROWS or time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._rows and not self._banners:
+            return
+        with self.store.transaction() as db:
+            # Rows first: a banner update may refer to a row buffered alongside it
+            db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)", self._rows)
+            db.executemany("UPDATE results SET banner = ?, service = ? WHERE scan_id = ? AND ip = ? AND port = ?", self._banners)
+        self._rows, self._banners = [], []
+
+class ResultStore:
+    """
+    Local SQLite database of every recorded scan and its findings.
+
+    Results are keyed by (scan_id, ip, port), which is what diffing two scans
+    joins on, and indexed by (ip, port, scan_id) for a host's history across
+    scans. Only OPEN/FILTERED findings are stored (what the scanner reports),
+    so a port missing from a scan means it was not found open there.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        # WAL lets history/diff queries read while a scan is being recorded
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.RLock()
+
+    def close(self):
+        self._db.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Serialises writers on the shared connection; commits on success, rolls back on error."""
+        with self._lock:
+            try:
+                yield self._db
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+
+    # --- Recording ---
+
+    def begin_scan(self, target: str, ports: str, scan_type: str) -> ScanRecorder:
+        with self.transaction() as db:
+            cursor = db.execute(
+                "INSERT INTO scans (target, ports, scan_type, started) VALUES (?, ?, ?, ?)",
+                (target, ports, scan_type, time.time())
+            )
+        return ScanRecorder(self, cursor.lastrowid)
+
+    def finish_scan(self, scan_id: int, state: str):
+        with self.transaction() as db:
+            db.execute("UPDATE scans SET finished = ?, state = ? WHERE id = ?", (time.time(), state, scan_id))
+
+    # --- Queries ---
+
+    def scans(self, limit: int = 20) -> List[sqlite3.Row]:
+        """Most recent scans first, with their count of OPEN findings."""
+        return self._query(
+            "SELECT s.*, (SELECT COUNT(*) FROM results r WHERE r.scan_id = s.id AND r.status = 'OPEN') AS open_ports "
+            "FROM scans s ORDER BY s.id DESC LIMIT ?", (limit,)
+        )
+
+    def scan(self, scan_id: int) -> Optional[sqlite3.Row]:
+        rows = self._query("SELECT * FROM scans WHERE id = ?", (scan_id,))
+        return rows[0] if rows else None
+
+    def previous_scan(self, scan_id: int) -> Optional[sqlite3.Row]:
+        """The latest earlier scan of the same target, ports and scan type."""
+        rows = self._query(
+            "SELECT p.* FROM scans s JOIN scans p ON p.target = s.target AND p.ports = s.ports AND p.scan_type = s.scan_type "
+            "WHERE s.id = ? AND p.id < s.id ORDER BY p.id DESC LIMIT 1", (scan_id,)
+        )
+        return rows[0] if rows else None
+
+    def matching_scan(self, target: Optional[str], ports: Optional[str], scan_type: Optional[str]) -> Optional[sqlite3.Row]:
+        """The latest completed scan of the given target, ports and scan type."""
+        rows = self._query(
+            "SELECT * FROM scans WHERE target = ? AND ports = ? AND scan_type = ? AND state = 'complete' "
+            "ORDER BY id DESC LIMIT 1", (target, ports, scan_type)
+        )
+        return rows[0] if rows else None
+
+    def results(self, scan_id: int) -> List[sqlite3.Row]:
+        return self._query("SELECT ip, port, status, service, banner FROM results WHERE scan_id = ?", (scan_id,))
+
+    def latest_scan(self) -> Optional[sqlite3.Row]:
+        rows = self._query("SELECT * FROM scans ORDER BY id DESC LIMIT 1")
+        return rows[0] if rows else None
+
+    def host_history(self, ip: str) -> List[sqlite3.Row]:
+        """Every recorded finding for a host, by port and then oldest scan first."""
+        return self._query(
+            "SELECT r.*, s.started FROM results r JOIN scans s ON s.id = r.scan_id "
+            "WHERE r.ip = ? ORDER BY r.port, r.scan_id", (ip,)
+        )
+
+    def diff(self, old_id: int, new_id: int) -> Dict[str, List[sqlite3.Row]]:
+        """
+        What changed between two scans:
+          opened  - OPEN in the new scan but not in the old one,
+          closed  - OPEN in the old scan but not in the new one,
+          banners - OPEN in both, with a different banner (old_banner / banner).
+        """
+        appeared = (
+            "SELECT n.ip, n.port, n.service, n.banner FROM results n "
+            "LEFT JOIN results o ON o.scan_id = ? AND o.ip = n.ip AND o.port = n.port AND o.status = 'OPEN' "
+            "WHERE n.scan_id = ? AND n.status = 'OPEN' AND o.ip IS NULL ORDER BY n.ip, n.port"
+        )
+        return {
+            'opened': self._query(appeared, (old_id, new_id)),
+            'closed': self._query(appeared, (new_id, old_id)),
+            'banners': self._query(
+                "SELECT n.ip, n.port, n.service, o.banner AS old_banner, n.banner FROM results n "
+                "JOIN results o ON o.scan_id = ? AND o.ip = n.ip AND o.port = n.port AND o.status = 'OPEN' "
+                "WHERE n.scan_id = ? AND n.status = 'OPEN' AND o.banner IS NOT n.banner ORDER BY n.ip, n.port",
+                (old_id, new_id)
+            ),
+        }
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
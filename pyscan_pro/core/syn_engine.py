@@ -0,0 +1,347 @@
+import os
+import queue
+import random
+import select
+import socket
+import struct
+import hashlib
+import heapq
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.timing import RttEstimator, AimdRateLimiter
+from utils.helpers import address_family
+
+logger = logging.getLogger("PyScanPro.SYNEngine")
+
+TCP_FLAG_SYN = 0x02
+TCP_FLAG_RST = 0x04
+TCP_FLAG_ACK = 0x10
+
+def checksum(data: bytes) -> int:
+    """Standard Internet (ones' complement) checksum, RFC 1071."""
+    if len(data) % 2:
+        data += b'\x00'
+    return _fold(sum(struct.unpack(f'!{len(data) // 2}H', data)))
+
+def _fold(total: int) -> int:
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+def syn_cookie(secret: bytes, ip: bytes, port: int) -> int:
+    """
+    Derives the initial sequence number for a probe from (ip, port).
+
+    The target echoes it back as ack - 1 in its SYN-ACK or RST, so replies can
+    be matched to probes statelessly, and spoofed/stray packets are rejected.
+    """
+    digest = hashlib.blake2s(ip + port.to_bytes(2, 'big'), key=secret, digest_size=4).digest()
+    return int.from_bytes(digest, 'big')
+
+class SynTemplate:
+    """
+    Pre-built IPv4 + TCP SYN packet for one source address (see SynTemplate6 for IPv6).
+
+    Every constant field is laid out once and its contribution to both
+    checksums is summed up front; per probe only the destination address,
+    destination port and sequence number are patched in and the two checksums
+    are finished incrementally.
+    """
+    IP_LEN = 20
+    TCP_LEN = 24 # 20 byte header + MSS option
+
+    def __init__(self, src_ip: str, src_port: int, window: int = 1024, mss: int = 1460, ttl: int = 64):
+        self.src = socket.inet_aton(src_ip)
+        self.src_port = src_port
+        total_len = self.IP_LEN + self.TCP_LEN
+
+        ip_header = struct.pack(
+            '!BBHHHBBH4s4s',
+            0x45, 0, total_len, 0, 0, ttl, socket.IPPROTO_TCP, 0, self.src, b'\x00' * 4
+        )
+        tcp_header = _syn_header(src_port, window, mss)
+
+        self.template = bytearray(ip_header + tcp_header)
+        # Partial sums with every per-probe field still zero
+        self._ip_sum = sum(struct.unpack('!10H', ip_header))
+        # Pseudo header minus the destination address
+        pseudo = self.src + struct.pack('!BBH', 0, socket.IPPROTO_TCP, self.TCP_LEN)
+        self._tcp_sum = sum(struct.unpack('!4H', pseudo)) + sum(struct.unpack('!12H', tcp_header))
+
+    def build(self, dst: bytes, dst_port: int, seq: int) -> bytes:
+        """Returns a finished SYN packet for (dst, dst_port) with the given sequence number."""
+        pkt = self.template[:]
+        dst_hi, dst_lo = struct.unpack('!HH', dst)
+        dst_sum = dst_hi + dst_lo
+
+        pkt[16:20] = dst
+        struct.pack_into('!H', pkt, 10, _fold(self._ip_sum + dst_sum))
+
+        struct.pack_into('!HI', pkt, 22, dst_port, seq)
+        tcp_sum = self._tcp_sum + dst_sum + dst_port + (seq >> 16) + (seq & 0xFFFF)
+        struct.pack_into('!H', pkt, 36, _fold(tcp_sum))
+        return bytes(pkt)
+
+class SynTemplate6:
+    """
+    IPv6 counterpart of SynTemplate. Raw IPv6 sockets have no IP_HDRINCL, so
+    the kernel writes the IPv6 header and the template is only the TCP
+    segment; its checksum covers the IPv6 pseudo header and is finished
+    incrementally the same way.
+    """
+    TCP_LEN = 24
+
+    def __init__(self, src_ip: str, src_port: int, window: int = 1024, mss: int = 1440):
+        self.src = socket.inet_pton(socket.AF_INET6, src_ip)
+        self.src_port = src_port
+        tcp_header = _syn_header(src_port, window, mss)
+        self.template = bytearray(tcp_header)
+        # Pseudo header minus the destination address
+        pseudo = self.src + struct.pack('!I3xB', self.TCP_LEN, socket.IPPROTO_TCP)
+        self._tcp_sum = sum(struct.unpack('!12H', pseudo)) + sum(struct.unpack('!12H', tcp_header))
+
+    def build(self, dst: bytes, dst_port: int, seq: int) -> bytes:
+        """Returns a finished SYN segment for (dst, dst_port) with the given sequence number."""
+        pkt = self.template[:]
+        struct.pack_into('!HI', pkt, 2, dst_port, seq)
+        tcp_sum = self._tcp_sum + sum(struct.unpack('!8H', dst)) + dst_port + (seq >> 16) + (seq & 0xFFFF)
+        struct.pack_into('!H', pkt, 16, _fold(tcp_sum))
+        return bytes(pkt)
+
+def _syn_header(src_port: int, window: int, mss: int) -> bytes:
+    """TCP SYN header with a zero destination port, sequence number and checksum, plus an MSS option."""
+    return struct.pack(
+        '!HHIIBBHHH',
+        src_port, 0, 0, 0, (SynTemplate.TCP_LEN // 4) << 4, TCP_FLAG_SYN, window, 0, 0
+    ) + struct.pack('!BBH', 2, 4, mss) # MSS option
+
+def parse_reply(packet: bytes, src_port: int, secret: bytes) -> Optional[Tuple[str, int, str]]:
+    """
+    Parses a raw IPv4 packet as received on a SOCK_RAW/IPPROTO_TCP socket.
+    Returns (ip, port, status) if it answers one of our probes, otherwise None.
+    """
+    if len(packet) < 20 or packet[0] >> 4 != 4 or packet[9] != socket.IPPROTO_TCP:
+        return None
+    ihl = (packet[0] & 0x0F) * 4
+    if len(packet) < ihl + 20:
+        return None
+
+    sport, dport, _seq, ack = struct.unpack_from('!HHII', packet, ihl)
+    flags = packet[ihl + 13]
+    if dport != src_port or not flags & TCP_FLAG_ACK:
+        return None
+
+    src = packet[12:16]
+    if (ack - 1) & 0xFFFFFFFF != syn_cookie(secret, src, sport):
+        return None
+
+    return _classify(socket.inet_ntoa(src), sport, flags)
+
+def parse_reply6(segment: bytes, src_ip: str, src_port: int, secret: bytes) -> Optional[Tuple[str, int, str]]:
+    """
+    IPv6 counterpart of parse_reply. Raw IPv6 sockets deliver the bare TCP
+    segment, so the source address comes from recvfrom() instead.
+    """
+    if len(segment) < 20:
+        return None
+    sport, dport, _seq, ack = struct.unpack_from('!HHII', segment)
+    flags = segment[13]
+    if dport != src_port or not flags & TCP_FLAG_ACK:
+        return None
+
+    src_ip = src_ip.split('%', 1)[0] # Drop a link-local scope id
+    if (ack - 1) & 0xFFFFFFFF != syn_cookie(secret, socket.inet_pton(socket.AF_INET6, src_ip), sport):
+        return None
+    return _classify(src_ip, sport, flags)
+
+def _classify(ip: str, port: int, flags: int) -> Optional[Tuple[str, int, str]]:
+    if flags & TCP_FLAG_RST:
+        return ip, port, 'CLOSED'
+    if flags & TCP_FLAG_SYN:
+        return ip, port, 'OPEN'
+    return None
+
+@lru_cache(maxsize=1024)
+def source_address_for(dst_ip: str) -> str:
+    """Asks the routing table which local address would be used to reach dst_ip."""
+    with socket.socket(address_family(dst_ip), socket.SOCK_DGRAM) as s:
+        s.connect((dst_ip, 9))
+        return s.getsockname()[0]
+
+def open_raw_socket(family: int = socket.AF_INET) -> socket.socket:
+    """
+    Opens a raw socket used for both sending and sniffing. IPv4 sockets carry
+    our own IP header; for IPv6 the kernel adds it.
+    Raises PermissionError when the process lacks CAP_NET_RAW / admin rights.
+    """
+    s = socket.socket(family, socket.SOCK_RAW, socket.IPPROTO_TCP)
+    if family == socket.AF_INET:
+        s.setsockopt(socket.IPPROTO_IP, socket.IP_HDRINCL, 1)
+    # Replies arrive in bursts as fast as we can send; a small receive buffer drops them
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    return s
+
+class RawSynEngine:
+    """
+    Batched half-open scanner.
+
+    One sender writes SYNs built from per-source templates as fast as the
+    outstanding window allows, and a single receiver thread sniffs every
+    inbound TCP segment, matching SYN-ACK/RST replies back to their probe via
+    the sequence cookie. Probes that are not answered within `timeout` are
+    retransmitted up to `retries` times before being reported as FILTERED.
+
+    When given an RttEstimator, per-host timeouts replace the fixed `timeout`,
+    and an AimdRateLimiter paces sends and learns from retransmits.
+    """
+    def __init__(
+        self,
+        timeout: float = 1.0,
+        retries: int = 1,
+        window: int = 4096,
+        batch_size: int = 64,
+        rtt: Optional[RttEstimator] = None,
+        rate_limiter: Optional[AimdRateLimiter] = None
+    ):
+        self.timeout = timeout
+        self.rtt = rtt
+        self.rate_limiter = rate_limiter
+        self.retries = retries
+        self.window = window
+        self.batch_size = batch_size
+        self.secret = os.urandom(16)
+        self.src_port = random.randint(40000, 60000)
+        self._templates = {}
+        self._sock: Optional[socket.socket] = None
+        self._sock6: Optional[socket.socket] = None
+        self._replies: "queue.Queue[Tuple[str, int, str]]" = queue.Queue()
+        self._stop = threading.Event()
+
+    def scan(self, probes: Iterator[Tuple[str, int]]) -> Iterator[Tuple[str, int, str, int]]:
+        """
+        Sends every probe and returns an iterator of (ip, port, status, attempts)
+        that yields each one as it resolves (attempts counts the SYNs sent). Raises PermissionError immediately
+        (before any probe is consumed) if raw sockets are not available.
+        """
+        self._sock = open_raw_socket()
+        try:
+            self._sock6 = open_raw_socket(socket.AF_INET6)
+        except OSError as e:
+            # IPv6 probes then go unanswered and end up FILTERED
+            logger.warning(f"No raw IPv6 socket ({e}); IPv6 targets cannot be SYN scanned.")
+            self._sock6 = None
+        return self._scan(probes)
+
+    def _scan(self, probes):
+        self._stop.clear()
+        receiver = threading.Thread(target=self._receive_loop, name="syn-receiver", daemon=True)
+        receiver.start()
+
+        # (ip, port) -> [sent_at, attempts], plus a heap of retransmit deadlines.
+        # Heap entries whose attempt count no longer matches are stale and skipped.
+        outstanding: Dict[Tuple[str, int], list] = {}
+        deadlines: List[Tuple[float, Tuple[str, int], int]] = []
+        exhausted = False
+        try:
+            while outstanding or not exhausted:
+                # Fill the window with a batch of fresh probes
+                sent = 0
+                while not exhausted and sent < self.batch_size and len(outstanding) < self.window:
+                    probe = next(probes, None)
+                    if probe is None:
+                        exhausted = True
+                        break
+                    self._transmit(probe, 1, outstanding, deadlines)
+                    sent += 1
+
+                # Hand back everything the receiver has matched so far. With
+                # nothing left to send, block briefly instead of spinning.
+                wait = 0.01 if exhausted or len(outstanding) >= self.window else 0
+                while True:
+                    try:
+                        ip, port, status = self._replies.get(timeout=wait) if wait else self._replies.get_nowait()
+                    except queue.Empty:
+                        break
+                    wait = 0
+                    entry = outstanding.pop((ip, port), None)
+                    if entry is not None:
+                        # Only unambiguous (first attempt) replies are RTT samples
+                        if entry[1] == 1 and self.rtt:
+                            self.rtt.observe(ip, time.monotonic() - entry[0])
+                        if self.rate_limiter:
+                            self.rate_limiter.record(dropped=False)
+                        yield ip, port, status, entry[1]
+
+                # Retransmit or give up on probes whose deadline passed
+                now = time.monotonic()
+                while deadlines and deadlines[0][0] <= now:
+                    _, probe, attempts = heapq.heappop(deadlines)
+                    entry = outstanding.get(probe)
+                    if entry is None or entry[1] != attempts:
+                        continue
+                    if self.rate_limiter:
+                        self.rate_limiter.record(dropped=True)
+                    if attempts > self.retries:
+                        del outstanding[probe]
+                        yield probe[0], probe[1], 'FILTERED', attempts
+                    else:
+                        self._transmit(probe, attempts + 1, outstanding, deadlines)
+        finally:
+            self._stop.set()
+            receiver.join(timeout=1.0)
+            self._sock.close()
+            if self._sock6:
+                self._sock6.close()
+
+    def _transmit(self, probe, attempt, outstanding, deadlines):
+        ip = probe[0]
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        self._send(*probe)
+        now = time.monotonic()
+        timeout = self.rtt.timeout_for(ip) if self.rtt else self.timeout
+        outstanding[probe] = [now, attempt]
+        heapq.heappush(deadlines, (now + timeout, probe, attempt))
+
+    def _send(self, ip: str, port: int):
+        try:
+            v6 = ':' in ip
+            sock = self._sock6 if v6 else self._sock
+            if sock is None:
+                return
+            dst = socket.inet_pton(socket.AF_INET6, ip) if v6 else socket.inet_aton(ip)
+            src_ip = source_address_for(ip)
+            template = self._templates.get(src_ip)
+            if template is None:
+                template = self._templates[src_ip] = (SynTemplate6 if v6 else SynTemplate)(src_ip, self.src_port)
+            sock.sendto(template.build(dst, port, syn_cookie(self.secret, dst, port)), (ip, 0))
+        except OSError as e:
+            # Unroutable or transient buffer exhaustion; the retransmit timer covers it
+            logger.debug(f"SYN send to {ip}:{port} failed: {e}")
+
+    def _receive_loop(self):
+        socks = [s for s in (self._sock, self._sock6) if s]
+        while not self._stop.is_set():
+            try:
+                readable, _, _ = select.select(socks, [], [], 0.2)
+            except (OSError, ValueError):
+                break # Socket closed
+            for s in readable:
+                # Drain everything queued on this socket before selecting again
+                while True:
+                    try:
+                        packet, addr = s.recvfrom(65535, socket.MSG_DONTWAIT)
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    except OSError:
+                        return
+                    if s is self._sock6:
+                        match = parse_reply6(packet, addr[0], self.src_port, self.secret)
+                    else:
+                        match = parse_reply(packet, self.src_port, self.secret)
+                    if match:
+                        self._replies.put(match)
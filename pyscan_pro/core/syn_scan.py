@@ -1,8 +1,13 @@
+import os
+import errno
 import socket
 import logging
 
+from core.resources import RESOURCE_ERRNOS
+from utils.helpers import address_family
+
 try:
-    from scapy.all import sr1, IP, TCP
+    from scapy.all import sr1, IP, IPv6, TCP
     SCAPY_AVAILABLE = True
 except ImportError:
     SCAPY_AVAILABLE = False
@@ -27,7 +32,7 @@ def simulate_syn_scan(ip: str, port: int, timeout: float = 2.0) -> str:
         # This is Option A from the specification.
         try:
             # Craft a TCP SYN packet
-            syn_pkt = IP(dst=ip)/TCP(dport=port, flags='S')
+            syn_pkt = (IPv6(dst=ip) if ':' in ip else IP(dst=ip))/TCP(dport=port, flags='S')
             
             # Send packet and wait for a single response
             # sr1 = Send and receive 1 packet
@@ -70,21 +75,27 @@ def _fallback_syn_scan(ip: str, port: int, timeout: float) -> str:
     complete the 3-way handshake, avoiding logs on the target system. 
     This simulation completes the handshake if the port is open but 
     tears it down immediately.
+
+    Resource errors (RESOURCE_ERRNOS: out of descriptors, buffers or local
+    ports) say nothing about the port and are raised as OSError, so the
+    caller can back off and probe again.
     """
     try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        with socket.socket(address_family(ip), socket.SOCK_STREAM) as s:
             s.settimeout(timeout)
             result = s.connect_ex((ip, port))
-            
-            if result == 0:
-                return 'OPEN'
-            elif result == 111 or result == 10061: # Connection Refused (Linux/Win)
-                return 'CLOSED'
-            elif result == 110 or result == 10060: # Connection Timed Out
-                return 'FILTERED'
-            else:
-                return 'CLOSED'
-    except socket.timeout:
+    except OSError as e:
+        if e.errno in RESOURCE_ERRNOS:
+            raise
+        # Timed out, or failed before the port could answer
         return 'FILTERED'
-    except Exception:
+
+    if result == 0:
+        return 'OPEN'
+    elif result in (errno.ECONNREFUSED, 10061): # Connection Refused (Linux/Win)
         return 'CLOSED'
+    elif result in RESOURCE_ERRNOS:
+        raise OSError(result, os.strerror(result))
+    else:
+        # Timed out, unreachable or an errno we cannot read: no answer from the port itself
+        return 'FILTERED'
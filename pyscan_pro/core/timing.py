@@ -0,0 +1,246 @@
+import math
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Timeout cap used by the 'fast' scan type
+FAST_TIMEOUT = 0.5
+
+# Floor for adaptive timeouts; even LAN hosts get this long to answer
+MIN_RTT_TIMEOUT = 0.1
+
+# Send rate (packets/sec) of the rate limiter's first window, which measures the loss the scan has uncongested
+CALIBRATION_RATE = 100.0
+
+class LatencyHistogram:
+    """
+    Probe latencies in fixed log-scale buckets, four per doubling (each about
+    19% wide) from 10 µs up to ~100 s. Recording is one increment, memory is
+    constant, and quantiles are read off the buckets to within a bucket
+    width. Not thread-safe on its own; RttEstimator records under its lock.
+    """
+    BASE = 1e-5
+    PER_DOUBLING = 4
+    BUCKETS = 96
+
+    def __init__(self):
+        self.counts: List[int] = [0] * self.BUCKETS
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        index = int(math.log2(seconds / self.BASE) * self.PER_DOUBLING) if seconds > self.BASE else 0
+        self.counts[min(index, self.BUCKETS - 1)] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def merge(self, other: "LatencyHistogram"):
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.total += other.total
+        self.sum += other.sum
+
+    def upper_bound(self, index: int) -> float:
+        """Upper edge of a bucket, in seconds."""
+        return self.BASE * 2 ** ((index + 1) / self.PER_DOUBLING)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Latency (seconds) below which a `q` fraction of samples fall, or None without samples."""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.upper_bound(index)
+        return self.upper_bound(self.BUCKETS - 1)
+
+class RttEstimator:
+    """
+    Per-host retransmission timeout estimator, after TCP's RFC 6298:
+
+        RTTVAR = 3/4 * RTTVAR + 1/4 * |SRTT - R|
+        SRTT   = 7/8 * SRTT   + 1/8 * R
+        RTO    = SRTT + 4 * RTTVAR
+
+    Samples come from probes that got an answer (SYN-ACK or RST); timeouts
+    carry no RTT information and are never sampled (Karn's algorithm). Hosts
+    without samples yet borrow the scan-wide estimate, and before any sample
+    at all the configured initial timeout is used.
+
+    Every sample also goes into a LatencyHistogram, for p50/p99 reporting.
+    """
+    MAX_HOSTS = 65536
+
+    def __init__(self, initial_timeout: float = 1.0, max_timeout: Optional[float] = None, min_timeout: float = MIN_RTT_TIMEOUT):
+        self.max_timeout = max_timeout or max(initial_timeout, min_timeout)
+        self.min_timeout = min(min_timeout, self.max_timeout)
+        self.initial_timeout = min(initial_timeout, self.max_timeout)
+        self._hosts: Dict[str, list] = {}
+        self._global: Optional[list] = None
+        self.latency = LatencyHistogram()
+        self._lock = threading.Lock()
+
+    def observe(self, ip: str, rtt: float):
+        """Feeds one measured round trip time (seconds) for a host."""
+        with self._lock:
+            self.latency.observe(rtt)
+            entry = self._hosts.get(ip)
+            if entry is None:
+                if len(self._hosts) >= self.MAX_HOSTS:
+                    # Evict the oldest host; dicts keep insertion order
+                    del self._hosts[next(iter(self._hosts))]
+                self._hosts[ip] = [rtt, rtt / 2]
+            else:
+                self._update(entry, rtt)
+
+            if self._global is None:
+                self._global = [rtt, rtt / 2]
+            else:
+                self._update(self._global, rtt)
+
+    @staticmethod
+    def _update(entry: list, rtt: float):
+        srtt, rttvar = entry
+        entry[1] = 0.75 * rttvar + 0.25 * abs(srtt - rtt)
+        entry[0] = 0.875 * srtt + 0.125 * rtt
+
+    def timeout_for(self, ip: str) -> float:
+        """Current timeout to use for a probe against `ip`."""
+        entry = self._hosts.get(ip) or self._global
+        if entry is None:
+            return self.initial_timeout
+        return self._clamp(entry[0] + 4 * entry[1])
+
+    def current_timeout(self) -> float:
+        """Scan-wide timeout estimate, for display."""
+        entry = self._global
+        if entry is None:
+            return self.initial_timeout
+        return self._clamp(entry[0] + 4 * entry[1])
+
+    def _clamp(self, value: float) -> float:
+        return min(self.max_timeout, max(self.min_timeout, value))
+
+    def stats(self) -> Dict:
+        srtt = self._global[0] if self._global else None
+        with self._lock:
+            latency = LatencyHistogram()
+            latency.merge(self.latency)
+        return {
+            'srtt_ms': round(srtt * 1000, 2) if srtt is not None else None,
+            'timeout': round(self.current_timeout(), 3),
+            'hosts_tracked': len(self._hosts),
+            **latency_stats(latency),
+        }
+
+def latency_stats(latency: LatencyHistogram) -> Dict:
+    """p50/p99 of a histogram in ms, plus the histogram itself so shards can be merged."""
+    p50, p99 = latency.quantile(0.5), latency.quantile(0.99)
+    return {
+        'p50_ms': round(p50 * 1000, 3) if p50 is not None else None,
+        'p99_ms': round(p99 * 1000, 3) if p99 is not None else None,
+        'latency': latency,
+    }
+
+class AimdRateLimiter:
+    """
+    Packets-per-second limiter with additive-increase / multiplicative-decrease.
+
+    Probes reserve evenly spaced send slots at the current rate. Every
+    `window` outcomes the drop ratio (timeouts, send errors, retransmits) is
+    checked against the scan's baseline drop ratio. Filtered ports and dead
+    hosts time out at any rate, so only drops above that baseline point at
+    congestion. When more than `drop_threshold` of the replies the baseline
+    leads us to expect go missing, the rate is cut by `backoff`; otherwise it
+    grows by a fixed step. The rate always stays within [min_rate, max_rate].
+
+    The baseline comes from a first window sent at CALIBRATION_RATE (or
+    min_rate, if higher), too slow to congest anything; the full rate starts
+    after it. From then on it moves 1/8 toward each window that did not back
+    off, and only while the rate is below the last one that hit congestion,
+    so sustained loss is never absorbed as normal.
+    """
+    def __init__(
+        self,
+        min_rate: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        window: int = 100,
+        drop_threshold: float = 0.2,
+        backoff: float = 0.5
+    ):
+        self.min_rate = min_rate or 1.0
+        self.max_rate = max(max_rate, self.min_rate) if max_rate else None
+        self.start_rate = self.max_rate or max(self.min_rate, 1000.0)
+        self.rate = min(self.start_rate, max(self.min_rate, CALIBRATION_RATE))
+        self.increase = max(1.0, self.start_rate * 0.05)
+        self.window = window
+        self.drop_threshold = drop_threshold
+        self.backoff = backoff
+
+        self.total_drops = 0
+        self.total_responses = 0
+        self._drops = 0
+        self._outcomes = 0
+        # Drop ratio the scan has when it is not congested; None until the calibration window is done
+        self._baseline: Optional[float] = None
+        # Rate at which congestion was last seen
+        self._congested_at: Optional[float] = None
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Claims the next send slot. Returns how many seconds to wait before sending."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + 1.0 / self.rate
+            return slot - now
+
+    def acquire(self):
+        """Blocking variant of reserve() for thread-based engines."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, dropped: bool):
+        """Feeds the outcome of one probe."""
+        with self._lock:
+            self._outcomes += 1
+            if dropped:
+                self._drops += 1
+                self.total_drops += 1
+            else:
+                self.total_responses += 1
+
+            if self._outcomes >= self.window:
+                self._adjust(self._drops / self._outcomes)
+                self._drops = self._outcomes = 0
+
+    def _adjust(self, ratio: float):
+        """Applies one window's drop ratio. Called with the lock held."""
+        baseline = self._baseline
+        if baseline is None:
+            # End of the calibration window
+            self._baseline = ratio
+            self.rate = self.start_rate
+            return
+        # Share of the replies the baseline expects that went missing
+        missing = (ratio - baseline) / (1.0 - baseline) if baseline < 1.0 else 0.0
+        if missing > self.drop_threshold:
+            self._congested_at = self.rate
+            self.rate = max(self.min_rate, self.rate * self.backoff)
+            return
+        if self._congested_at is None or self.rate < self._congested_at:
+            self._baseline = baseline + (ratio - baseline) / 8
+        self.rate += self.increase
+        if self.max_rate:
+            self.rate = min(self.max_rate, self.rate)
+
+    def stats(self) -> Dict:
+        outcomes = self.total_drops + self.total_responses
+        return {
+            'rate_pps': round(self.rate, 1),
+            'drop_ratio': round(self.total_drops / outcomes, 3) if outcomes else 0.0,
+        }
@@ -0,0 +1,329 @@
+import ssl
+import time
+import socket
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from core.banner import BannerStage, _connect, banner_line, identify_service
+from core.timing import LatencyHistogram
+from utils.targets import PortSpec
+
+logger = logging.getLogger("PyScanPro.TLS")
+
+# Ports sent straight to the TLS stage instead of being probed in plaintext first
+TLS_PORTS = PortSpec.parse(
+    "261,443,448,465,563,585,614,636,853,989,990,992-995,1443,2083,2087,2096,2376,"
+    "3269,4443,5061,5986,6443,6697,8443,8883,9443,10443"
+)
+# Probes sent inside the TLS connection to identify the wrapped service
+MAX_PROBES = 3
+# Parsed certificates / resumable sessions kept
+CACHE_SIZE = 4096
+
+# --- Certificate parsing ---
+#
+# The stdlib only decodes the peer certificate when it was verified, and the
+# whole point here is to look at certificates we do not trust, so the DER is
+# walked directly. Only what the results show is read: subject and issuer,
+# validity and subjectAltName.
+
+OID_COMMON_NAME = bytes.fromhex("550403")
+OID_ORGANIZATION = bytes.fromhex("55040a")
+OID_SUBJECT_ALT_NAME = bytes.fromhex("551d11")
+
+class CertificateInfo(NamedTuple):
+    fingerprint: str # SHA-256 of the DER certificate, hex
+    subject: str
+    issuer: str
+    san: List[str]
+    not_before: str
+    not_after: str
+    expired: bool
+    self_signed: bool
+
+def _read(der: bytes, pos: int) -> Tuple[int, int, int]:
+    """Reads the DER element at `pos`. Returns (tag, start of its content, end of it)."""
+    tag = der[pos]
+    length = der[pos + 1]
+    pos += 2
+    if length & 0x80:
+        size = length & 0x7f
+        length = int.from_bytes(der[pos:pos + size], 'big')
+        pos += size
+    if pos + length > len(der):
+        raise ValueError("truncated DER element")
+    return tag, pos, pos + length
+
+def _children(der: bytes, start: int, end: int) -> List[Tuple[int, int, int]]:
+    items = []
+    while start < end:
+        item = _read(der, start)
+        items.append(item)
+        start = item[2]
+    return items
+
+def _name(der: bytes, start: int, end: int) -> str:
+    """A Name as 'CN=..., O=...' (the two attributes worth showing)."""
+    parts = {}
+    for _, set_start, set_end in _children(der, start, end):
+        for _, seq_start, seq_end in _children(der, set_start, set_end):
+            (_, oid_start, oid_end), (_, value_start, value_end) = _children(der, seq_start, seq_end)[:2]
+            oid = der[oid_start:oid_end]
+            if oid in (OID_COMMON_NAME, OID_ORGANIZATION):
+                parts[oid] = der[value_start:value_end].decode('utf-8', errors='replace')
+    labels = ((OID_COMMON_NAME, 'CN'), (OID_ORGANIZATION, 'O'))
+    return ", ".join(f"{label}={parts[oid]}" for oid, label in labels if oid in parts)
+
+def _time(der: bytes, tag: int, start: int, end: int) -> datetime:
+    text = der[start:end].decode('ascii').rstrip('Z')
+    if tag == 0x17: # UTCTime: two-digit year
+        year = int(text[:2])
+        text = f"{1900 + year if year >= 50 else 2000 + year}{text[2:]}"
+    return datetime.strptime(text[:14], "%Y%m%d%H%M%S").replace(tzinfo=timezone.utc)
+
+def _subject_alt_names(der: bytes, start: int, end: int) -> List[str]:
+    names = []
+    for tag, value_start, value_end in _children(der, start, end):
+        value = der[value_start:value_end]
+        if tag == 0x82: # dNSName
+            names.append(value.decode('ascii', errors='replace'))
+        elif tag == 0x87: # iPAddress
+            family = socket.AF_INET if len(value) == 4 else socket.AF_INET6
+            names.append(socket.inet_ntop(family, value))
+    return names
+
+def parse_certificate(der: bytes) -> CertificateInfo:
+    """Reads the fields shown in results from a DER-encoded X.509 certificate."""
+    _, cert_start, cert_end = _read(der, 0)
+    _, tbs_start, tbs_end = _read(der, cert_start)
+    fields = _children(der, tbs_start, tbs_end)
+    if fields[0][0] == 0xa0: # Explicit version; absent in v1 certificates
+        fields = fields[1:]
+    # serialNumber, signature, issuer, validity, subject, subjectPublicKeyInfo, [extensions]
+    issuer = _name(der, fields[2][1], fields[2][2])
+    not_before, not_after = (_time(der, *item) for item in _children(der, fields[3][1], fields[3][2])[:2])
+    subject = _name(der, fields[4][1], fields[4][2])
+
+    san: List[str] = []
+    for tag, start, end in fields[6:]:
+        if tag != 0xa3:
+            continue
+        _, exts_start, exts_end = _read(der, start)
+        for _, ext_start, ext_end in _children(der, exts_start, exts_end):
+            parts = _children(der, ext_start, ext_end)
+            if der[parts[0][1]:parts[0][2]] == OID_SUBJECT_ALT_NAME:
+                _, value_start, _ = parts[-1] # extnValue OCTET STRING, after the optional critical flag
+                _, names_start, names_end = _read(der, value_start)
+                san = _subject_alt_names(der, names_start, names_end)
+
+    return CertificateInfo(
+        fingerprint=hashlib.sha256(der).hexdigest(),
+        subject=subject,
+        issuer=issuer,
+        san=san,
+        not_before=not_before.strftime("%Y-%m-%d"),
+        not_after=not_after.strftime("%Y-%m-%d"),
+        expired=not_after < datetime.now(timezone.utc),
+        self_signed=subject == issuer,
+    )
+
+# --- Handshakes ---
+
+class _SessionSavingSocket(ssl.SSLSocket):
+    """
+    Saves its TLS session into `session_store` on close. With TLS 1.3 the
+    resumable session (ticket) only arrives after the handshake, once data
+    has been read, so right before closing is the earliest it is usable.
+    """
+    session_store: Optional[Callable[["ssl.SSLSession"], None]] = None
+
+    def close(self):
+        if self.session_store:
+            session = self.session
+            if session is not None:
+                self.session_store(session)
+            self.session_store = None
+        super().close()
+
+class TLSMetrics:
+    """Handshake counters and timings for one scan. Thread-safe."""
+    def __init__(self):
+        self.handshakes = 0
+        self.resumed = 0
+        self.failures = 0
+        self.cache_hits = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def handshake(self, elapsed: float, resumed: bool):
+        ms = elapsed * 1000
+        with self._lock:
+            self.handshakes += 1
+            self.resumed += resumed
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def cache_hit(self):
+        with self._lock:
+            self.cache_hits += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'handshakes': self.handshakes,
+                'resumed': self.resumed,
+                'failures': self.failures,
+                'cert_cache_hits': self.cache_hits,
+                'avg_handshake_ms': round(self.total_ms / self.handshakes, 2) if self.handshakes else None,
+                'max_handshake_ms': round(self.max_ms, 2),
+            }
+
+class TLSStage(BannerStage):
+    """
+    TLS handshake and certificate collection as its own pipeline stage.
+
+    Open ports on TLS_PORTS are queued here instead of the banner stage (and
+    ports the banner stage finds answering with a TLS alert are handed over).
+    A bounded pool of `workers` threads, separate from the banner workers
+    because a handshake costs far more than a plaintext probe, handshakes
+    each port, reusing the connection that proved it open when there is one,
+    and fills in result['tls'] with the negotiated version and cipher and the
+    certificate's subject, issuer, SANs and validity. Then the service inside
+    is identified with the usual probes over TLS; their reconnects resume the
+    first handshake's session where the server allows it. A port on TLS_PORTS
+    that fails the handshake gets the plaintext probes instead.
+
+    Certificates are verified against nothing (the aim is to collect them, not
+    trust them). Parsed certificates are cached by fingerprint, so endpoints
+    sharing one (load balancers, wildcard certificates) are parsed once.
+    """
+    name = "tls"
+
+    def __init__(
+        self,
+        workers: int = 8,
+        timeout: float = 3.0,
+        max_pending: int = 1024,
+        on_banner: Optional[Callable[[Dict], None]] = None,
+        metrics: Optional[TLSMetrics] = None,
+        latency: Optional[LatencyHistogram] = None
+    ):
+        super().__init__(workers, timeout, max_pending, on_banner, latency)
+        self.metrics = metrics or TLSMetrics()
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        self.context.check_hostname = False
+        self.context.verify_mode = ssl.CERT_NONE
+        self.context.minimum_version = ssl.TLSVersion.MINIMUM_SUPPORTED
+        try:
+            # Legacy servers are worth recording too
+            self.context.set_ciphers("ALL:@SECLEVEL=0")
+        except ssl.SSLError:
+            pass
+        self.context.sslsocket_class = _SessionSavingSocket
+        self._certificates: "OrderedDict[str, CertificateInfo]" = OrderedDict()
+        self._sessions: "OrderedDict[Tuple[str, int], ssl.SSLSession]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def handshake(self, ip: str, port: int, sock: Optional[socket.socket] = None) -> ssl.SSLSocket:
+        """
+        Opens a TLS connection to ip:port over `sock` (or a new TCP connection),
+        resuming a saved session for that endpoint when there is one.
+        """
+        key = (ip, port)
+        sock = sock or _connect(ip, port, self.timeout)
+        sock.settimeout(self.timeout)
+        with self._cache_lock:
+            session = self._sessions.get(key)
+        started = time.perf_counter()
+        try:
+            tls = self.context.wrap_socket(sock, do_handshake_on_connect=False, session=session)
+        except (OSError, ValueError):
+            sock.close()
+            self.metrics.failure()
+            raise
+        try:
+            tls.do_handshake()
+        except (OSError, ValueError):
+            tls.close()
+            self.metrics.failure()
+            raise
+        tls.session_store = lambda saved: self._remember(self._sessions, key, saved)
+        self.metrics.handshake(time.perf_counter() - started, tls.session_reused)
+        return tls
+
+    def certificate(self, der: bytes) -> CertificateInfo:
+        """Parses a DER certificate, or returns the cached result for its fingerprint."""
+        fingerprint = hashlib.sha256(der).hexdigest()
+        with self._cache_lock:
+            info = self._certificates.get(fingerprint)
+        if info is not None:
+            self.metrics.cache_hit()
+            return info
+        info = parse_certificate(der)
+        self._remember(self._certificates, fingerprint, info)
+        return info
+
+    def _remember(self, cache: OrderedDict, key, value):
+        with self._cache_lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            if len(cache) > CACHE_SIZE:
+                cache.popitem(last=False)
+
+    def _process(self, result: Dict, sock: Optional[socket.socket]):
+        ip, port = result['ip'], result['port']
+        try:
+            tls = self.handshake(ip, port, sock)
+        except (OSError, ValueError) as e:
+            logger.debug(f"TLS handshake with {ip}:{port} failed: {e}")
+            if port in TLS_PORTS:
+                # Queued here on its port number alone, so it never got a plaintext probe
+                super()._process(result, None)
+            return
+
+        cipher, protocol, bits = tls.cipher()
+        der = tls.getpeercert(binary_form=True)
+        details = {'version': protocol, 'cipher': cipher, 'bits': bits}
+        if der:
+            try:
+                details.update(self.certificate(der)._asdict())
+            except (IndexError, ValueError) as e:
+                # DER this parser cannot walk: keep the handshake's findings and the fingerprint
+                logger.debug(f"Unparsed certificate from {ip}:{port}: {e}")
+                details['fingerprint'] = hashlib.sha256(der).hexdigest()
+                details['cert_unparsed'] = True
+        result['tls'] = details
+
+        # Identify what runs inside: the first probe reuses this connection, later ones resume its session
+        response, match = identify_service(
+            ip, port, timeout=self.timeout, sock=tls, max_probes=MAX_PROBES,
+            connect=lambda: self.handshake(ip, port), null_wait=self._null_wait(ip)
+        )
+        service = match.service if match else (result['service'] if result['service'] not in ('Unknown', 'TLS') else None)
+        result['service'] = f"SSL/{service}" if service else "SSL"
+        if match and match.describe():
+            result['version'] = match.describe()
+        banner = banner_line(response) if response else None
+        result['banner'] = banner or describe(details)
+        if self.on_banner:
+            self.on_banner(result)
+
+def describe(details: Dict) -> str:
+    """One-line summary of result['tls'], used as the banner when the service says nothing."""
+    parts = [details['version'], details['cipher']]
+    if details.get('subject'):
+        parts.append(details['subject'])
+    if details.get('cert_unparsed'):
+        parts.append("certificate unparsed")
+    if details.get('not_after'):
+        parts.append(f"expires {details['not_after']}" + (" (EXPIRED)" if details['expired'] else ""))
+    return " | ".join(parts)
@@ -0,0 +1,233 @@
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.metrics import merge_snapshots
+from core.timing import LatencyHistogram, latency_stats
+from utils.targets import TargetSpec, PortSpec
+
+logger = logging.getLogger("PyScanPro.Workers")
+
+# Minimum interval between progress messages a shard sends to the parent
+PROGRESS_INTERVAL = 0.1
+# Interval between metrics snapshots a shard sends to the parent
+METRICS_INTERVAL = 1.0
+
+def _shard_main(config: Dict, shard: Tuple[int, int], targets: TargetSpec, ports: PortSpec, scan_type: str, events, stop_event):
+    """
+    Entry point of a shard process: runs an ordinary single-process Scanner over
+    its slice of the target x port space and forwards everything to the parent.
+    """
+    from core.scanner import Scanner # Imported here; core.scanner imports this module
+
+    index = shard[0]
+    scanner = Scanner(**config, shard=shard)
+    def watch_stop():
+        # Poll rather than stop_event.wait(): a process that exits while blocked
+        # in wait() leaves the parent's set() waiting on it forever.
+        while not stop_event.is_set():
+            time.sleep(0.2)
+        scanner.stop_scan()
+    threading.Thread(target=watch_stop, daemon=True).start()
+
+    last_sent = [0.0, 0.0]
+    def progress(current, total, status):
+        now = time.monotonic()
+        if status != "Scanning..." or now - last_sent[0] >= PROGRESS_INTERVAL or current >= total:
+            last_sent[0] = now
+            events.put(('progress', index, current, total, status, scanner.live_stats()))
+        if now - last_sent[1] >= METRICS_INTERVAL:
+            last_sent[1] = now
+            events.put(('metrics', index, scanner.local_metrics()))
+
+    try:
+        scanner.start_scan(
+            targets, ports, scan_type, progress,
+            lambda result: events.put(('result', index, result)),
+            lambda result: events.put(('banner', index, result))
+        )
+    finally:
+        events.put(('metrics', index, scanner.local_metrics()))
+        events.put(('done', index, scanner.stats()))
+
+class ShardedScan:
+    """
+    Runs one scan across N worker processes.
+
+    Each process gets a deterministic shard (see utils.helpers.select_shard) and
+    runs its own engine, so result handling, callbacks and packet parsing are no
+    longer serialised on a single GIL. The parent merges the shards' progress
+    and result streams into one feed, delivered on the calling thread just like
+    a single-process scan.
+    """
+    def __init__(self, scanner, workers: int):
+        self.scanner = scanner
+        self.workers = workers
+        self.shard_stats: List[Dict] = []
+        self._progress: Dict[int, Tuple[int, int]] = {}
+        self._live: Dict[int, Dict] = {}
+        self._metrics: Dict[int, Dict] = {}
+
+    def completed(self) -> int:
+        return sum(c for c, _ in self._progress.values())
+
+    def total(self) -> int:
+        return sum(t for _, t in self._progress.values())
+
+    def live_stats(self) -> Dict:
+        """Sum of the shards' live counters (see Scanner.live_stats), as of their last progress message."""
+        shards = list(self._live.values())
+        merged = {key: sum(s[key] for s in shards) for key in ('issued', 'open', 'filtered', 'closed')}
+        merged['timeout'] = max((s['timeout'] for s in shards), default=self.scanner.timeout)
+        return merged
+
+    def metrics(self) -> Dict:
+        """Sum of the shards' metrics (see Scanner.metrics_snapshot), as of their last report."""
+        return merge_snapshots(list(self._metrics.values()))
+
+    def run(
+        self,
+        targets: TargetSpec,
+        ports: PortSpec,
+        scan_type: str,
+        progress_callback: Callable[[int, int, str], None],
+        result_callback: Callable[[Dict], None],
+        banner_callback: Optional[Callable[[Dict], None]] = None
+    ):
+        # spawn rather than fork: the parent may be a threaded GUI process
+        ctx = multiprocessing.get_context("spawn")
+        events = ctx.Queue()
+        stop_event = ctx.Event()
+        config = self._shard_config()
+
+        processes = [
+            ctx.Process(
+                target=_shard_main,
+                args=(config, (i, self.workers), targets, ports, scan_type, events, stop_event),
+                name=f"pyscan-shard-{i}",
+                daemon=True
+            )
+            for i in range(self.workers)
+        ]
+        for p in processes:
+            p.start()
+
+        progress = self._progress = {i: (0, 0) for i in range(self.workers)}
+        self._live = {}
+        self._metrics = {}
+        open_results: Dict[Tuple[str, int], Dict] = {}
+        finished = set()
+        self.shard_stats = []
+
+        try:
+            while len(finished) < self.workers:
+                if not self.scanner.is_running:
+                    stop_event.set()
+                try:
+                    message = events.get(timeout=0.1)
+                except queue.Empty:
+                    for i, p in enumerate(processes):
+                        if i not in finished and not p.is_alive():
+                            logger.error(f"Shard {i} exited unexpectedly (exit code {p.exitcode})")
+                            finished.add(i)
+                    continue
+
+                kind, index = message[0], message[1]
+                if kind == 'progress':
+                    _, _, current, total, status, live = message
+                    progress[index] = (current, total)
+                    self._live[index] = live
+                    if status in ("Scan Complete", "Invalid Target.", "Invalid Port Range.", "No live hosts found."):
+                        status = "Scanning..." # Only the merged scan completes
+                    progress_callback(self.completed(), self.total(), status)
+                elif kind == 'result':
+                    result = message[2]
+                    if result['status'] == 'OPEN':
+                        open_results[(result['ip'], result['port'])] = result
+                    result_callback(result)
+                elif kind == 'banner':
+                    # Fill the banner (and identified service) into the dict the caller already received
+                    update = message[2]
+                    result = open_results.get((update['ip'], update['port']))
+                    if result is not None:
+                        result.update(update)
+                        if banner_callback:
+                            banner_callback(result)
+                elif kind == 'metrics':
+                    self._metrics[index] = message[2]
+                elif kind == 'done':
+                    finished.add(index)
+                    self.shard_stats.append(message[2])
+        finally:
+            stop_event.set()
+            for p in processes:
+                p.join(timeout=2.0)
+                if p.is_alive():
+                    p.terminate()
+
+    def _shard_config(self) -> Dict:
+        """Scanner settings for each shard. Rate bounds are global, so they are split evenly."""
+        s = self.scanner
+        return {
+            'threads': s.threads,
+            'timeout': s.timeout,
+            'engine': s.engine,
+            'concurrency': s.concurrency,
+            'min_rate': s.min_rate / self.workers if s.min_rate else None,
+            'max_rate': s.max_rate / self.workers if s.max_rate else None,
+            'max_rtt_timeout': s.max_rtt_timeout,
+            'banner_workers': s.banner_workers,
+            'reuse_connections': s.reuse_connections,
+            'discovery': False, # Shards get the hosts that already passed discovery
+            'journal_path': s.journal_path,
+            'exclude': s.exclude,
+            'exclude_ports': s.exclude_ports,
+            'randomize': s.randomize,
+            'seed': s.seed,
+            'incremental': s.incremental,
+            'tls': s.tls,
+            'tls_workers': s.tls_workers,
+            'retries': s.retries,
+        }
+
+def _hosts_tracked(shard_stats: List[Dict]) -> int:
+    """Host shards track disjoint hosts; port-block shards all track the same ones."""
+    tracked = [s['hosts_tracked'] for s in shard_stats]
+    if any(s.get('shard_by') == 'port' for s in shard_stats):
+        return max(tracked, default=0)
+    return sum(tracked)
+
+def merge_stats(shard_stats: List[Dict]) -> Dict:
+    """Combines the per-shard Scanner.stats() dicts into one summary."""
+    srtts = [s['srtt_ms'] for s in shard_stats if s.get('srtt_ms') is not None]
+    merged = {
+        'srtt_ms': round(sum(srtts) / len(srtts), 2) if srtts else None,
+        'timeout': max((s['timeout'] for s in shard_stats), default=0.0),
+        'hosts_tracked': _hosts_tracked(shard_stats),
+    }
+    latency = LatencyHistogram()
+    for s in shard_stats:
+        latency.merge(s['latency'])
+    merged.update(latency_stats(latency))
+    rated = [s for s in shard_stats if 'rate_pps' in s]
+    if rated:
+        merged['rate_pps'] = round(sum(s['rate_pps'] for s in rated), 1)
+        merged['drop_ratio'] = round(sum(s['drop_ratio'] for s in rated) / len(rated), 3)
+    retries = [s['retries'] for s in shard_stats if 'retries' in s]
+    if retries:
+        merged['retries'] = {key: sum(r[key] for r in retries) for key in ('probes', 'answered')}
+    tls = [s['tls'] for s in shard_stats if 'tls' in s]
+    if tls:
+        handshakes = sum(t['handshakes'] for t in tls)
+        merged['tls'] = {
+            'handshakes': handshakes,
+            'resumed': sum(t['resumed'] for t in tls),
+            'failures': sum(t['failures'] for t in tls),
+            'cert_cache_hits': sum(t['cert_cache_hits'] for t in tls),
+            'avg_handshake_ms': round(sum(t['avg_handshake_ms'] * t['handshakes'] for t in tls if t['handshakes']) / handshakes, 2) if handshakes else None,
+            'max_handshake_ms': max(t['max_handshake_ms'] for t in tls),
+        }
+    return merged
@@ -1,44 +1,171 @@
 import customtkinter as ctk
 
-class CTkScrollableTable(ctk.CTkScrollableFrame):
+from gui.table_model import ResultTableModel, STATUS
+
+STATUS_COLORS = {"OPEN": "#2ecc71", "FILTERED": "#f39c12", "CLOSED": "#e74c3c"}
+DEFAULT_COLOR = "#e0e0e0"
+
+class CTkVirtualTable(ctk.CTkFrame):
     """
-    A simple custom table implementation using CTkScrollableFrame.
-    CustomTkinter doesn't have a built-in Treeview/Table yet, 
-    so we build one grid-based for a premium modern look.
+    A virtualised results table.
+
+    CustomTkinter doesn't have a built-in Treeview/Table yet, and one widget
+    per cell does not scale past a few thousand rows. Here the rows live in a
+    ResultTableModel and only a fixed pool of labels, just enough to fill the
+    visible area, is ever created; scrolling, sorting and filtering simply
+    re-label that pool, so 100k results cost the same Tk work as 20.
+    Click a header to sort by it (click again to reverse).
     """
+    ROW_HEIGHT = 26
+    # Longest text rendered in a cell (banners can be long)
+    MAX_CELL_CHARS = 30
+
     def __init__(self, master, columns, **kwargs):
         super().__init__(master, **kwargs)
         self.columns = columns
-        self.rows = []
-        
-        # Configure grid columns to weigh equally conceptually, but fixed weights
+        self.model = ResultTableModel()
+        self.top = 0 # View position of the first visible row
+        self._pool = [] # One list of cell labels per visible row
+        self._shown = [] # Last (text, color) rendered in each pool cell
+        self._render_pending = False
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        # Header
+        self.header = ctk.CTkFrame(self, fg_color="transparent")
+        self.header.grid(row=0, column=0, sticky="ew")
+        self._headers = []
         for i, col in enumerate(self.columns):
-            self.grid_columnconfigure(i, weight=1)
-            # Create Header
-            header = ctk.CTkLabel(self, text=col, font=("Roboto", 14, "bold"), text_color="#1f6aa5")
-            header.grid(row=0, column=i, padx=5, pady=(5, 10), sticky="w")
-            
+            self.header.grid_columnconfigure(i, weight=1, uniform="col")
+            label = ctk.CTkLabel(self.header, text=col, font=("Roboto", 14, "bold"), text_color="#1f6aa5", anchor="w", cursor="hand2")
+            label.grid(row=0, column=i, padx=5, pady=(5, 10), sticky="w")
+            label.bind("<Button-1>", lambda _e, c=i: self.toggle_sort(c))
+            self._headers.append(label)
+
+        # Body: the label pool, sized to the frame's height
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=1, column=0, sticky="nsew")
+        for i in range(len(self.columns)):
+            self.body.grid_columnconfigure(i, weight=1, uniform="col")
+        self.body.bind("<Configure>", self._on_resize)
+        self._bind_wheel(self.body)
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, rowspan=2, sticky="ns")
+
+    # --- Data ---
+
+    def insert_rows(self, rows):
+        """Appends a batch of rows; returns their indices (for update_cell)."""
+        indices = self.model.append(rows)
+        self.refresh()
+        return indices
+
     def insert_row(self, values):
-        """Inserts a new row into the table."""
-        row_index = len(self.rows) + 1
-        current_row = []
-        
-        for i, val in enumerate(values):
-            color = "#e0e0e0"
-            if i == 2: # Status column
-                if val == "OPEN": color = "#2ecc71"
-                elif val == "FILTERED": color = "#f39c12"
-                elif val == "CLOSED": color = "#e74c3c"
-                
-            cell = ctk.CTkLabel(self, text=str(val), font=("Roboto", 13), text_color=color, anchor="w")
-            cell.grid(row=row_index, column=i, padx=5, pady=2, sticky="w")
-            current_row.append(cell)
-            
-        self.rows.append(current_row)
+        """Inserts a new row into the table and returns its index."""
+        return self.insert_rows([values])[0]
+
+    def update_cell(self, row, column, value):
+        """Updates a single cell of an existing row (e.g. a late-arriving banner)."""
+        if row < len(self.model.rows):
+            self.model.update(row, column, value)
+            self.refresh()
 
     def clear(self):
         """Clears all rows except the header."""
-        for row in self.rows:
-            for cell in row:
+        self.model.clear()
+        self.top = 0
+        self.refresh()
+
+    def set_filter(self, status=None, text=""):
+        """Shows only rows with the given status (None for all) matching `text` (see ResultTableModel)."""
+        self.model.set_filter(status, text)
+        self.top = 0
+        self.refresh()
+
+    def toggle_sort(self, column):
+        descending = self.model.sort_column == column and not self.model.descending
+        self.model.sort_by(column, descending)
+        for i, label in enumerate(self._headers):
+            arrow = (" ▼" if descending else " ▲") if i == column else ""
+            label.configure(text=self.columns[i] + arrow)
+        self.refresh()
+
+    # --- Rendering ---
+
+    def refresh(self):
+        """Schedules one redraw; any number of calls before it runs cost a single render."""
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _render(self):
+        self._render_pending = False
+        total = len(self.model)
+        visible = len(self._pool)
+        self.top = max(0, min(self.top, total - visible))
+
+        for i, cells in enumerate(self._pool):
+            position = self.top + i
+            values = self.model.view_row(position) if position < total else None
+            for c, cell in enumerate(cells):
+                if values is None:
+                    shown = ("", DEFAULT_COLOR)
+                else:
+                    text = str(values[c])[:self.MAX_CELL_CHARS]
+                    shown = (text, STATUS_COLORS.get(values[c], DEFAULT_COLOR) if c == STATUS else DEFAULT_COLOR)
+                # Configuring a CTkLabel is the expensive part; skip unchanged cells
+                if self._shown[i][c] != shown:
+                    self._shown[i][c] = shown
+                    cell.configure(text=shown[0], text_color=shown[1])
+
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_resize(self, event):
+        rows = max(1, event.height // self.ROW_HEIGHT)
+        while len(self._pool) < rows:
+            r = len(self._pool)
+            cells = []
+            for c in range(len(self.columns)):
+                cell = ctk.CTkLabel(self.body, text="", font=("Roboto", 13), text_color=DEFAULT_COLOR, anchor="w", height=self.ROW_HEIGHT - 4)
+                cell.grid(row=r, column=c, padx=5, pady=2, sticky="w")
+                self._bind_wheel(cell)
+                cells.append(cell)
+            self._pool.append(cells)
+            self._shown.append([("", DEFAULT_COLOR)] * len(self.columns))
+        while len(self._pool) > rows:
+            for cell in self._pool.pop():
                 cell.destroy()
-        self.rows.clear()
+            self._shown.pop()
+        self.refresh()
+
+    # --- Scrolling ---
+
+    def scroll_to(self, top):
+        self.top = int(top)
+        self.refresh()
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.scroll_to(float(args[0]) * len(self.model))
+        elif action == "scroll":
+            step = len(self._pool) if args[1] == "pages" else 1
+            self.scroll_to(self.top + int(args[0]) * step)
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4:
+            delta = -3
+        elif getattr(event, "num", None) == 5:
+            delta = 3
+        else:
+            delta = -3 if event.delta > 0 else 3
+        self.scroll_to(self.top + delta)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel) # Windows / macOS
+        widget.bind("<Button-4>", self._on_wheel) # X11
+        widget.bind("<Button-5>", self._on_wheel)
@@ -1,25 +1,31 @@
 import customtkinter as ctk
 import threading
 import time
-from gui.components import CTkScrollableTable
+from gui.components import CTkVirtualTable
+from gui.update_channel import UpdateChannel
 from core.scanner import Scanner
 from core.reporter import Reporter
 from tkinter import messagebox
 
 class PyScanDashboard(ctk.CTkFrame):
+    # Scanner updates are applied to the widgets at most this often (~30 Hz)
+    FRAME_MS = 33
+    
     def __init__(self, master, **kwargs):
         super().__init__(master, **kwargs)
         
         self.scanner = Scanner(threads=150)
         self.scan_results = []
+        self.result_rows = {} # (ip, port) -> table row, for late banner updates
         self.start_time = 0
+        self.updates = UpdateChannel()
         
         self.setup_ui()
         
     def setup_ui(self):
         # Configure layout
         self.grid_columnconfigure(0, weight=1)
-        self.grid_rowconfigure(2, weight=1) # The table weight
+        self.grid_rowconfigure(3, weight=1) # The table weight
         
         # --- TOP HEADER PANEL ---
         self.header_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -61,13 +67,32 @@ class PyScanDashboard(ctk.CTkFrame):
         self.btn_stop = ctk.CTkButton(self.controls_frame, text="Stop", command=self.stop_scan, fg_color="#e74c3c", hover_color="#c0392b", state="disabled")
         self.btn_stop.grid(row=0, column=4, padx=10, pady=15)
         
+        # --- FILTER PANEL ---
+        self.filter_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.filter_frame.grid(row=2, column=0, padx=20, pady=(0, 10), sticky="ew")
+        self.filter_frame.grid_columnconfigure(1, weight=1)
+        
+        self.status_filter_var = ctk.StringVar(value="ALL")
+        self.status_filter_menu = ctk.CTkOptionMenu(
+            self.filter_frame,
+            values=["ALL", "OPEN", "FILTERED"],
+            variable=self.status_filter_var,
+            command=lambda _value: self.apply_filter(),
+            width=120
+        )
+        self.status_filter_menu.grid(row=0, column=0, padx=(0, 10))
+        
+        self.filter_entry = ctk.CTkEntry(self.filter_frame, placeholder_text="Filter by port (443, 1-1024), service or IP")
+        self.filter_entry.grid(row=0, column=1, sticky="ew")
+        self.filter_entry.bind("<KeyRelease>", lambda _event: self.apply_filter())
+        
         # --- RESULTS TABLE PANEL ---
-        self.table = CTkScrollableTable(self, columns=["IP", "PORT", "STATUS", "SERVICE", "BANNER"])
-        self.table.grid(row=2, column=0, padx=20, pady=(0, 20), sticky="nsew")
+        self.table = CTkVirtualTable(self, columns=["IP", "PORT", "STATUS", "SERVICE", "BANNER"])
+        self.table.grid(row=3, column=0, padx=20, pady=(0, 20), sticky="nsew")
         
         # --- BOTTOM STATUS PANEL ---
         self.status_frame = ctk.CTkFrame(self, fg_color="transparent")
-        self.status_frame.grid(row=3, column=0, padx=20, pady=(0, 20), sticky="ew")
+        self.status_frame.grid(row=4, column=0, padx=20, pady=(0, 20), sticky="ew")
         self.status_frame.grid_columnconfigure(0, weight=1)
         
         self.progress_bar = ctk.CTkProgressBar(self.status_frame)
@@ -92,22 +117,27 @@ class PyScanDashboard(ctk.CTkFrame):
         # Reset UI
         self.table.clear()
         self.scan_results.clear()
+        self.result_rows.clear()
         self.progress_bar.set(0)
         self.btn_start.configure(state="disabled")
         self.btn_stop.configure(state="normal")
         self.start_time = time.time()
         self.update_timer()
         
-        # Start thread
-        threading.Thread(target=self.scanner.start_scan, args=(
-            target, ports, scan_type, self._update_progress, self._add_result
-        ), daemon=True).start()
+        # The scanner thread only posts to the channel; the GUI thread drains it every frame
+        self.updates = UpdateChannel()
+        threading.Thread(target=self._run_scan, args=(self.updates, target, ports, scan_type), daemon=True).start()
+        self.after(self.FRAME_MS, self._drain_updates, self.updates)
         
     def stop_scan(self):
         self.scanner.stop_scan()
         self.status_label.configure(text="Stopping scan...")
         self.btn_stop.configure(state="disabled")
         
+    def apply_filter(self):
+        status = self.status_filter_var.get()
+        self.table.set_filter(None if status == "ALL" else status, self.filter_entry.get())
+        
     def export_report(self):
         if not self.scan_results:
             messagebox.showinfo("Export", "No results to export.")
@@ -118,21 +148,46 @@ class PyScanDashboard(ctk.CTkFrame):
         filepath = reporter.generate()
         messagebox.showinfo("Export Success", f"Report saved at:\n{filepath}")
 
-    def _update_progress(self, current, total, status_text):
-        if total > 0:
-            progress = current / total
-            # Safely update GUI from thread
-            self.after(0, self.progress_bar.set, progress)
-            self.after(0, self.status_label.configure, text=f"{status_text} | {current}/{total} Ports")
+    def _run_scan(self, updates: UpdateChannel, target, ports, scan_type):
+        # Runs on the scan thread: no widget may be touched from here
+        try:
+            self.scanner.start_scan(target, ports, scan_type, updates.post_progress, updates.post_result, updates.post_banner)
+        finally:
+            updates.finish()
             
-        if current >= total or not self.scanner.is_running:
-            self.after(0, self.btn_start.configure, state="normal")
-            self.after(0, self.btn_stop.configure, state="disabled")
+    def _drain_updates(self, updates: UpdateChannel):
+        """Applies everything the scanner posted since the last frame, then reschedules itself."""
+        if updates is not self.updates:
+            return # A newer scan owns the widgets now
+        batch = updates.drain()
+        
+        if batch.results:
+            rows = []
+            for result in batch.results:
+                self.result_rows[(result['ip'], result['port'])] = len(self.scan_results)
+                self.scan_results.append(result)
+                rows.append([result['ip'], result['port'], result['status'], result['service'], result.get('banner', 'N/A')])
+            self.table.insert_rows(rows)
             
-    def _add_result(self, result: dict):
-        self.scan_results.append(result)
-        row_data = [result['ip'], result['port'], result['status'], result['service'], result.get('banner', 'N/A')[:30]]
-        self.after(0, self.table.insert_row, row_data)
+        for result in batch.banners:
+            row = self.result_rows.get((result['ip'], result['port']))
+            if row is not None:
+                self.table.update_cell(row, 3, result['service'])
+                self.table.update_cell(row, 4, result['banner'])
+                
+        if batch.progress:
+            current, total, status_text = batch.progress
+            if total > 0:
+                self.progress_bar.set(current / total)
+                self.status_label.configure(text=f"{status_text} | {current}/{total} Ports")
+            else:
+                self.status_label.configure(text=status_text)
+                
+        if batch.finished:
+            self.btn_start.configure(state="normal")
+            self.btn_stop.configure(state="disabled")
+        else:
+            self.after(self.FRAME_MS, self._drain_updates, updates)
         
     def update_timer(self):
         if self.scanner.is_running:
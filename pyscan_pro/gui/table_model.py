@@ -0,0 +1,121 @@
+import socket
+from bisect import bisect_left, insort
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# Column layout shared with the dashboard
+IP, PORT, STATUS, SERVICE, BANNER = range(5)
+
+def _ip_key(ip: str) -> Tuple[int, bytes]:
+    """Sorts addresses numerically, IPv4 before IPv6."""
+    try:
+        if ':' in ip:
+            return 6, socket.inet_pton(socket.AF_INET6, ip)
+        return 4, socket.inet_aton(ip)
+    except OSError:
+        return 9, ip.encode()
+
+class ResultTableModel:
+    """
+    Rows behind the virtualised results table, kept free of any Tk code.
+
+    `rows` holds every result in arrival order (a row's index never changes,
+    so callers can keep it to update a cell later). `view` holds a sort key
+    for each row passing the current filter, always in order and always
+    ending in the row index. Small batches are placed by binary insertion and
+    large ones merged in a single pass, so appending never re-sorts 100k rows.
+    """
+    MERGE_BATCH = 256
+
+    def __init__(self):
+        self.rows: List[list] = []
+        self.view: List[tuple] = []
+        self.sort_column: Optional[int] = None
+        self.descending = False
+        self.status_filter: Optional[str] = None
+        self.text_filter = ""
+        self._port_range: Optional[Tuple[int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    def view_row(self, position: int) -> list:
+        """Row at `position` of the filtered, sorted view."""
+        if self.descending:
+            position = len(self.view) - 1 - position
+        return self.rows[self.view[position][-1]]
+
+    def append(self, batch: Iterable[Sequence]) -> List[int]:
+        """Adds rows and returns their indices."""
+        start = len(self.rows)
+        self.rows.extend(list(values) for values in batch)
+        indices = range(start, len(self.rows))
+        keys = [self._key(i) for i in indices if self._matches(self.rows[i])]
+
+        if self.sort_column is None:
+            self.view.extend(keys) # New indices sort last already
+        elif len(keys) > self.MERGE_BATCH:
+            # Two sorted runs: Timsort merges them in linear time
+            self.view.extend(sorted(keys))
+            self.view.sort()
+        else:
+            for key in keys:
+                insort(self.view, key)
+        return list(indices)
+
+    def update(self, index: int, column: int, value):
+        """Changes one cell, moving the row within the view only if it has to."""
+        row = self.rows[index]
+        was_visible = self._matches(row)
+        old_key = self._key(index)
+        row[column] = value
+        visible = self._matches(row)
+
+        if was_visible == visible and column != self.sort_column:
+            return # Position unchanged
+        if was_visible:
+            del self.view[bisect_left(self.view, old_key)]
+        if visible:
+            insort(self.view, self._key(index))
+
+    def clear(self):
+        self.rows.clear()
+        self.view.clear()
+
+    def sort_by(self, column: Optional[int], descending: bool = False):
+        self.sort_column = column
+        self.descending = descending
+        self.view = sorted(self._key(key[-1]) for key in self.view)
+
+    def set_filter(self, status: Optional[str] = None, text: str = ""):
+        """
+        Filters by status (None for all) and free text: a port ('443'), a port
+        range ('1-1024'), or else a case-insensitive substring of the service or IP.
+        """
+        self.status_filter = status
+        self.text_filter = text.strip().lower()
+        self._port_range = None
+        low, dash, high = self.text_filter.partition('-')
+        if low.isdigit() and (not dash or high.isdigit()):
+            self._port_range = (int(low), int(high) if dash else int(low))
+
+        self.view = sorted(self._key(i) for i, row in enumerate(self.rows) if self._matches(row))
+
+    def _matches(self, row: list) -> bool:
+        if self.status_filter and row[STATUS] != self.status_filter:
+            return False
+        if not self.text_filter:
+            return True
+        if self._port_range:
+            return self._port_range[0] <= row[PORT] <= self._port_range[1]
+        return self.text_filter in str(row[SERVICE]).lower() or self.text_filter in row[IP]
+
+    def _key(self, index: int) -> tuple:
+        if self.sort_column is None:
+            return (index,)
+        value = self.rows[index][self.sort_column]
+        if self.sort_column == IP:
+            value = _ip_key(value)
+        elif isinstance(value, str):
+            value = value.lower()
+        # The row index breaks ties, so sorts are stable and every key is unique
+        return value, index
@@ -0,0 +1,61 @@
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+class Progress(NamedTuple):
+    current: int
+    total: int
+    status: str
+
+class UpdateBatch(NamedTuple):
+    progress: Optional[Progress]
+    results: List[Dict]
+    banners: List[Dict]
+    finished: bool
+
+class UpdateChannel:
+    """
+    Thread-safe hand-off from the scanner threads to the GUI thread.
+
+    Scanner callbacks only append to (or overwrite) plain Python state under a
+    lock, which is cheap at any probe rate; the GUI drains everything once per
+    frame. Progress is coalesced, since only the latest value is ever shown,
+    while results and banner updates are queued and handed over as batches.
+    Nothing in here touches Tk. Use one channel per scan, so a scan thread
+    that is still winding down cannot leak into the next one.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._progress: Optional[Progress] = None
+        self._results: List[Dict] = []
+        self._banners: List[Dict] = []
+        self._finished = False
+
+    # --- Producer side (any thread) ---
+
+    def post_progress(self, current: int, total: int, status: str):
+        with self._lock:
+            self._progress = Progress(current, total, status)
+
+    def post_result(self, result: Dict):
+        with self._lock:
+            self._results.append(result)
+
+    def post_banner(self, result: Dict):
+        with self._lock:
+            self._banners.append(result)
+
+    def finish(self):
+        """Marks the scan as over; the next drain reports `finished` once everything before it is delivered."""
+        with self._lock:
+            self._finished = True
+
+    # --- Consumer side (GUI thread) ---
+
+    def drain(self) -> UpdateBatch:
+        """Takes everything posted since the last drain."""
+        with self._lock:
+            batch = UpdateBatch(self._progress, self._results, self._banners, self._finished)
+            self._progress = None
+            self._results = []
+            self._banners = []
+        return batch
@@ -1,9 +1,16 @@
 import argparse
 import sys
 import time
+import random
 from gui.app import run_gui
 from core.scanner import Scanner
 from core.reporter import Reporter
+from core.progress import ProgressRenderer
+from core.metrics import MetricsExporter
+from core.store import ResultStore
+from core.incremental import IncrementalPlan, load_previous
+from core.resolver import top_ports
+from utils.targets import TargetSpec, PortSpec, TargetStream
 from utils.logger import main_logger
 import os
 
@@ -20,14 +27,84 @@ def display_banner():
     """
     print(banner)
 
+def _when(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+def query_store(store: ResultStore, args):
+    """Answers --history / --host / --diff from the results database."""
+    if args.history:
+        print(f"{'ID':<6} | {'STARTED':<19} | {'STATE':<11} | {'OPEN':<6} | {'TYPE':<4} | TARGET / PORTS")
+        print("="*80)
+        for s in store.scans(args.history):
+            print(f"{s['id']:<6} | {_when(s['started']):<19} | {s['state']:<11} | {s['open_ports']:<6} | {s['scan_type']:<4} | {s['target']} / {s['ports']}")
+
+    if args.host:
+        print(f"{'PORT':<8} | {'SCAN':<6} | {'STARTED':<19} | {'STATUS':<10} | {'SERVICE':<15} | {'BANNER'}")
+        print("="*80)
+        for r in store.host_history(args.host):
+            print(f"{r['port']:<8} | {r['scan_id']:<6} | {_when(r['started']):<19} | {r['status']:<10} | {r['service']:<15} | {r['banner']}")
+
+    if args.diff is not None:
+        if args.diff:
+            old, new = store.scan(args.diff[0]), store.scan(args.diff[1])
+        else:
+            # Latest scan against the previous run of the same target, ports and type
+            new = store.latest_scan()
+            old = store.previous_scan(new['id']) if new else None
+        if not old or not new:
+            print("Error: nothing to compare (need two recorded scans, or two valid scan IDs).")
+            sys.exit(1)
+
+        print(f"[*] Scan {old['id']} ({_when(old['started'])}) -> scan {new['id']} ({_when(new['started'])})")
+        print_changes(store.diff(old['id'], new['id']))
+
+def print_changes(changes):
+    """Prints opened (+), closed (-) and changed-banner (~) ports, as from ResultStore.diff()."""
+    for r in changes['opened']:
+        print(f"+ {r['ip']}:{r['port']:<6} {r['service']:<15} {r['banner']}")
+    for r in changes['closed']:
+        print(f"- {r['ip']}:{r['port']:<6} {r['service']}")
+    for r in changes['banners']:
+        print(f"~ {r['ip']}:{r['port']:<6} {r['service']:<15} {r['old_banner']} -> {r['banner']}")
+    print(f"[*] {len(changes['opened'])} opened, {len(changes['closed'])} closed, {len(changes['banners'])} banner changes")
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="PyScan Pro - Advanced Port Scanner")
-    parser.add_argument('target', nargs='?', help="Target IP, Domain, or CIDR (e.g. 192.168.1.1, example.com)")
-    parser.add_argument('-p', '--ports', default='1-1000', help="Ports to scan (e.g. 80,443 or 1-1000)")
+    parser.add_argument('target', nargs='?', help="Target IP, Domain, range or CIDR, comma-separated (e.g. 192.168.1.1, example.com, 10.0.0.1-10.0.0.50)")
+    parser.add_argument('-iL', '--input-list', metavar='FILE', help="Read targets (IPs, ranges, CIDRs, hostnames) from a file, one or more per line; scanned along with any TARGET")
+    parser.add_argument('--ipv6-hints', metavar='FILE', help="Known IPv6 addresses; large IPv6 prefixes are scanned only at the hinted addresses inside them")
+    parser.add_argument('-p', '--ports', help="Ports to scan (e.g. 80,443 or 1-1000; default: 1-1000)")
+    parser.add_argument('--top-ports', type=int, metavar='N', help="Scan the N most frequently open ports, most frequent first, N up to 100 (--scan fast defaults to 100)")
+    parser.add_argument('--exclude', help="Targets to leave out, same syntax as target (e.g. 10.0.0.1,10.0.0.128/25)")
+    parser.add_argument('--exclude-ports', help="Ports to leave out (e.g. 9100,6000-6063)")
     parser.add_argument('--scan', choices=['tcp', 'syn', 'fast'], default='tcp', help="Scan type to perform")
     parser.add_argument('-t', '--threads', type=int, default=100, help="Number of threads (default: 100)")
+    parser.add_argument('--engine', choices=['thread', 'async'], default='thread', help="Scan engine (default: thread)")
+    parser.add_argument('--concurrency', type=int, default=1000, help="Max in-flight connects for the async engine (default: 1000)")
+    parser.add_argument('--min-rate', type=float, help="Never send slower than this many probes/sec")
+    parser.add_argument('--max-rate', type=float, help="Never send faster than this many probes/sec")
+    parser.add_argument('--retries', type=int, default=0, help="Re-probe unanswered ports up to N times during the sweep, doubling the timeout each time (default: 0)")
+    parser.add_argument('--max-rtt-timeout', type=float, help="Upper bound in seconds for adaptive probe timeouts")
+    parser.add_argument('--banner-workers', type=int, default=32, help="Threads dedicated to banner grabbing (default: 32)")
+    parser.add_argument('--tls', action='store_true', help="Handshake TLS ports and collect certificate subject/SANs/expiry, version and cipher")
+    parser.add_argument('--tls-workers', type=int, default=8, help="Threads dedicated to TLS handshakes (default: 8)")
+    parser.add_argument('--no-banner-reuse', action='store_true', help="Open a fresh connection for banners instead of reusing the probe's")
+    parser.add_argument('--skip-discovery', action='store_true', help="Port-scan every address without a host liveness check first")
+    parser.add_argument('--workers', type=int, default=1, help="Shard the scan across N processes (default: 1)")
+    parser.add_argument('--randomize', action='store_true', help="Probe hosts and ports in a pseudo-random order to spread load")
+    parser.add_argument('--seed', type=int, help="Seed for --randomize, to reproduce a previous order")
+    parser.add_argument('--resume', metavar='FILE', help="Checkpoint journal; re-running with the same file skips completed work")
     parser.add_argument('-g', '--gui', action='store_true', help="Launch Desktop GUI Dashboard")
-    parser.add_argument('--export', choices=['json', 'txt', 'html'], help="Export results to format")
+    parser.add_argument('--incremental', metavar='PREVIOUS', help="Rescan using a previous JSON/JSONL report or --db database: re-check its open ports, sample the rest, report what changed")
+    parser.add_argument('--sample-rate', type=float, default=0.1, help="Fraction of the remaining ip x port space an --incremental scan probes (default: 0.1)")
+    parser.add_argument('--db', metavar='FILE', help="SQLite results database; scans are recorded into it and --history/--host/--diff read from it")
+    parser.add_argument('--history', nargs='?', type=int, const=20, metavar='N', help="List the last N recorded scans (default: 20)")
+    parser.add_argument('--host', metavar='IP', help="Show every recorded finding for a host across scans")
+    parser.add_argument('--diff', nargs='*', type=int, metavar='SCAN_ID', help="Show opened/closed ports and changed banners between two scans (default: the latest scan vs the previous one of the same target)")
+    parser.add_argument('--stats-file', metavar='FILE', help="Write scan metrics (counters, latency histograms, queue depths, errno breakdown) to FILE as JSON while scanning")
+    parser.add_argument('--stats-interval', type=float, default=5.0, help="Seconds between --stats-file updates (default: 5)")
+    parser.add_argument('--metrics-port', type=int, metavar='PORT', help="Serve the same metrics in Prometheus text format on http://127.0.0.1:PORT/metrics")
+    parser.add_argument('--export', choices=['jsonl', 'json', 'txt', 'csv', 'html'], help="Export results to format; the report is written while the scan runs")
     
     args = parser.parse_args()
 
@@ -37,39 +114,144 @@ if __name__ == '__main__':
         run_gui()
         sys.exit(0)
         
-    if not args.target:
-        print("Error: Target is required for CLI scanning.")
+    if args.history or args.host or args.diff is not None:
+        if not args.db:
+            print("Error: --history, --host and --diff need --db FILE.")
+            sys.exit(1)
+        if args.diff and len(args.diff) != 2:
+            print("Error: --diff takes either no scan IDs or exactly two (OLD NEW).")
+            sys.exit(1)
+        query_store(ResultStore(args.db), args)
+        sys.exit(0)
+        
+    if not args.target and not args.input_list:
+        print("Error: Target (or -iL FILE) is required for CLI scanning.")
         parser.print_help()
         sys.exit(1)
 
     display_banner()
     
     # Run CLI Scanner
-    scanner = Scanner(threads=args.threads)
+    scanner = Scanner(
+        threads=args.threads,
+        engine=args.engine,
+        concurrency=args.concurrency,
+        min_rate=args.min_rate,
+        max_rate=args.max_rate,
+        max_rtt_timeout=args.max_rtt_timeout,
+        banner_workers=args.banner_workers,
+        reuse_connections=not args.no_banner_reuse,
+        discovery=not args.skip_discovery,
+        workers=args.workers,
+        journal_path=args.resume,
+        randomize=args.randomize,
+        seed=args.seed,
+        tls=args.tls,
+        tls_workers=args.tls_workers,
+        retries=args.retries
+    )
     results = []
     
-    def cli_progress(current, total, status):
-        # Overwrite line in terminal for progress
-        if total > 0:
-            percent = (current / total) * 100
-            sys.stdout.write(f"\r[{status}] {current}/{total} Ports scanned ({percent:.1f}%)")
-            sys.stdout.flush()
-            if current == total:
-                print() # Newline when done
-                
+    # Probes only record the latest progress; the display redraws at its own pace
+    progress = ProgressRenderer(scanner)
+    
+    report = None
+    recorder = None
+    
     def cli_result(result):
         # We append to results list, print details at end
         results.append(result)
+        if report:
+            report.add(result)
+        if recorder:
+            recorder.add(result)
+            
+    def cli_banner(result):
+        if report:
+            report.update_banner(result)
+        if recorder:
+            recorder.update_banner(result)
 
-    print(f"[*] Starting {args.scan.upper()} scan on {args.target} for ports {args.ports}...")
+    if args.top_ports is None and args.scan == 'fast' and not args.ports:
+        args.top_ports = 100
+    if args.top_ports is not None:
+        if args.ports:
+            print("Error: use either -p/--ports or --top-ports, not both.")
+            sys.exit(1)
+        try:
+            ranked = top_ports(args.top_ports)
+        except ValueError as e:
+            print(f"Error: --top-ports {args.top_ports}: {e}.")
+            sys.exit(1)
+        ports = PortSpec.ranked(ranked, f"top {args.top_ports}", args.exclude_ports)
+    else:
+        ports = PortSpec.parse(args.ports or '1-1000', args.exclude_ports)
+    if args.input_list or args.ipv6_hints:
+        try:
+            if args.input_list:
+                targets = TargetStream.from_file(args.input_list, args.exclude, hints=args.ipv6_hints, extra=args.target)
+            else:
+                targets = TargetStream([t.strip() for t in args.target.split(',') if t.strip()], args.target, args.exclude, hints=args.ipv6_hints)
+        except OSError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        scope = f"{len(targets.literals)} addresses + {len(set(targets.hostnames))} hostnames"
+        if targets.sparse:
+            scope += f" + {len(targets.sparse)} hinted IPv6 prefixes"
+    else:
+        targets = TargetSpec.parse(args.target, args.exclude)
+        scope = f"{len(targets)} hosts"
+    if args.export:
+        # Streamed as findings arrive, so an interrupted scan still leaves a usable report
+        report = Reporter(targets, args.export).open(await_banners=True)
+    if args.incremental:
+        if isinstance(targets, TargetStream):
+            targets = targets.collect() # Needed to tell which previous findings are in scope
+        try:
+            previous = load_previous(args.incremental, str(targets), str(ports), args.scan)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error: cannot read previous results from {args.incremental}: {e}")
+            sys.exit(1)
+        seed = args.seed if args.seed is not None else random.getrandbits(32)
+        scanner.incremental = IncrementalPlan(previous, args.sample_rate, seed)
+        print(f"[*] Incremental scan: {len(previous)} previous findings, sampling {args.sample_rate:.0%} of the rest (seed {seed})")
+    if args.db:
+        recorder = ResultStore(args.db).begin_scan(str(targets), str(ports), args.scan)
+    print(f"[*] Starting {args.scan.upper()} scan on {targets} ({scope}) for {len(ports)} ports ({ports})...")
     start_t = time.time()
     
+    exporter = None
+    if args.stats_file or args.metrics_port is not None:
+        try:
+            exporter = MetricsExporter(scanner.metrics_snapshot, args.stats_file, args.stats_interval, args.metrics_port).start()
+        except OSError as e:
+            print(f"Error: cannot serve metrics on port {args.metrics_port}: {e}")
+            sys.exit(1)
+    progress.start()
     try:
-        scanner.start_scan(args.target, args.ports, args.scan, cli_progress, cli_result)
+        scanner.start_scan(targets, ports, args.scan, progress.update, cli_result, cli_banner)
     except KeyboardInterrupt:
-        print("\n[!] Scan interrupted by user. Stopping threads...")
+        progress.stop()
+        print("[!] Scan interrupted by user. Stopping threads...")
         scanner.stop_scan()
+        if exporter:
+            exporter.stop()
+        if report:
+            report.close()
+            print(f"[*] Partial report saved to: {os.path.abspath(report.filepath)}")
+        if recorder:
+            recorder.close('interrupted')
+            print(f"[*] Findings so far recorded as scan {recorder.scan_id} in {args.db}")
+        if args.resume:
+            print(f"[*] Progress saved. Re-run with --resume {args.resume} to continue.")
         sys.exit(0)
+    except ValueError as e:
+        progress.stop()
+        print(f"Error: {e}")
+        sys.exit(1)
+    progress.stop()
+    if exporter:
+        exporter.stop() # Writes the final snapshot
         
     end_t = time.time()
     
@@ -82,9 +264,31 @@ if __name__ == '__main__':
         
     print("="*70)
     print(f"[*] Scan completed in {end_t - start_t:.2f} seconds.")
+    if args.randomize:
+        print(f"[*] Randomized probe order, seed {scanner.seed} (reproduce with --seed {scanner.seed})")
     print(f"[*] Total open/filtered ports found: {len(results)}")
+
+    if scanner.incremental:
+        print("[*] Changes since the previous scan:")
+        print_changes(scanner.incremental.deltas(results, lambda ip, port: ip in targets and port in ports))
+
+    stats = scanner.stats()
+    srtt = f"{stats['srtt_ms']} ms" if stats['srtt_ms'] is not None else "n/a"
+    latency = f", probe latency p50 {stats['p50_ms']} ms / p99 {stats['p99_ms']} ms" if stats['p50_ms'] is not None else ""
+    print(f"[*] Timing: SRTT {srtt}{latency}, adaptive timeout {stats['timeout']}s across {stats['hosts_tracked']} host(s)")
+    if 'rate_pps' in stats:
+        print(f"[*] Rate: {stats['rate_pps']} probes/sec at finish, drop ratio {stats['drop_ratio']:.1%}")
+    if stats.get('retries', {}).get('probes'):
+        print(f"[*] Retries: {stats['retries']['probes']} re-probes of unanswered ports, {stats['retries']['answered']} answered")
+    if 'tls' in stats:
+        tls = stats['tls']
+        avg = f"{tls['avg_handshake_ms']} ms" if tls['avg_handshake_ms'] is not None else "n/a"
+        print(f"[*] TLS: {tls['handshakes']} handshakes ({tls['resumed']} resumed, {tls['failures']} failed), "
+              f"avg {avg}, max {tls['max_handshake_ms']} ms, {tls['cert_cache_hits']} certificate cache hits")
     
-    if args.export:
-        reporter = Reporter(args.target, args.export, results)
-        path = reporter.generate()
-        print(f"[*] Report saved to: {os.path.abspath(path)}")
+    if report:
+        report.close()
+        print(f"[*] Report saved to: {os.path.abspath(report.filepath)}")
+    if recorder:
+        recorder.close()
+        print(f"[*] Recorded as scan {recorder.scan_id} in {args.db} (compare runs with --db {args.db} --diff)")
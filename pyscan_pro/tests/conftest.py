@@ -0,0 +1,60 @@
+import os
+import sys
+import socket
+import threading
+
+import pytest
+
+# Modules import each other as `core.x` / `utils.x`, relative to pyscan_pro/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class Listener:
+    """A loopback TCP server that sends `banner` to every client and holds the connection until it closes."""
+    def __init__(self, host: str = "127.0.0.1", banner: bytes = b""):
+        family = socket.AF_INET6 if ':' in host else socket.AF_INET
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.bind((host, 0))
+        self.sock.listen(128)
+        self.host, self.port = host, self.sock.getsockname()[1]
+        self.banner = banner
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket):
+        with conn:
+            try:
+                if self.banner:
+                    conn.sendall(self.banner)
+                conn.settimeout(5.0)
+                while conn.recv(4096):
+                    pass
+            except OSError:
+                pass
+
+    def close(self):
+        self.sock.close()
+
+def free_port(host: str = "127.0.0.1") -> int:
+    """A port nothing listens on (it was bound a moment ago and released)."""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    with socket.socket(family, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+@pytest.fixture
+def listener():
+    servers = []
+
+    def start(host: str = "127.0.0.1", banner: bytes = b"") -> Listener:
+        servers.append(Listener(host, banner))
+        return servers[-1]
+    yield start
+    for server in servers:
+        server.close()
@@ -0,0 +1,58 @@
+import asyncio
+import socket
+import time
+from collections import deque
+
+import pytest
+
+from conftest import free_port
+from core.async_engine import AsyncScanEngine
+from core.scanner import ProbeFeed, Scanner
+
+def test_blocking_probe_source_does_not_stall_the_loop(listener):
+    server = listener("127.0.0.1")
+    reported = []
+
+    def probes():
+        yield "127.0.0.1", server.port
+        time.sleep(2.0) # Like a TargetStream waiting on the resolver
+        yield "127.0.0.1", server.port
+
+    scanner = Scanner(timeout=1.0, engine='async')
+    scanner.is_running = True
+    started = time.monotonic()
+    engine = AsyncScanEngine(scanner, concurrency=4)
+    engine.run(ProbeFeed(probes(), deque()), 2, 'tcp', lambda *args: None,
+               lambda result: reported.append(time.monotonic() - started))
+    assert engine.completed == 2
+    # The first port is reported while the source is still blocked
+    assert reported[0] < 1.0
+
+@pytest.fixture
+def backlog_full():
+    """A loopback port whose accept queue is full, so further SYNs are silently dropped."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(0)
+    port = server.getsockname()[1]
+    queued = socket.create_connection(("127.0.0.1", port))
+    yield port
+    queued.close()
+    server.close()
+
+@pytest.mark.parametrize("selector", [True, False]) # Writability watch, or the sock_connect fallback
+def test_probe_status_mapping(listener, backlog_full, selector):
+    scanner = Scanner(timeout=1.0, engine='async', reuse_connections=False)
+    scanner.is_running = True
+    engine = AsyncScanEngine(scanner)
+    engine._selector = selector
+
+    def probe(port):
+        return asyncio.run(engine._probe("127.0.0.1", port, 0.5))
+
+    assert probe(listener("127.0.0.1").port) == ('OPEN', None, True)
+    assert probe(free_port()) == ('CLOSED', None, True) # RST
+    # No answer: connect scans report it CLOSED, but flagged unanswered (confidence 'low')
+    assert probe(backlog_full) == ('CLOSED', None, False)
+    assert scanner._collect_result("127.0.0.1", backlog_full, 'CLOSED', False)['confidence'] == 'low'
+    assert scanner.rtt.stats()['latency'].total == 2 # The handshake and the RST, not the timeout
@@ -0,0 +1,59 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from core.banner import NULL_WAIT_MIN, BannerStage, identify_service
+from core.scanner import Scanner
+
+HTTP_REPLY = b"HTTP/1.0 200 OK\r\nServer: test-httpd/1.2\r\n\r\n"
+
+@pytest.fixture
+def http_server():
+    """A loopback server that says nothing until it is sent a request."""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(16)
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            with conn:
+                try:
+                    conn.settimeout(5.0)
+                    if conn.recv(4096):
+                        conn.sendall(HTTP_REPLY)
+                except OSError:
+                    pass
+    threading.Thread(target=serve, daemon=True).start()
+    yield server.getsockname()[1]
+    server.close()
+
+@pytest.fixture
+def greeter(listener):
+    return listener("127.0.0.1", b"SSH-2.0-OpenSSH_9.6\r\n")
+
+def test_short_null_wait_on_an_unknown_port(http_server):
+    started = time.monotonic()
+    response, _ = identify_service("127.0.0.1", http_server, timeout=2.0, null_wait=0.1)
+    assert response.startswith(b"HTTP/1.0 200")
+    # The NULL probe gave up after null_wait, not the 2 s timeout
+    assert time.monotonic() - started < 1.0
+
+def test_greeting_is_still_read(greeter):
+    response, match = identify_service("127.0.0.1", greeter.port, timeout=2.0, null_wait=0.1)
+    assert response == b"SSH-2.0-OpenSSH_9.6\r\n"
+    assert match and match.service == 'SSH'
+
+def test_stage_waits_from_measured_round_trips():
+    stage = BannerStage(workers=1, timeout=1.0)
+    assert stage._null_wait("127.0.0.1") is None
+    rtt = Scanner(timeout=1.0).rtt
+    stage.rtt_timeout = rtt.timeout_for
+    assert stage._null_wait("127.0.0.1") == 1.0 # No samples yet: the whole timeout
+    rtt.observe("127.0.0.1", 0.001)
+    assert stage._null_wait("127.0.0.1") == NULL_WAIT_MIN
@@ -0,0 +1,25 @@
+import socket
+
+import pytest
+
+from utils.dns import DnsCache, resolve_host
+
+def test_a_and_aaaa_records(monkeypatch):
+    def getaddrinfo(name, port, family, type):
+        assert family == socket.AF_UNSPEC
+        return [
+            (socket.AF_INET6, socket.SOCK_STREAM, 6, '', ("2001:db8::7", 0, 0, 0)),
+            (socket.AF_INET, socket.SOCK_STREAM, 6, '', ("192.0.2.7", 0)),
+            (socket.AF_INET6, socket.SOCK_STREAM, 6, '', ("2001:db8::7", 0, 0, 0)),
+        ]
+    monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+    assert resolve_host("dual.test", DnsCache()) == ["2001:db8::7", "192.0.2.7"]
+
+def test_localhost_on_a_dual_stack_host():
+    try:
+        families = {info[0] for info in socket.getaddrinfo("localhost", None)}
+    except socket.gaierror:
+        families = set()
+    if families != {socket.AF_INET, socket.AF_INET6}:
+        pytest.skip("localhost does not resolve to both 127.0.0.1 and ::1 here")
+    assert {"127.0.0.1", "::1"} <= set(resolve_host("localhost", None))
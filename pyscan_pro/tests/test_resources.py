@@ -0,0 +1,47 @@
+import errno
+import socket
+
+import pytest
+
+import core.scanner
+import core.syn_scan
+from core.resources import ResourceExhausted
+from core.scanner import Scanner
+from core.syn_scan import _fallback_syn_scan
+
+class NoDescriptors:
+    """Stands in for the socket module, failing every socket() with EMFILE."""
+    timeout = socket.timeout
+    SOCK_STREAM = socket.SOCK_STREAM
+
+    def socket(self, *args):
+        raise OSError(errno.EMFILE, "Too many open files")
+
+def test_fallback_syn_raises_resource_errors(monkeypatch):
+    monkeypatch.setattr(core.syn_scan, 'socket', NoDescriptors())
+    with pytest.raises(OSError) as raised:
+        _fallback_syn_scan("127.0.0.1", 80, 1.0)
+    assert raised.value.errno == errno.EMFILE
+
+def test_fallback_syn_backs_off_on_resource_errors(monkeypatch, listener):
+    server = listener("127.0.0.1")
+    failures = [OSError(errno.EMFILE, "Too many open files"), OSError(errno.ENOBUFS, "No buffer space available")]
+
+    def flaky(ip, port, timeout):
+        if failures:
+            raise failures.pop(0)
+        return _fallback_syn_scan(ip, port, timeout)
+    monkeypatch.setattr(core.scanner, '_fallback_syn_scan', flaky)
+
+    scanner = Scanner(timeout=1.0)
+    scanner.is_running = True
+    result, _ = scanner._scan_task_syn_fallback("127.0.0.1", server.port)
+    assert (result['status'], result['confidence']) == ('OPEN', 'high')
+    assert scanner.local_metrics()['resource_waits'] == 2
+
+def test_fallback_syn_gives_up_when_stopped(monkeypatch):
+    monkeypatch.setattr(core.syn_scan, 'socket', NoDescriptors())
+    scanner = Scanner(timeout=1.0)
+    scanner.is_running = False # A stopping scan drops the probe instead of waiting
+    with pytest.raises(ResourceExhausted):
+        scanner._timed_probe(_fallback_syn_scan, "127.0.0.1", 80)
@@ -0,0 +1,57 @@
+from collections import deque
+
+import pytest
+
+from core.async_engine import AsyncScanEngine
+from core.scanner import RETRY_BATCH, ProbeFeed, Scanner
+from utils.targets import PortSpec
+
+def test_feed_holds_at_most_a_batch():
+    held = deque()
+    feed = ProbeFeed(iter([("10.0.0.1", port) for port in range(1, 5001)]), held)
+    probes = retries = 0
+    for probe in feed:
+        if isinstance(probe, dict):
+            retries += 1
+            continue
+        probes += 1
+        held.append({'ip': probe[0], 'port': probe[1], 'attempts': 1})
+        assert len(held) <= RETRY_BATCH
+    assert (probes, retries) == (5000, 5000)
+
+def test_feed_yields_retries_left_by_the_last_probes():
+    held = deque()
+    feed = ProbeFeed(iter([("10.0.0.1", 80)]), held)
+    assert list(feed) == [("10.0.0.1", 80)]
+    held.append({'ip': "10.0.0.1", 'port': 80, 'attempts': 1})
+    assert feed.pending()
+    assert next(feed)['port'] == 80
+    assert next(feed, None) is None
+
+@pytest.mark.parametrize("engine", ['thread', 'async'])
+def test_unanswered_probe_is_retried(monkeypatch, listener, engine):
+    server = listener("127.0.0.1")
+    silent = {server.port} # The first probe of each port goes unanswered
+
+    if engine == 'thread':
+        connect = Scanner._connect
+        def drop_once(self, ip, port, timeout=None, keep_open=False):
+            if port in silent:
+                silent.discard(port)
+                return 'FILTERED', None, False
+            return connect(self, ip, port, timeout, keep_open)
+        monkeypatch.setattr(Scanner, '_connect', drop_once)
+    else:
+        probe = AsyncScanEngine._probe
+        async def drop_once(self, ip, port, timeout):
+            if port in silent:
+                silent.discard(port)
+                return 'FILTERED', None, False
+            return await probe(self, ip, port, timeout)
+        monkeypatch.setattr(AsyncScanEngine, '_probe', drop_once)
+
+    found = []
+    scanner = Scanner(timeout=1.0, engine=engine, retries=1)
+    scanner.start_scan("127.0.0.1", PortSpec.parse(str(server.port)), 'tcp', lambda *args: None, found.append)
+    assert [(r['status'], r['attempts'], r['confidence']) for r in found] == [('OPEN', 2, 'high')]
+    assert scanner.stats()['retries'] == {'probes': 1, 'answered': 1}
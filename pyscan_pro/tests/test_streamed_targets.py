@@ -0,0 +1,28 @@
+import pytest
+
+from core.scanner import Scanner
+from utils.targets import PortSpec, TargetStream
+
+def scan(scanner: Scanner, targets, ports: PortSpec):
+    found = []
+    scanner.start_scan(targets, ports, 'tcp', lambda *args: None, found.append)
+    return found
+
+@pytest.mark.parametrize("engine,discovery", [('thread', False), ('async', False), ('thread', True), ('async', True)])
+def test_hint_only_ipv6_prefix_is_scanned(tmp_path, listener, engine, discovery):
+    server = listener("::1")
+    hints = tmp_path / "hints.txt"
+    hints.write_text("::1\n2001:db8::1\n") # The second lies outside the prefix
+    stream = TargetStream(["::/64"], "::/64", hints=str(hints))
+    assert stream.estimate() == 0 # Nothing is known before the hint file is read
+
+    scanner = Scanner(timeout=1.0, engine=engine, discovery=discovery, retries=0)
+    found = scan(scanner, stream, PortSpec.parse(str(server.port)))
+    assert [(r['ip'], r['port'], r['status']) for r in found] == [("::1", server.port, 'OPEN')]
+
+def test_list_file_and_command_line_targets_combine(tmp_path):
+    targets = tmp_path / "targets.txt"
+    targets.write_text("10.0.0.2 # gateway\n\n10.0.0.3\n")
+    stream = TargetStream.from_file(str(targets), extra="10.0.0.1")
+    assert list(stream) == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    assert str(stream) == f"10.0.0.1 -iL {targets}"
@@ -0,0 +1,65 @@
+import socket
+import struct
+
+from core.syn_engine import (
+    TCP_FLAG_ACK, TCP_FLAG_RST, TCP_FLAG_SYN, SynTemplate, SynTemplate6,
+    checksum, parse_reply, parse_reply6, syn_cookie
+)
+
+SECRET = b"0123456789abcdef"
+SRC_PORT = 40000
+
+def reply(src: str, dst: str, sport: int, dport: int, ack: int, flags: int) -> bytes:
+    """A synthetic IPv4 reply as a raw socket would deliver it."""
+    ip_header = struct.pack(
+        '!BBHHHBBH4s4s',
+        0x45, 0, 40, 0, 0, 64, socket.IPPROTO_TCP, 0, socket.inet_aton(src), socket.inet_aton(dst)
+    )
+    return ip_header + segment(sport, dport, ack, flags)
+
+def segment(sport: int, dport: int, ack: int, flags: int) -> bytes:
+    return struct.pack('!HHIIBBHHH', sport, dport, 1, ack, 5 << 4, flags, 1024, 0, 0)
+
+def test_syn_packet_checksums():
+    template = SynTemplate("192.0.2.1", SRC_PORT)
+    dst = socket.inet_aton("198.51.100.7")
+    seq = syn_cookie(SECRET, dst, 443)
+    packet = template.build(dst, 443, seq)
+
+    assert checksum(packet[:20]) == 0
+    pseudo = packet[12:20] + struct.pack('!BBH', 0, socket.IPPROTO_TCP, len(packet) - 20)
+    assert checksum(pseudo + packet[20:]) == 0
+    sport, dport, sent_seq = struct.unpack_from('!HHI', packet, 20)
+    assert (sport, dport, sent_seq) == (SRC_PORT, 443, seq)
+    assert packet[33] == TCP_FLAG_SYN
+
+def test_syn6_segment_checksum():
+    template = SynTemplate6("2001:db8::1", SRC_PORT)
+    dst = socket.inet_pton(socket.AF_INET6, "2001:db8::7")
+    packet = template.build(dst, 22, syn_cookie(SECRET, dst, 22))
+
+    pseudo = template.src + dst + struct.pack('!I3xB', len(packet), socket.IPPROTO_TCP)
+    assert checksum(pseudo + packet) == 0
+
+def test_replies_are_matched_by_cookie():
+    ip = "198.51.100.7"
+    cookie = syn_cookie(SECRET, socket.inet_aton(ip), 443)
+
+    syn_ack = reply(ip, "192.0.2.1", 443, SRC_PORT, cookie + 1, TCP_FLAG_SYN | TCP_FLAG_ACK)
+    rst = reply(ip, "192.0.2.1", 443, SRC_PORT, cookie + 1, TCP_FLAG_RST | TCP_FLAG_ACK)
+    assert parse_reply(syn_ack, SRC_PORT, SECRET) == (ip, 443, 'OPEN')
+    assert parse_reply(rst, SRC_PORT, SECRET) == (ip, 443, 'CLOSED')
+
+    # Wrong cookie, wrong port, or a packet that answers nothing of ours
+    assert parse_reply(reply(ip, "192.0.2.1", 443, SRC_PORT, cookie, TCP_FLAG_SYN | TCP_FLAG_ACK), SRC_PORT, SECRET) is None
+    assert parse_reply(reply(ip, "192.0.2.1", 80, SRC_PORT, cookie + 1, TCP_FLAG_SYN | TCP_FLAG_ACK), SRC_PORT, SECRET) is None
+    assert parse_reply(reply(ip, "192.0.2.1", 443, SRC_PORT + 1, cookie + 1, TCP_FLAG_SYN | TCP_FLAG_ACK), SRC_PORT, SECRET) is None
+    assert parse_reply(reply(ip, "192.0.2.1", 443, SRC_PORT, cookie + 1, TCP_FLAG_SYN), SRC_PORT, SECRET) is None
+
+def test_ipv6_replies_are_matched_by_cookie():
+    ip = "2001:db8::7"
+    cookie = syn_cookie(SECRET, socket.inet_pton(socket.AF_INET6, ip), 22)
+
+    assert parse_reply6(segment(22, SRC_PORT, cookie + 1, TCP_FLAG_SYN | TCP_FLAG_ACK), ip, SRC_PORT, SECRET) == (ip, 22, 'OPEN')
+    assert parse_reply6(segment(22, SRC_PORT, cookie + 1, TCP_FLAG_RST | TCP_FLAG_ACK), ip, SRC_PORT, SECRET) == (ip, 22, 'CLOSED')
+    assert parse_reply6(segment(22, SRC_PORT, cookie + 2, TCP_FLAG_SYN | TCP_FLAG_ACK), ip, SRC_PORT, SECRET) is None
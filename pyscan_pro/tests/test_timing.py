@@ -0,0 +1,52 @@
+from core.timing import CALIBRATION_RATE, AimdRateLimiter
+
+def feed(limiter: AimdRateLimiter, windows: int, drop_ratio):
+    """Feeds `windows` windows of outcomes; `drop_ratio` is a ratio or a function of the current rate."""
+    for _ in range(windows):
+        ratio = drop_ratio(limiter.rate) if callable(drop_ratio) else drop_ratio
+        drops = round(limiter.window * ratio)
+        for i in range(limiter.window):
+            limiter.record(dropped=i < drops)
+
+def bottleneck(capacity: float):
+    """A link that drops whatever is sent above `capacity` packets/sec."""
+    return lambda rate: max(0.0, 1.0 - capacity / rate)
+
+def test_first_window_calibrates_at_a_low_rate():
+    limiter = AimdRateLimiter(min_rate=10, max_rate=5000)
+    assert limiter.rate == CALIBRATION_RATE
+    feed(limiter, 1, 0.0)
+    assert limiter.rate == 5000
+
+def test_mostly_filtered_scan_keeps_its_rate():
+    limiter = AimdRateLimiter(min_rate=10, max_rate=1000)
+    feed(limiter, 50, 0.95) # 95% of ports never answer, at any rate
+    assert limiter.rate == 1000
+
+def test_loss_above_the_baseline_cuts_the_rate():
+    limiter = AimdRateLimiter(min_rate=10, max_rate=1000)
+    feed(limiter, 10, 0.9)
+    # Half the replies a 90% filtered scan still gets go missing
+    feed(limiter, 1, 0.95)
+    assert limiter.rate == 500
+
+def test_clean_scan_backs_off_on_timeouts():
+    limiter = AimdRateLimiter(min_rate=10, max_rate=1000)
+    feed(limiter, 5, 0.0)
+    feed(limiter, 1, 0.3)
+    assert limiter.rate == 500
+
+def test_congestion_from_the_first_window_keeps_the_rate_down():
+    limiter = AimdRateLimiter(min_rate=10, max_rate=5000)
+    feed(limiter, 5, bottleneck(1000))
+    rates = []
+    for _ in range(50):
+        feed(limiter, 1, bottleneck(1000))
+        rates.append(limiter.rate)
+    assert max(rates) < 2000
+
+def test_sustained_congestion_is_not_absorbed():
+    limiter = AimdRateLimiter(min_rate=10, max_rate=5000)
+    feed(limiter, 10, 0.02)
+    feed(limiter, 30, 0.4)
+    assert limiter.rate == 10
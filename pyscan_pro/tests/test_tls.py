@@ -0,0 +1,117 @@
+import shutil
+import socket
+import ssl
+import subprocess
+import threading
+
+import pytest
+
+import core.tls
+from core.scanner import Scanner
+from core.tls import TLSStage
+from utils.targets import PortSpec
+
+BANNER = b"220 test.local ESMTP ready\r\n"
+
+@pytest.fixture(scope="session")
+def certificate(tmp_path_factory):
+    """A self-signed certificate and key for CN=test.local."""
+    if not shutil.which("openssl"):
+        pytest.skip("openssl is needed to make a test certificate")
+    path = tmp_path_factory.mktemp("tls")
+    cert, key = path / "cert.pem", path / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "2",
+         "-keyout", str(key), "-out", str(cert), "-subj", "/CN=test.local/O=PyScan Tests",
+         "-addext", "subjectAltName=DNS:test.local,DNS:www.test.local"],
+        check=True, capture_output=True
+    )
+    return str(cert), str(key)
+
+class TLSListener:
+    """A loopback TLS server that sends BANNER after the handshake."""
+    def __init__(self, cert: str, key: str):
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(cert, key)
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(16)
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket):
+        try:
+            with self.context.wrap_socket(conn, server_side=True) as tls:
+                tls.sendall(BANNER)
+                tls.settimeout(5.0)
+                while tls.recv(4096):
+                    pass
+        except OSError:
+            pass
+
+    def close(self):
+        self.sock.close()
+
+@pytest.fixture
+def tls_server(certificate):
+    server = TLSListener(*certificate)
+    yield server
+    server.close()
+
+def open_result(port: int):
+    return Scanner()._collect_result("127.0.0.1", port, 'OPEN')
+
+def test_banner_and_certificate(tls_server):
+    stage = TLSStage(workers=1, timeout=2.0)
+    result = open_result(tls_server.port)
+    stage._process(result, None)
+
+    details = result['tls']
+    assert details['version'].startswith("TLSv1")
+    assert details['subject'] == details['issuer'] == "CN=test.local, O=PyScan Tests"
+    assert set(details['san']) == {"test.local", "www.test.local"}
+    assert details['self_signed'] and not details['expired']
+    assert result['banner'] == BANNER.decode().strip()
+    assert result['service'].startswith("SSL")
+
+def test_session_reuse_and_certificate_cache(tls_server):
+    stage = TLSStage(workers=1, timeout=2.0)
+    stage._process(open_result(tls_server.port), None)
+    stage._process(open_result(tls_server.port), None)
+
+    metrics = stage.metrics.snapshot()
+    assert metrics['resumed'] >= 1
+    assert metrics['cert_cache_hits'] >= 1
+    assert metrics['failures'] == 0
+
+def test_unparsable_certificate_keeps_the_banner(monkeypatch, tls_server):
+    def broken(der):
+        raise IndexError("truncated DER")
+    monkeypatch.setattr(core.tls, 'parse_certificate', broken)
+
+    stage = TLSStage(workers=1, timeout=2.0)
+    result = open_result(tls_server.port)
+    stage._process(result, None)
+
+    assert result['tls']['cert_unparsed'] and len(result['tls']['fingerprint']) == 64
+    assert result['banner'] == BANNER.decode().strip()
+
+def test_plaintext_service_on_a_tls_port(monkeypatch, listener):
+    server = listener("127.0.0.1", b"SSH-2.0-OpenSSH_9.6\r\n")
+    monkeypatch.setattr(core.tls, 'TLS_PORTS', PortSpec.parse(str(server.port)))
+
+    stage = TLSStage(workers=1, timeout=2.0)
+    result = open_result(server.port)
+    stage._process(result, None)
+
+    assert 'tls' not in result
+    assert result['banner'] == "SSH-2.0-OpenSSH_9.6"
+    assert stage.metrics.snapshot()['failures'] == 1
@@ -0,0 +1,14 @@
+import pytest
+
+from core.resolver import resolve_service, top_ports
+
+def test_top_ports_follow_the_ranking():
+    ranked = top_ports(100)
+    assert ranked[:5] == [80, 23, 443, 21, 22]
+    assert len(set(ranked)) == 100
+    assert resolve_service(ranked[0]) == "HTTP"
+
+@pytest.mark.parametrize("count", [0, 101, 1000])
+def test_top_ports_rejects_counts_the_table_cannot_serve(count):
+    with pytest.raises(ValueError):
+        top_ports(count)
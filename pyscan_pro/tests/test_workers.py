@@ -0,0 +1,37 @@
+from core.discovery import HostDiscovery
+from core.scanner import Scanner
+from core.timing import LatencyHistogram
+from core.workers import merge_stats
+from utils.targets import PortSpec, TargetSpec
+
+def shard_stats(hosts_tracked: int, shard_by: str):
+    return {'srtt_ms': 1.0, 'timeout': 1.0, 'hosts_tracked': hosts_tracked, 'latency': LatencyHistogram(), 'shard_by': shard_by}
+
+def test_host_shards_add_up_and_port_shards_overlap():
+    assert merge_stats([shard_stats(3, 'host'), shard_stats(2, 'host')])['hosts_tracked'] == 5
+    assert merge_stats([shard_stats(1, 'port'), shard_stats(1, 'port')])['hosts_tracked'] == 1
+
+def test_one_host_across_two_workers(listener):
+    server = listener("127.0.0.1")
+    scanner = Scanner(timeout=1.0, workers=2, discovery=False)
+    found = []
+    ports = PortSpec.parse(f"{server.port - 10}-{server.port + 10}")
+    scanner.start_scan(TargetSpec.parse("127.0.0.1"), ports, 'tcp', lambda *args: None, found.append)
+    assert [r['port'] for r in found] == [server.port]
+    assert scanner.stats()['hosts_tracked'] == 1
+
+def test_discovery_runs_once_before_sharding(monkeypatch, listener):
+    server = listener("127.0.0.1")
+    calls = []
+    def discover(self, hosts, total, progress_callback, is_running):
+        calls.append(list(hosts))
+        return ["127.0.0.1"] # 127.0.0.2 stays silent
+    monkeypatch.setattr(HostDiscovery, 'run', discover)
+
+    scanner = Scanner(timeout=1.0, workers=2)
+    found = []
+    ports = PortSpec.parse(f"{server.port - 10}-{server.port + 10}")
+    scanner.start_scan(TargetSpec.parse("127.0.0.1-127.0.0.2"), ports, 'tcp', lambda *args: None, found.append)
+    assert calls == [["127.0.0.1", "127.0.0.2"]]
+    assert [(r['ip'], r['port']) for r in found] == [("127.0.0.1", server.port)]
+    assert scanner.stats()['hosts_tracked'] == 1
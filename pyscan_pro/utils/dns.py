@@ -0,0 +1,95 @@
+import time
+import socket
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("PyScanPro.DNS")
+
+# getaddrinfo() does not expose record TTLs, so cached answers live this long
+DEFAULT_TTL = 300.0
+# Failed lookups are remembered for less time, so a transient failure heals quickly
+NEGATIVE_TTL = 30.0
+
+class DnsCache:
+    """Thread-safe in-process cache of hostname -> addresses, with expiry."""
+    def __init__(self, ttl: float = DEFAULT_TTL, negative_ttl: float = NEGATIVE_TTL):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: Dict[str, Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[List[str]]:
+        """Returns the cached addresses (possibly empty for a failed lookup), or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[name]
+                return None
+            return entry[1]
+
+    def put(self, name: str, addresses: List[str]):
+        ttl = self.ttl if addresses else self.negative_ttl
+        with self._lock:
+            self._entries[name] = (time.monotonic() + ttl, addresses)
+
+# Shared by every lookup in the process
+dns_cache = DnsCache()
+
+def resolve_host(name: str, cache: Optional[DnsCache] = dns_cache) -> List[str]:
+    """
+    Resolves a hostname to all of its addresses (every A and AAAA record), in
+    the resolver's order without duplicates. Returns [] if it does not resolve.
+    """
+    key = name.lower()
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    try:
+        infos = socket.getaddrinfo(name, None, socket.AF_UNSPEC, socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+    except (socket.gaierror, UnicodeError):
+        addresses = []
+
+    if cache:
+        cache.put(key, addresses)
+    return addresses
+
+class BulkResolver:
+    """
+    Resolves many hostnames concurrently on a thread pool (getaddrinfo blocks,
+    so threads rather than one lookup at a time). Answers are streamed back in
+    completion order, so callers can start using the first addresses while the
+    slow lookups are still outstanding.
+    """
+    def __init__(self, workers: int = 64, cache: Optional[DnsCache] = dns_cache):
+        self.workers = workers
+        self.cache = cache
+
+    def resolve(self, names: Iterable[str]) -> Iterator[Tuple[str, List[str]]]:
+        """
+        Submits every lookup immediately and returns an iterator of
+        (name, addresses) in completion order. Closing it cancels the lookups
+        that have not started yet.
+        """
+        names = list(dict.fromkeys(names))
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(names))), thread_name_prefix="pyscan-dns")
+        futures = {executor.submit(resolve_host, name, self.cache): name for name in names}
+        return self._completed(executor, futures)
+
+    @staticmethod
+    def _completed(executor: ThreadPoolExecutor, futures: Dict) -> Iterator[Tuple[str, List[str]]]:
+        try:
+            for future in as_completed(futures):
+                name = futures[future]
+                addresses = future.result()
+                if not addresses:
+                    logger.warning(f"Could not resolve {name}")
+                yield name, addresses
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
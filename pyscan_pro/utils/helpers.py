@@ -1,52 +1,129 @@
-import ipaddress
+import errno
 import socket
-from typing import List
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from utils.targets import TargetSpec, PortSpec
+from utils.permutation import FeistelPermutation
+
+# Connection refused (Linux/Win)
+REFUSED_ERRNOS = (errno.ECONNREFUSED, 10061)
+# ICMP host/network unreachable (Linux/Win): an answer, just not from the port itself
+UNREACHABLE_ERRNOS = (errno.EHOSTUNREACH, errno.ENETUNREACH, 10065, 10051)
+
+def address_family(ip: str) -> int:
+    """Socket address family for an IP address string."""
+    return socket.AF_INET6 if ':' in ip else socket.AF_INET
 
 def parse_target(target: str) -> List[str]:
     """
-    Parses the target string which could be a single IP, a domain, or a CIDR subnet.
+    Parses the target string which could be a single IP, a domain, a range or a CIDR subnet.
     Returns a list of IP addresses as strings to be scanned.
+    Prefer TargetSpec for large targets; it never materialises the address list.
+    """
+    return list(TargetSpec.parse(target))
+
+def port_intervals(port_range: str) -> List[Tuple[int, int]]:
+    """
+    Parses a string of ports (e.g., '80,443', '1-100', or '80').
+    Returns a sorted list of merged, inclusive (start, end) intervals.
     """
-    targets = []
-    
-    # Check if it's a CIDR network
-    if '/' in target:
-        try:
-            network = ipaddress.ip_network(target, strict=False)
-            targets = [str(ip) for ip in network.hosts()]
-        except ValueError:
-            pass # Not a valid CIDR
-            
-    # Check if it's a single IP or Domain
-    if not targets:
-        try:
-            # Resolves domain to IP if a domain is passed, otherwise validates IP
-            ip = socket.gethostbyname(target)
-            targets.append(ip)
-        except socket.gaierror:
-            pass # Could not resolve hostname
-            
-    return targets
+    return PortSpec.parse(port_range).intervals
+
+def iter_ports(intervals: Iterable[Tuple[int, int]]) -> Iterator[int]:
+    """Lazily yields every port covered by a list of port intervals."""
+    for start, end in intervals:
+        yield from range(start, end + 1)
 
 def parse_ports(port_range: str) -> List[int]:
     """
     Parses a string of ports (e.g., '80,443', '1-100', or '80').
     Returns a list of integer ports.
     """
-    ports = set()
-    parts = [p.strip() for p in port_range.split(',')]
-    
-    for part in parts:
-        if '-' in part:
-            try:
-                start, end = map(int, part.split('-'))
-                ports.update(range(start, end + 1))
-            except ValueError:
-                pass
-        else:
-            try:
-                ports.add(int(part))
-            except ValueError:
-                pass
-                
-    return sorted(list(ports))
+    return list(iter_ports(port_intervals(port_range)))
+
+def shard_port_intervals(intervals: List[Tuple[int, int]], index: int, count: int, block_size: int) -> List[Tuple[int, int]]:
+    """
+    Splits the port list into consecutive blocks of `block_size` ports and keeps
+    every `count`-th block starting at `index`.
+    """
+    selected = []
+    position = 0
+    for start, end in intervals:
+        port = start
+        while port <= end:
+            take = min(end - port + 1, block_size - position % block_size)
+            if (position // block_size) % count == index:
+                if selected and selected[-1][1] + 1 == port:
+                    selected[-1] = (selected[-1][0], port + take - 1)
+                else:
+                    selected.append((port, port + take - 1))
+            port += take
+            position += take
+    return selected
+
+class StridedHosts:
+    """
+    Every `count`-th host of an indexable host sequence starting at `index`,
+    viewed in place so a shard of a huge TargetSpec is never copied.
+    """
+    def __init__(self, hosts: Sequence[str], index: int, count: int):
+        self.hosts = hosts
+        self.index = index
+        self.count = count
+        self._len = len(range(index, len(hosts), count))
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, i: int) -> str:
+        if not 0 <= i < self._len:
+            raise IndexError(i)
+        return self.hosts[self.index + i * self.count]
+
+    def __iter__(self) -> Iterator[str]:
+        return islice(iter(self.hosts), self.index, None, self.count)
+
+def shards_by_host(host_count: int, count: int) -> bool:
+    """Whether select_shard splits host_count hosts into `count` shards by host (rather than by port block)."""
+    return host_count >= count
+
+def select_shard(hosts: Sequence[str], ports: PortSpec, index: int, count: int) -> Tuple[Sequence[str], PortSpec]:
+    """
+    Deterministically picks shard `index` of `count` from the ip x port space.
+    Shards by host (every count-th host) when there are enough hosts to go
+    around, otherwise by port block. Returns (hosts, ports).
+    """
+    if shards_by_host(len(hosts), count):
+        return StridedHosts(hosts, index, count), ports
+
+    block_size = max(1, min(256, -(-len(ports) // count)))
+    shard = PortSpec(shard_port_intervals(ports.intervals, index, count, block_size))
+    if ports.order is not None:
+        # Keep a ranked spec's probe order within the shard
+        shard = PortSpec.ranked((port for port in ports.order if port in shard), ports.text)
+    return hosts, shard
+
+def ordered_probes(hosts: Iterable[str], ports: PortSpec) -> Iterator[Tuple[str, int]]:
+    """Lazily walks the ip x port space host by host, ports in ascending (or a ranked spec's) order."""
+    for ip in hosts:
+        for port in ports:
+            yield ip, port
+
+def shuffled_probes(hosts: Sequence[str], ports: PortSpec, seed: int, block_size: Optional[int] = None) -> Iterator[Tuple[str, int]]:
+    """
+    Lazily walks the ip x port space in a seeded pseudo-random order, so
+    consecutive probes land on different hosts and ports. Memory use is
+    constant: probe indices are drawn from a FeistelPermutation.
+
+    With `block_size`, the port list is taken one block of that many ports at
+    a time and only the probes of the current block (across all hosts) are
+    shuffled, so (host, port block) units finish in order for the journal.
+    """
+    host_count = len(hosts)
+    block_size = block_size or len(ports)
+    for first in range(0, len(ports), block_size):
+        size = min(block_size, len(ports) - first)
+        for index in FeistelPermutation(host_count * size, seed + first):
+            port_index, host_index = divmod(index, host_count)
+            yield hosts[host_index], ports[first + port_index]
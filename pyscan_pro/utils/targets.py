@@ -0,0 +1,392 @@
+import os
+import socket
+import logging
+import threading
+import ipaddress
+from bisect import bisect_right
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+from utils.dns import BulkResolver, resolve_host
+
+logger = logging.getLogger("PyScanPro.Targets")
+
+# IPv6 prefixes/ranges holding more addresses than this are never enumerated
+# (a single /64 would take longer than the universe has existed); their
+# addresses come from a hint file instead, see TargetStream.
+MAX_ENUMERATED_V6 = 1 << 16
+
+class IntervalSet:
+    """
+    Immutable set of integers stored as sorted, merged, inclusive intervals.
+
+    Size is precomputed and a prefix-sum table makes positional access a
+    binary search, so len() is O(1), `in` and [index] are O(log intervals)
+    and iteration is lazy. A /8 or the full port range is a single interval.
+    """
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()):
+        merged: List[Tuple[int, int]] = []
+        for start, end in sorted(i for i in intervals if i[0] <= i[1]):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        self.intervals = merged
+        self._starts = [start for start, _ in merged]
+        # _offsets[i] = number of values before interval i
+        self._offsets = []
+        total = 0
+        for start, end in merged:
+            self._offsets.append(total)
+            total += end - start + 1
+        self._len = total
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in self.intervals:
+            yield from range(start, end + 1)
+
+    def __contains__(self, value: int) -> bool:
+        i = bisect_right(self._starts, value) - 1
+        return i >= 0 and value <= self.intervals[i][1]
+
+    def __getitem__(self, index: int) -> int:
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError(index)
+        i = bisect_right(self._offsets, index) - 1
+        return self.intervals[i][0] + index - self._offsets[i]
+
+    def subtract(self, other: "IntervalSet") -> "IntervalSet":
+        """Returns a new set with every value of `other` removed."""
+        result = []
+        cuts = other.intervals
+        j = 0
+        for start, end in self.intervals:
+            while j < len(cuts) and cuts[j][1] < start:
+                j += 1
+            k = j
+            while start <= end:
+                if k >= len(cuts) or cuts[k][0] > end:
+                    result.append((start, end))
+                    break
+                if cuts[k][0] > start:
+                    result.append((start, cuts[k][0] - 1))
+                start = max(start, cuts[k][1] + 1)
+                k += 1
+        return IntervalSet(result)
+
+class PortSpec(IntervalSet):
+    """
+    Set of ports to scan, e.g. PortSpec.parse('22,80,8000-8100', exclude='8080').
+
+    A spec built with ranked() keeps an explicit probe order: iteration and
+    [index] follow it instead of ascending port numbers, while membership and
+    `intervals` stay those of the plain set.
+    """
+    def __init__(
+        self,
+        intervals: Iterable[Tuple[int, int]] = (),
+        text: Optional[str] = None,
+        exclude: Optional[str] = None,
+        order: Optional[List[int]] = None
+    ):
+        super().__init__(intervals)
+        self.text = text if text is not None else ','.join(
+            str(start) if start == end else f"{start}-{end}" for start, end in self.intervals
+        )
+        self.exclude = exclude
+        self.order = order
+
+    @classmethod
+    def ranked(cls, ports: Iterable[int], text: Optional[str] = None, exclude: Optional[str] = None) -> "PortSpec":
+        """Ports probed in the given order (e.g. most frequently open first), minus `exclude`."""
+        excluded = IntervalSet(_parse_port_intervals(exclude)) if exclude else IntervalSet()
+        order = list(dict.fromkeys(port for port in ports if port not in excluded))
+        return cls(((port, port) for port in order), text, exclude, order)
+
+    def __iter__(self) -> Iterator[int]:
+        if self.order is None:
+            return super().__iter__()
+        return iter(self.order)
+
+    def __getitem__(self, index: int) -> int:
+        if self.order is None:
+            return super().__getitem__(index)
+        return self.order[index]
+
+    @classmethod
+    def parse(cls, port_range: str, exclude: Optional[str] = None) -> "PortSpec":
+        ports = IntervalSet(_parse_port_intervals(port_range))
+        if exclude:
+            ports = ports.subtract(IntervalSet(_parse_port_intervals(exclude)))
+        return cls(ports.intervals, port_range, exclude)
+
+    def __str__(self) -> str:
+        return self.text
+
+def _parse_port_intervals(port_range: str) -> List[Tuple[int, int]]:
+    intervals = []
+    for part in (p.strip() for p in port_range.split(',')):
+        try:
+            if '-' in part:
+                start, end = map(int, part.split('-'))
+                intervals.append((start, end))
+            else:
+                port = int(part)
+                intervals.append((port, port))
+        except ValueError:
+            pass
+    return intervals
+
+class TargetSpec:
+    """
+    Set of target addresses, stored as integer intervals per IP version.
+
+    Accepts a comma-separated mix of single IPs, hostnames (every A and AAAA
+    record), CIDR networks (expanded like network.hosts(), without
+    network/broadcast addresses) and dash ranges ('10.0.0.5-10.0.0.80').
+    Nothing is expanded up front.
+    """
+    def __init__(self, v4: IntervalSet, v6: IntervalSet, text: str = "", exclude: Optional[str] = None):
+        self.v4 = v4
+        self.v6 = v6
+        self.text = text
+        self.exclude = exclude
+
+    @classmethod
+    def parse(cls, target: str, exclude: Optional[str] = None) -> "TargetSpec":
+        v4, v6 = (IntervalSet(i) for i in _parse_target_intervals(target))
+        if exclude:
+            ex4, ex6 = _parse_target_intervals(exclude, hosts_only=False)
+            v4, v6 = v4.subtract(IntervalSet(ex4)), v6.subtract(IntervalSet(ex6))
+        return cls(v4, v6, target, exclude)
+
+    @classmethod
+    def from_addresses(cls, addresses: Iterable[str], text: str = "") -> "TargetSpec":
+        """Builds a spec from individual IP address strings (duplicates collapse)."""
+        v4: List[Tuple[int, int]] = []
+        v6: List[Tuple[int, int]] = []
+        for ip in addresses:
+            address = ipaddress.ip_address(ip)
+            (v4 if address.version == 4 else v6).append((int(address), int(address)))
+        return cls(IntervalSet(v4), IntervalSet(v6), text)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __len__(self) -> int:
+        return len(self.v4) + len(self.v6)
+
+    def __bool__(self) -> bool:
+        return bool(self.v4) or bool(self.v6)
+
+    def __iter__(self) -> Iterator[str]:
+        for value in self.v4:
+            yield socket.inet_ntoa(value.to_bytes(4, 'big'))
+        for value in self.v6:
+            yield _v6_text(value)
+
+    def __contains__(self, ip: str) -> bool:
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+        return int(address) in (self.v4 if address.version == 4 else self.v6)
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        if index < len(self.v4):
+            return socket.inet_ntoa(self.v4[index].to_bytes(4, 'big'))
+        return _v6_text(self.v6[index - len(self.v4)])
+
+def _v6_text(value: int) -> str:
+    # inet_ntop is ~10x faster than str(IPv6Address) and matches what recvfrom() reports
+    return socket.inet_ntop(socket.AF_INET6, value.to_bytes(16, 'big'))
+
+def _parse_target_intervals(target: str, hosts_only: bool = True) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+    v4: List[Tuple[int, int]] = []
+    v6: List[Tuple[int, int]] = []
+    for part in (p.strip() for p in target.split(',')):
+        if not part:
+            continue
+        for version, start, end in _parse_target_part(part, hosts_only):
+            if hosts_only and version == 6 and end - start + 1 > MAX_ENUMERATED_V6:
+                logger.warning(f"Skipping {part}: too many addresses to enumerate, scan it with an IPv6 hint file")
+                continue
+            (v4 if version == 4 else v6).append((start, end))
+    return v4, v6
+
+def _parse_target_part(part: str, hosts_only: bool = True) -> List[Tuple[int, int, int]]:
+    """
+    Returns the (ip version, first, last) intervals one target token covers,
+    or [] if it is invalid. With hosts_only, CIDR networks leave out their
+    network/broadcast addresses.
+    """
+    literal = _parse_literal(part, hosts_only)
+    if literal:
+        return [literal]
+
+    # Resolves domain to IPs if a domain is passed
+    intervals = []
+    for ip in resolve_host(part):
+        address = ipaddress.ip_address(ip)
+        intervals.append((address.version, int(address), int(address)))
+    return intervals
+
+def _parse_literal(part: str, hosts_only: bool = True) -> Optional[Tuple[int, int, int]]:
+    """Parses an IP, CIDR or dash range without touching DNS; None if `part` is none of those."""
+    # Check if it's a CIDR network
+    if '/' in part:
+        try:
+            network = ipaddress.ip_network(part, strict=False)
+        except ValueError:
+            return None # Not a valid CIDR
+        first, last = int(network.network_address), int(network.broadcast_address)
+        if hosts_only and network.prefixlen < network.max_prefixlen - 1:
+            # Same addresses network.hosts() would yield
+            first, last = (first + 1, last - 1) if network.version == 4 else (first + 1, last)
+        return network.version, first, last
+
+    # Check if it's a dash range of addresses
+    if '-' in part and ':' not in part:
+        start, _, end = part.partition('-')
+        try:
+            first, last = ipaddress.ip_address(start), ipaddress.ip_address(end)
+            if first.version == last.version:
+                return first.version, int(first), int(last)
+        except ValueError:
+            pass # May be a hostname containing a dash
+
+    try:
+        address = ipaddress.ip_address(part)
+        return address.version, int(address), int(address)
+    except ValueError:
+        return None # Possibly a hostname
+
+class TargetStream:
+    """
+    Targets whose addresses are only discovered while the scan runs: `-iL`
+    list files and IPv6 prefixes too large to enumerate.
+
+    IPs, ranges and small networks are available at once. Hostnames are handed
+    to a BulkResolver in the background and their addresses are yielded as each
+    lookup finishes, so the scan starts while resolution is still in flight.
+    Large IPv6 prefixes are expanded lazily from a `hints` file of known
+    addresses (one or more per line), which is streamed rather than loaded,
+    yielding the addresses that fall inside one of them. Every address is
+    yielded once, however many names or hints lead to it.
+    """
+    def __init__(
+        self,
+        tokens: Iterable[str],
+        text: str,
+        exclude: Optional[str] = None,
+        resolver: Optional[BulkResolver] = None,
+        hints: Optional[str] = None
+    ):
+        self.text = text
+        self.exclude = exclude
+        self.resolver = resolver or BulkResolver()
+        self.hints = hints
+        if hints and not os.path.isfile(hints):
+            raise FileNotFoundError(f"IPv6 hint file not found: {hints}")
+        literals, self.hostnames = [], []
+        self.sparse: List[Tuple[int, int]] = [] # IPv6 intervals only reachable through hints
+        for token in tokens:
+            literal = _parse_literal(token)
+            if literal is None:
+                self.hostnames.append(token)
+            elif literal[0] == 6 and literal[2] - literal[1] + 1 > MAX_ENUMERATED_V6:
+                self.sparse.append(literal[1:])
+            else:
+                literals.append(token)
+        if self.sparse and not hints:
+            logger.warning(f"{len(self.sparse)} IPv6 prefix(es) are too large to enumerate and no hint file was given; skipping them")
+
+        self.literals = TargetSpec.parse(','.join(literals), exclude)
+        self._excluded = TargetSpec.parse(exclude) if exclude else None
+        self._streamed: Set[str] = set()
+        self._pending = len(set(self.hostnames))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(
+        cls,
+        path: str,
+        exclude: Optional[str] = None,
+        resolver: Optional[BulkResolver] = None,
+        hints: Optional[str] = None,
+        extra: Optional[str] = None
+    ) -> "TargetStream":
+        """
+        Reads an `-iL` list: one or more targets per line, blank lines and '#'
+        comments skipped. `extra` targets (comma-separated, as given on the
+        command line) are scanned along with the file's.
+        """
+        tokens = [t.strip() for t in extra.split(',') if t.strip()] if extra else []
+        with open(path) as f:
+            tokens += [token for line in f for token in _split_line(line)]
+        return cls(tokens, f"{extra} -iL {path}" if extra else f"-iL {path}", exclude, resolver, hints)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def estimate(self) -> int:
+        """Addresses known so far plus one per unresolved hostname; exact once the stream is exhausted."""
+        with self._lock:
+            return len(self.literals) + len(self._streamed) + self._pending
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            self._streamed = set()
+            self._pending = len(set(self.hostnames))
+        # Lookups are submitted here, so they run while the other targets are scanned
+        answers = self.resolver.resolve(self.hostnames)
+        try:
+            yield from self.literals
+            yield from self._new(self._hinted())
+            for _name, addresses in answers:
+                with self._lock:
+                    self._pending -= 1
+                yield from self._new(addresses)
+        finally:
+            answers.close()
+
+    def _new(self, addresses: Iterable[str]) -> Iterator[str]:
+        """Drops addresses already yielded, scanned as literals, or excluded."""
+        for ip in addresses:
+            if ip in self._streamed or ip in self.literals or (self._excluded and ip in self._excluded):
+                continue
+            with self._lock:
+                self._streamed.add(ip)
+            yield ip
+
+    def _hinted(self) -> Iterator[str]:
+        """Streams the hint file, yielding its addresses that fall inside a large IPv6 prefix."""
+        if not self.sparse or not self.hints:
+            return
+        with open(self.hints) as f:
+            for line in f:
+                for token in _split_line(line):
+                    try:
+                        address = ipaddress.IPv6Address(token)
+                    except ValueError:
+                        continue
+                    value = int(address)
+                    if any(first <= value <= last for first, last in self.sparse):
+                        yield _v6_text(value)
+
+    def collect(self) -> TargetSpec:
+        """Waits for the whole stream and returns the complete, indexable TargetSpec."""
+        return TargetSpec.from_addresses(self, str(self))
+
+def _split_line(line: str) -> List[str]:
+    """Target tokens on one line of a list file: comma/space separated, '#' starts a comment."""
+    return line.split('#', 1)[0].replace(',', ' ').split()